@@ -0,0 +1,145 @@
+"""
+Large-blob download throughput: the SDK's parallel readinto vs ranged writes.
+
+    python benchmarks/bench_downloads.py --size-mb 512 --rtt-ms 20 --stream-mbps 200
+
+Downloads come from a local blob stand-in that sleeps --rtt-ms per request
+and caps every response stream at --stream-mbps, the way a single TCP
+connection to storage is capped, so the numbers isolate request
+parallelism from the local disk. Blob bytes are a repeated pattern, which
+keeps 1-100 GB runs cheap in memory. The readinto path is the previous
+_download_one: download_blob(max_concurrency=workers).readinto(fh), which
+the SDK serves with one GET for the first 32 MiB and then 4 MiB GETs on
+`workers` threads, each chunk buffered and written under a lock; the MD5
+is then computed by reading the file back.
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from thoa.core.job_utils import compute_md5_buffered
+from thoa.core.transfer import DOWNLOAD_RANGE_SIZE, download_ranges, preallocate
+
+# azure-storage-blob defaults: max_single_get_size and max_chunk_get_size.
+SDK_SINGLE_GET_SIZE = 32 * 1024 * 1024
+SDK_CHUNK_GET_SIZE = 4 * 1024 * 1024
+
+PATTERN = os.urandom(1024 * 1024)
+
+
+def _pattern_bytes(offset, length):
+    start = offset % len(PATTERN)
+    reps = (start + length) // len(PATTERN) + 1
+    return (PATTERN * reps)[start:start + length]
+
+
+class ThrottledDownloader:
+
+    def __init__(self, offset, length, rtt, bytes_per_second, chunk_size):
+        self.offset = offset
+        self.length = length
+        self.rtt = rtt
+        self.bytes_per_second = bytes_per_second
+        self.chunk_size = chunk_size
+
+    def chunks(self):
+        time.sleep(self.rtt)
+        pos, end = self.offset, self.offset + self.length
+        while pos < end:
+            n = min(self.chunk_size, end - pos)
+            time.sleep(n / self.bytes_per_second)
+            yield _pattern_bytes(pos, n)
+            pos += n
+
+    def readinto(self, stream):
+        for chunk in self.chunks():
+            stream.write(chunk)
+        return self.length
+
+
+class ThrottledBlobClient:
+    """Blob stand-in: one round trip per request, a bandwidth cap per stream."""
+
+    def __init__(self, size, rtt, bytes_per_second, chunk_size=4 * 1024 * 1024):
+        self.size = size
+        self.rtt = rtt
+        self.bytes_per_second = bytes_per_second
+        self.chunk_size = chunk_size
+        self.requests = 0
+
+    def download_blob(self, offset=None, length=None, **kwargs):
+        self.requests += 1
+        offset = offset or 0
+        length = self.size - offset if length is None else length
+        return ThrottledDownloader(offset, length, self.rtt, self.bytes_per_second, self.chunk_size)
+
+
+def readinto(blob, path, size, workers):
+    lock = threading.Lock()
+
+    def fetch(fh, offset, length):
+        data = b"".join(blob.download_blob(offset=offset, length=length).chunks())
+        with lock:
+            fh.seek(offset)
+            fh.write(data)
+
+    with open(path, "wb") as fh:
+        first = min(size, SDK_SINGLE_GET_SIZE)
+        fetch(fh, 0, first)
+        offsets = range(first, size, SDK_CHUNK_GET_SIZE)
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(lambda off: fetch(fh, off, min(SDK_CHUNK_GET_SIZE, size - off)), offsets))
+    return compute_md5_buffered(Path(path))
+
+
+def ranged(blob, path, size, workers):
+    md5 = hashlib.md5()
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        preallocate(fd, size)
+        download_ranges(blob, fd, 0, size, md5=md5, workers=workers)
+    finally:
+        os.close(fd)
+    return md5.hexdigest()
+
+
+def run(name, download, blob, path, size, workers):
+    blob.requests = 0
+    started = time.perf_counter()
+    digest = download(blob, path, size, workers)
+    elapsed = time.perf_counter() - started
+    os.unlink(path)
+    mbps = size / elapsed / (1024 * 1024)
+    print(f"{name:<11} {mbps:>10.1f} {blob.requests:>10} {elapsed:>9.2f}  {digest}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--rtt-ms", type=float, default=20.0)
+    parser.add_argument("--stream-mbps", type=float, default=100.0, help="per-connection cap, MiB/s")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    blob = ThrottledBlobClient(size, args.rtt_ms / 1000, args.stream_mbps * 1024 * 1024)
+
+    print(
+        f"{args.size_mb} MiB, {args.workers} workers, {DOWNLOAD_RANGE_SIZE // (1024 * 1024)} MiB ranges, "
+        f"{args.rtt_ms:.0f} ms per request, {args.stream_mbps:.0f} MiB/s per stream\n"
+    )
+    print(f"{'path':<11} {'MiB/s':>10} {'requests':>10} {'seconds':>9}  md5")
+
+    with tempfile.TemporaryDirectory(prefix="thoa-bench-") as tmp:
+        path = os.path.join(tmp, "blob.bin")
+        run("readinto", readinto, blob, path, size, args.workers)
+        run("ranged", ranged, blob, path, size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
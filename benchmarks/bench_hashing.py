@@ -0,0 +1,111 @@
+"""
+Compare MD5 hashing strategies: throughput and page-cache growth.
+
+    python benchmarks/bench_hashing.py --sizes-mb 64 512 --repeat 3
+    python benchmarks/bench_hashing.py --dir /mnt/nas/fastq   # existing files
+
+Without --dir, random files are written to a temporary directory.
+Page-cache growth is read from /proc/meminfo ("Cached") and is only reported
+on Linux. For cold-cache numbers run as root with --drop-caches.
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from thoa.core.job_utils import compute_md5_buffered, compute_md5_fadvise, compute_md5_mmap
+
+STRATEGIES = {
+    "buffered": compute_md5_buffered,
+    "mmap": compute_md5_mmap,
+    "fadvise": compute_md5_fadvise,
+}
+
+
+def _cached_kib() -> int | None:
+    try:
+        with open("/proc/meminfo") as fh:
+            for line in fh:
+                if line.startswith("Cached:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _drop_caches():
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as fh:
+        fh.write("3\n")
+
+
+def _evict(files):
+    """Best-effort eviction of just our files, so every strategy starts cold."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for f in files:
+        with open(f, "rb") as fh:
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _make_files(root: Path, sizes_mb):
+    files = []
+    block = os.urandom(1024 * 1024)
+    for i, size_mb in enumerate(sizes_mb):
+        path = root / f"bench_{i}_{size_mb}mb.bin"
+        with open(path, "wb") as fh:
+            for _ in range(size_mb):
+                fh.write(block)
+        files.append(path)
+    return files
+
+
+def run(files, repeat, drop_caches):
+    total_mb = sum(f.stat().st_size for f in files) / 1024 ** 2
+    print(f"{len(files)} file(s), {total_mb:.0f} MiB total, best of {repeat}\n")
+    print(f"{'strategy':<10} {'MiB/s':>10} {'cache +MiB':>12}")
+
+    digests = {}
+    for name, fn in STRATEGIES.items():
+        best = None
+        growth = None
+        for _ in range(repeat):
+            if drop_caches:
+                _drop_caches()
+            else:
+                _evict(files)
+            before = _cached_kib()
+            started = time.perf_counter()
+            digests[name] = [fn(f) for f in files]
+            elapsed = time.perf_counter() - started
+            after = _cached_kib()
+            if best is None or elapsed < best:
+                best = elapsed
+                growth = (after - before) / 1024 if before is not None and after is not None else None
+        growth_str = f"{growth:.0f}" if growth is not None else "n/a"
+        print(f"{name:<10} {total_mb / best:>10.1f} {growth_str:>12}")
+
+    assert len({tuple(d) for d in digests.values()}) == 1, "strategies disagree"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[16, 256])
+    parser.add_argument("--dir", type=Path, help="Hash the files in this directory instead of generated ones.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--drop-caches", action="store_true", help="Drop the whole page cache before each run (root).")
+    args = parser.parse_args()
+
+    if args.dir:
+        files = sorted(p for p in args.dir.iterdir() if p.is_file())
+        run(files, args.repeat, args.drop_caches)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="thoa-bench-") as tmp:
+        files = _make_files(Path(tmp), args.sizes_mb)
+        run(files, args.repeat, args.drop_caches)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Small-file upload throughput: legacy three-request path vs single-request path.
+
+    python benchmarks/bench_small_uploads.py --files 500 --size-kb 4 --rtt-ms 40
+
+Uploads go to a local blob stand-in that sleeps --rtt-ms per request, so the
+numbers isolate request count and concurrency from real network bandwidth.
+The legacy path is the previous upload_file_sas: upload_blob with
+upload=incomplete, then get_blob_properties, then set_blob_metadata.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from thoa.core import job_utils
+
+
+class LatencyBlobClient:
+    """Blob stand-in that charges one round trip per request."""
+
+    requests = 0
+    _lock = threading.Lock()
+    rtt = 0.0
+    blobs = {}
+
+    def __init__(self, url):
+        self.url = url
+
+    @classmethod
+    def from_blob_url(cls, url):
+        return cls(url)
+
+    def _round_trip(self):
+        with self._lock:
+            type(self).requests += 1
+        time.sleep(self.rtt)
+
+    def upload_blob(self, data, metadata=None, **kwargs):
+        self._round_trip()
+        self.blobs[self.url] = (data.read(), dict(metadata or {}))
+
+    def get_blob_properties(self, **kwargs):
+        self._round_trip()
+        return SimpleNamespace(metadata=dict(self.blobs[self.url][1]))
+
+    def set_blob_metadata(self, metadata=None, **kwargs):
+        self._round_trip()
+        self.blobs[self.url] = (self.blobs[self.url][0], dict(metadata or {}))
+
+
+def legacy_upload(local_path, sas_url, local_md5):
+    blob_client = LatencyBlobClient.from_blob_url(sas_url)
+    with open(local_path, "rb") as data:
+        blob_client.upload_blob(data, overwrite=True, metadata={"md5": local_md5, "upload": "incomplete"})
+    metadata = blob_client.get_blob_properties().metadata or {}
+    metadata["upload"] = "complete"
+    blob_client.set_blob_metadata(metadata)
+
+
+def run(name, upload, files, workers):
+    LatencyBlobClient.requests = 0
+    LatencyBlobClient.blobs = {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda f: upload(f, f"https://bench/c/{f.name}", "0" * 32), files))
+    elapsed = time.perf_counter() - started
+    print(f"{name:<8} {len(files) / elapsed:>10.1f} {LatencyBlobClient.requests:>10} {elapsed:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--size-kb", type=int, default=4)
+    parser.add_argument("--rtt-ms", type=float, default=40.0)
+    parser.add_argument("--workers", type=int, default=job_utils.max_threads)
+    args = parser.parse_args()
+
+    LatencyBlobClient.rtt = args.rtt_ms / 1000
+
+    with tempfile.TemporaryDirectory(prefix="thoa-bench-") as tmp:
+        files = []
+        for i in range(args.files):
+            path = Path(tmp) / f"f{i:05d}.bin"
+            path.write_bytes(os.urandom(args.size_kb * 1024))
+            files.append(path)
+
+        print(f"{args.files} x {args.size_kb} KiB, {args.workers} workers, {args.rtt_ms:.0f} ms per request\n")
+        print(f"{'path':<8} {'files/s':>10} {'requests':>10} {'seconds':>9}")
+
+        with patch.object(job_utils, "BlobClient", LatencyBlobClient), \
+                patch.object(job_utils, "print", lambda *a, **k: None, create=True):
+            run("legacy", legacy_upload, files, args.workers)
+            run("single", job_utils.upload_file_sas, files, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+In-memory stand-in for azure.storage.blob.BlobClient, for unit tests.
+
+Blobs live in a FakeBlobStore keyed by blob URL (without the SAS query).
+Only the calls thoa makes are implemented; every call is counted in
+`store.calls` so tests can assert on request counts.
+"""
+import hashlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError, ServiceResponseError
+from azure.storage.blob import BlobBlock
+
+
+class FakeBlobStore:
+
+    def __init__(self, chunk_size: int = 4 * 1024 * 1024):
+        self.blobs = {}
+        self.uncommitted = {}
+        self.calls = Counter()
+        self.chunk_size = chunk_size
+        self.interruptions = {}
+        self.ranges = []
+        self._etag = 0
+
+    def client(self, url):
+        return FakeBlobClient(self, url)
+
+    def put(self, url, data: bytes, metadata=None):
+        self._etag += 1
+        self.blobs[_key(url)] = {
+            "data": bytes(data),
+            "metadata": dict(metadata or {}),
+            "etag": f'"0x{self._etag:X}"',
+            "last_modified": datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=self._etag),
+        }
+
+    def data(self, url) -> bytes:
+        return self.blobs[_key(url)]["data"]
+
+    def metadata(self, url) -> dict:
+        return self.blobs[_key(url)]["metadata"]
+
+    def interrupt(self, url, *after_bytes: int):
+        """Make the next downloads of `url` fail, the i-th one after sending after_bytes[i]."""
+        self.interruptions[_key(url)] = list(after_bytes)
+
+
+def _key(url):
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+class FakeBlobClient:
+
+    def __init__(self, store: FakeBlobStore, url: str):
+        self.store = store
+        self.url = url
+        self.key = _key(url)
+        self.blob_name = self.key.rsplit("/", 1)[-1]
+
+    def _blob(self):
+        blob = self.store.blobs.get(self.key)
+        if blob is None:
+            raise ResourceNotFoundError("The specified blob does not exist.")
+        return blob
+
+    def upload_blob(self, data, overwrite=False, metadata=None, **kwargs):
+        self.store.calls["upload_blob"] += 1
+        payload = data.read() if hasattr(data, "read") else bytes(data)
+        self.store.put(self.url, payload, metadata)
+
+    def get_blob_properties(self, **kwargs):
+        self.store.calls["get_blob_properties"] += 1
+        blob = self._blob()
+        return SimpleNamespace(
+            size=len(blob["data"]),
+            metadata=dict(blob["metadata"]),
+            etag=blob["etag"],
+            last_modified=blob["last_modified"],
+        )
+
+    def set_blob_metadata(self, metadata=None, **kwargs):
+        self.store.calls["set_blob_metadata"] += 1
+        self._blob()["metadata"] = dict(metadata or {})
+
+    def stage_block(self, block_id, data, length=None, transactional_content_md5=None, **kwargs):
+        self.store.calls["stage_block"] += 1
+        payload = bytes(data)
+        if transactional_content_md5 is not None:
+            assert transactional_content_md5 == hashlib.md5(payload).digest(), "block md5 mismatch"
+        self.store.uncommitted.setdefault(self.key, {})[block_id] = payload
+
+    def get_block_list(self, block_list_type="committed", **kwargs):
+        self.store.calls["get_block_list"] += 1
+        uncommitted = []
+        for block_id, payload in self.store.uncommitted.get(self.key, {}).items():
+            block = BlobBlock(block_id=block_id)
+            block.size = len(payload)
+            uncommitted.append(block)
+        return [], uncommitted
+
+    def commit_block_list(self, block_list, metadata=None, **kwargs):
+        self.store.calls["commit_block_list"] += 1
+        staged = self.store.uncommitted.pop(self.key, {})
+        data = b"".join(staged[block.id] for block in block_list)
+        self.store.put(self.url, data, metadata)
+
+    def download_blob(self, offset=None, length=None, etag=None, match_condition=None, **kwargs):
+        self.store.calls["download_blob"] += 1
+        blob = self._blob()
+        if match_condition == MatchConditions.IfNotModified and etag != blob["etag"]:
+            raise ResourceModifiedError("The condition specified using HTTP conditional header(s) is not met.")
+        start = offset or 0
+        end = len(blob["data"]) if length is None else min(len(blob["data"]), start + length)
+        self.store.ranges.append((start, end))
+        cutoffs = self.store.interruptions.get(self.key)
+        cutoff = cutoffs.pop(0) if cutoffs else None
+        downloader = FakeDownloader(blob["data"][start:end], self.store.chunk_size, cutoff)
+        downloader.properties = SimpleNamespace(
+            size=len(blob["data"]),
+            metadata=dict(blob["metadata"]),
+            etag=blob["etag"],
+            last_modified=blob["last_modified"],
+        )
+        return downloader
+
+
+class FakeDownloader:
+
+    def __init__(self, data: bytes, chunk_size: int, cutoff=None):
+        self.data = data
+        self.size = len(data)
+        self.chunk_size = chunk_size
+        self.cutoff = cutoff
+
+    def chunks(self):
+        sent = 0
+        for i in range(0, len(self.data), self.chunk_size):
+            chunk = self.data[i:i + self.chunk_size]
+            if self.cutoff is not None and sent + len(chunk) > self.cutoff:
+                if self.cutoff > sent:
+                    yield chunk[:self.cutoff - sent]
+                raise ServiceResponseError("Connection reset by peer")
+            sent += len(chunk)
+            yield chunk
+
+    def readall(self) -> bytes:
+        return b"".join(self.chunks())
+
+    def readinto(self, stream) -> int:
+        n = 0
+        for chunk in self.chunks():
+            stream.write(chunk)
+            n += len(chunk)
+        return n
@@ -0,0 +1,87 @@
+import hashlib
+import os
+
+from thoa.core.content_store import ContentStore, place
+
+
+def _md5(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+def _file(path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+class TestPlace:
+
+    def test_auto_shares_the_inode_when_it_cannot_reflink(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("thoa.core.content_store._reflink", lambda src, dest: False)
+        src = _file(tmp_path / "src", b"data")
+
+        assert place(src, tmp_path / "dest") == "hardlink"
+        assert os.path.samefile(src, tmp_path / "dest")
+
+    def test_copy_mode_never_hardlinks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("thoa.core.content_store._reflink", lambda src, dest: False)
+        src = _file(tmp_path / "src", b"data")
+
+        assert place(src, tmp_path / "dest", mode="copy") == "copy"
+        assert not os.path.samefile(src, tmp_path / "dest")
+        assert (tmp_path / "dest").read_bytes() == b"data"
+
+
+class TestContentStore:
+
+    def test_add_then_checkout_across_reloads(self, tmp_path):
+        store = ContentStore.load(tmp_path / "store", max_bytes=1 << 20)
+        src = _file(tmp_path / "a" / "ref.fa", b"ACGT" * 100)
+        store.add(_md5(src.read_bytes()), src)
+        store.save()
+
+        reloaded = ContentStore.load(tmp_path / "store", max_bytes=1 << 20)
+        dest = tmp_path / "b" / "ref.fa"
+        dest.parent.mkdir()
+        assert reloaded.checkout(_md5(b"ACGT" * 100), dest, size=400)
+        assert dest.read_bytes() == b"ACGT" * 100
+        assert reloaded.bytes_reused == 400
+
+    def test_missing_or_wrong_size_is_a_miss(self, tmp_path):
+        store = ContentStore.load(tmp_path / "store", max_bytes=1 << 20)
+        src = _file(tmp_path / "a", b"hello")
+        store.add(_md5(b"hello"), src)
+
+        assert not store.checkout(_md5(b"other"), tmp_path / "x")
+        assert not store.checkout(_md5(b"hello"), tmp_path / "x", size=6)
+        assert not (tmp_path / "x").exists()
+
+    def test_object_changed_in_place_is_dropped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("thoa.core.content_store._reflink", lambda src, dest: False)
+        store = ContentStore.load(tmp_path / "store", max_bytes=1 << 20)
+        src = _file(tmp_path / "a", b"hello")
+        store.add(_md5(b"hello"), src)
+
+        # The object is a hardlink of src, so editing src edits it too.
+        with open(src, "r+b") as fh:
+            fh.write(b"HELLO")
+        st = src.stat()
+        os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        assert not store.checkout(_md5(b"hello"), tmp_path / "x")
+        assert len(store) == 0
+
+    def test_evicts_least_recently_used_first(self, tmp_path):
+        store = ContentStore.load(tmp_path / "store", max_bytes=25)
+        for i, name in enumerate(("old", "mid", "new")):
+            data = name.encode() * 4
+            store.add(_md5(data), _file(tmp_path / name, data))
+            store._entries[_md5(data)][2] = 1000 + i
+        store._entries[_md5(b"old" * 4)][2] = 2000  # used most recently
+
+        removed, freed = store.evict()
+
+        assert (removed, freed) == (1, 12)
+        assert _md5(b"mid" * 4) not in store._entries
+        assert not store.object_path(_md5(b"mid" * 4)).exists()
+        assert store.total_bytes() == 24
@@ -0,0 +1,53 @@
+import hashlib
+from unittest.mock import patch
+
+from typer.testing import CliRunner
+
+from thoa.cli import app
+from thoa.core.api_utils import api_client
+from fake_blob import FakeBlobStore
+
+runner = CliRunner()
+
+BLOB_URL = "https://acct.blob.core.windows.net/c/sample.vcf?sig=x"
+
+
+def test_cat_keeps_api_errors_off_stdout(monkeypatch):
+    monkeypatch.setattr(api_client, "api_key", None)
+
+    result = runner.invoke(app, ["dataset", "cat", "ds1", "sample.vcf"])
+
+    assert result.exit_code == 1
+    assert result.stdout == ""
+    assert "No API key provided" in result.stderr
+
+
+def test_cat_stdout_holds_only_file_bytes_with_api_debug(monkeypatch):
+    payload = b"##fileformat=VCFv4.2\n" * 100
+    store = FakeBlobStore(chunk_size=1000)
+    store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+    monkeypatch.setattr("thoa.core.dataset_utils.BlobClient.from_blob_url", store.client)
+    monkeypatch.setattr("thoa.core.api_utils.settings.THOA_API_DEBUG", True)
+    monkeypatch.setattr(api_client, "api_key", "key")
+
+    responses = {
+        "/datasets?public_id=ds1": [{"adjusted_context": {"/data/sample.vcf": "id1"}, "remaining_downloads": 1}],
+        "/datasets/ds1/decrement_downloads": {},
+        "/temporary_links/id1/request-download": {"url": BLOB_URL},
+    }
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, path):
+            self.path = path
+
+        def json(self):
+            return responses[self.path]
+
+    with patch.object(api_client.client, "request", side_effect=lambda method, path, **kw: Response(path[len("/api"):])):
+        result = runner.invoke(app, ["dataset", "cat", "ds1", "sample.vcf"])
+
+    assert result.exit_code == 0
+    assert result.stdout_bytes == payload
+    assert "DEBUG: Successful GET" in result.stderr
@@ -1,9 +1,14 @@
+import hashlib
+import io
+import json
+import threading
+
 import pytest
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 from thoa.core.dataset_utils import (
     _filter_files_by_id_or_path,
-    _fmt_bytes,
     _nearest_existing_parent,
     _required_with_headroom,
     _format_timestamp,
@@ -13,7 +18,34 @@ from thoa.core.dataset_utils import (
     _extract_url,
     _safe_dest,
     _build_tree,
+    _with_download_links,
+    _download_one,
+    download_files,
+    download_job_outputs,
+    _split_by_manifest,
+    _group_by_file_id,
+    _resolve_dataset_path,
+    stream_dataset_file,
 )
+from thoa.core.download_manifest import DownloadManifest
+from thoa.core.content_store import ContentStore
+from thoa.core import dataset_utils, transfer
+from azure.core.exceptions import ServiceResponseError
+from fake_blob import FakeBlobClient, FakeBlobStore, FakeDownloader
+
+BLOB_URL = "https://acct.blob.core.windows.net/outputs/result.bam?sig=x"
+
+
+@pytest.fixture
+def blob_store(monkeypatch):
+    store = FakeBlobStore(chunk_size=1000)
+    monkeypatch.setattr("thoa.core.dataset_utils.BlobClient.from_blob_url", store.client)
+    monkeypatch.setattr("thoa.core.dataset_utils.DOWNLOAD_BACKOFF_SECONDS", 0)
+    return store
+
+
+def _download(base_dir, verify_md5=False):
+    return _download_one("out/result.bam", "id1", {"url": BLOB_URL}, base_dir, verify_md5, 2, 1000)
 
 
 class TestFilterFilesByIdOrPath:
@@ -51,27 +83,6 @@ class TestFilterFilesByIdOrPath:
         assert _filter_files_by_id_or_path({}, ["*.txt"], None) == {}
 
 
-class TestFmtBytes:
-
-    def test_bytes(self):
-        assert _fmt_bytes(500) == "500.00 B"
-
-    def test_kibibytes(self):
-        result = _fmt_bytes(2048)
-        assert "KiB" in result
-
-    def test_mebibytes(self):
-        result = _fmt_bytes(5 * 1024 * 1024)
-        assert "MiB" in result
-
-    def test_gibibytes(self):
-        result = _fmt_bytes(2 * 1024 ** 3)
-        assert "GiB" in result
-
-    def test_zero(self):
-        assert _fmt_bytes(0) == "0.00 B"
-
-
 class TestNearestExistingParent:
 
     def test_existing_directory(self, tmp_path):
@@ -203,3 +214,477 @@ class TestBuildTree:
 
     def test_empty(self):
         assert _build_tree({}) == {}
+
+
+class TestWithDownloadLinks:
+
+    def test_mints_links_concurrently_once_per_file_id(self):
+        barrier = threading.Barrier(3, timeout=5)
+        mock_client = MagicMock()
+
+        def post(path):
+            barrier.wait()  # only passes if three link requests are in flight at once
+            return {"url": f"https://blob{path}"}
+
+        mock_client.post.side_effect = post
+        files = {"a.txt": "id1", "copy/a.txt": "id1", "b.txt": "id2", "c.txt": "id3"}
+
+        with patch("thoa.core.dataset_utils.client", mock_client):
+            items = list(_with_download_links(files, workers=3))
+
+        assert mock_client.post.call_count == 3
+        assert sorted((p, fid) for p, fid, _ in items) == sorted((p, fid) for p, fid in files.items())
+        assert all(link["url"].endswith(f"{fid}/request-download") for _, fid, link in items)
+
+    def test_failed_request_yields_no_link(self):
+        mock_client = MagicMock()
+        mock_client.post.side_effect = ConnectionError("reset")
+
+        with patch("thoa.core.dataset_utils.client", mock_client):
+            items = list(_with_download_links({"a.txt": "id1"}))
+
+        assert items == [("a.txt", "id1", None)]
+
+
+class TestDownloadFiles:
+
+    def test_downloads_start_before_all_links_are_minted(self, tmp_path):
+        first_done = threading.Event()
+
+        def fake_download(path_string, file_id, *args):
+            first_done.set()
+            return path_string, file_id, True, "downloaded"
+
+        def slow_links():
+            yield "a.txt", "id1", {"url": "u1"}
+            assert first_done.wait(timeout=5), "first download did not start while links were pending"
+            yield "b.txt", "id2", {"url": "u2"}
+
+        with patch("thoa.core.dataset_utils._download_one", side_effect=fake_download):
+            counts, failures = download_files(slow_links(), tmp_path, workers=2)
+
+        assert counts["success"] == 2
+        assert failures == []
+
+    def test_counts_outcomes(self, tmp_path):
+        notes = {"id1": (True, "skipped_exists"), "id2": (False, "no_url"), "id3": (True, "downloaded")}
+
+        def fake_download(path_string, file_id, *args):
+            return (path_string, file_id, *notes[file_id])
+
+        with patch("thoa.core.dataset_utils._download_one", side_effect=fake_download):
+            counts, failures = download_files(
+                [(f"{fid}.txt", fid, None) for fid in notes], tmp_path
+            )
+
+        assert counts == {"skipped": 1, "failed": 1, "success": 1}
+        assert failures == [("id2.txt", "no_url")]
+
+
+class TestDownloadOneResume:
+
+    def test_retries_transient_errors_from_where_it_stopped(self, tmp_path, blob_store):
+        payload = bytes(range(256)) * 20
+        blob_store.put(BLOB_URL, payload)
+        blob_store.interrupt(BLOB_URL, 2500)
+
+        _, _, ok, note = _download(tmp_path)
+
+        assert (ok, note) == (True, "downloaded")
+        assert (tmp_path / "out" / "result.bam").read_bytes() == payload
+        assert blob_store.ranges == [(0, 5120), (2500, 5120)]
+        assert list((tmp_path / "out").iterdir()) == [tmp_path / "out" / "result.bam"]
+
+    def test_partial_is_kept_after_giving_up_and_resumed_later(self, tmp_path, blob_store):
+        payload = b"A" * 5000
+        blob_store.put(BLOB_URL, payload)
+        blob_store.interrupt(BLOB_URL, 1000, 0, 0, 0, 0)
+
+        _, _, ok, note = _download(tmp_path)
+
+        assert not ok and note.startswith("error:")
+        assert (tmp_path / "out" / "result.bam.part").stat().st_size == 1000
+
+        blob_store.ranges.clear()
+        _, _, ok, _ = _download(tmp_path)
+
+        assert ok
+        assert blob_store.ranges == [(1000, 5000)]
+        assert (tmp_path / "out" / "result.bam").read_bytes() == payload
+
+    def test_stale_partial_of_replaced_blob_is_discarded(self, tmp_path, blob_store):
+        blob_store.put(BLOB_URL, b"old" * 1000)
+        blob_store.interrupt(BLOB_URL, 1500, 0, 0, 0, 0)
+        _download(tmp_path)
+
+        blob_store.put(BLOB_URL, b"new!" * 1000)
+        blob_store.ranges.clear()
+        _, _, ok, _ = _download(tmp_path)
+
+        assert ok
+        assert blob_store.ranges == [(0, 4000)]
+        assert (tmp_path / "out" / "result.bam").read_bytes() == b"new!" * 1000
+
+    def test_reads_into_the_part_file_with_per_blob_concurrency(self, tmp_path, blob_store):
+        payload = bytes(range(256)) * 20
+        blob_store.put(BLOB_URL, payload)
+        blob_store.interrupt(BLOB_URL, 2500)
+
+        with patch.object(FakeBlobClient, "download_blob", autospec=True,
+                          side_effect=FakeBlobClient.download_blob) as download:
+            _, _, ok, _ = _download(tmp_path)
+
+        assert ok
+        assert [c.kwargs["max_concurrency"] for c in download.call_args_list] == [2, 2]
+        assert download.call_args_list[1].kwargs["offset"] == 2500
+
+    def test_out_of_order_parallel_writes_resume_from_the_contiguous_prefix(self, tmp_path, blob_store):
+        payload = bytes(range(256)) * 20
+        blob_store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+        readinto = FakeDownloader.readinto
+        calls = []
+
+        def parallel_readinto(self, stream):
+            # Like the SDK with max_concurrency > 1: chunks land out of
+            # order, then the connection drops with chunk 3 still missing.
+            calls.append(stream.tell())
+            if len(calls) > 1:
+                return readinto(self, stream)
+            start = stream.tell()
+            for i in (0, 2, 1, 4):
+                stream.seek(start + i * 1000)
+                stream.write(self.data[i * 1000:(i + 1) * 1000])
+            raise ServiceResponseError("Connection reset by peer")
+
+        with patch.object(FakeDownloader, "readinto", parallel_readinto):
+            _, _, ok, note = _download(tmp_path, verify_md5=True)
+
+        assert (ok, note) == (True, "downloaded_verified")
+        assert (tmp_path / "out" / "result.bam").read_bytes() == payload
+        assert calls == [0, 3000]
+        assert blob_store.ranges == [(0, 5120), (3000, 5120)]
+
+    def test_non_transient_error_is_not_retried(self, tmp_path, blob_store):
+        blob_store.put(BLOB_URL, b"x")
+        with patch("fake_blob.FakeBlobClient.download_blob", side_effect=ValueError("bad request")) as download:
+            _, _, ok, note = _download(tmp_path)
+
+        assert not ok and "bad request" in note
+        assert download.call_count == 1
+
+
+class TestDownloadOneVerification:
+
+    def test_verifies_without_reading_the_file_back(self, tmp_path, blob_store):
+        payload = b"ACGT" * 3000
+        blob_store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+
+        with patch("thoa.core.dataset_utils.compute_md5_buffered") as rehash:
+            _, _, ok, note = _download(tmp_path, verify_md5=True)
+
+        assert (ok, note) == (True, "downloaded_verified")
+        rehash.assert_not_called()
+
+    def test_resumed_download_is_verified(self, tmp_path, blob_store):
+        payload = bytes(range(256)) * 30
+        blob_store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+        blob_store.interrupt(BLOB_URL, 3000, 0, 0, 0, 0)
+        _download(tmp_path, verify_md5=True)
+
+        _, _, ok, note = _download(tmp_path, verify_md5=True)
+
+        assert (ok, note) == (True, "downloaded_verified")
+
+    def test_mismatch_is_reported_and_not_kept(self, tmp_path, blob_store):
+        blob_store.put(BLOB_URL, b"payload", {"md5": "0" * 32})
+
+        _, _, ok, note = _download(tmp_path, verify_md5=True)
+
+        assert (ok, note) == (False, "md5_mismatch")
+        assert list((tmp_path / "out").iterdir()) == []
+
+
+class TestDownloadOneRanged:
+
+    @pytest.fixture(autouse=True)
+    def small_ranges(self, monkeypatch):
+        monkeypatch.setattr("thoa.core.dataset_utils.RANGED_DOWNLOAD_MIN_BYTES", 1)
+        monkeypatch.setattr("thoa.core.dataset_utils.PART_STATE_SAVE_INTERVAL", 1)
+        monkeypatch.setattr("thoa.core.transfer.DOWNLOAD_RANGE_SIZE", 1000)
+
+    def test_large_blob_is_fetched_in_parallel_ranges_and_verified(self, tmp_path, blob_store):
+        payload = bytes(range(256)) * 40
+        blob_store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+
+        _, _, ok, note = _download(tmp_path, verify_md5=True)
+
+        assert (ok, note) == (True, "downloaded_verified")
+        assert (tmp_path / "out" / "result.bam").read_bytes() == payload
+        assert len(blob_store.ranges) == 11
+        assert list((tmp_path / "out").iterdir()) == [tmp_path / "out" / "result.bam"]
+
+    def test_progress_is_recorded_before_preallocating(self, tmp_path, blob_store):
+        blob_store.put(BLOB_URL, bytes(range(256)) * 40)
+        tmp = tmp_path / "out" / "result.bam.part"
+        seen = []
+
+        def killed_after_preallocate(fd, size):
+            seen.append(json.loads(dataset_utils._part_state_path(tmp).read_text()))
+            raise SystemExit("killed")
+
+        with patch("thoa.core.dataset_utils.preallocate", side_effect=killed_after_preallocate):
+            with pytest.raises(SystemExit):
+                _download(tmp_path)
+
+        assert seen[0]["committed"] == 0
+
+    @pytest.mark.parametrize("committed", [0, None])
+    def test_crash_right_after_preallocating_does_not_yield_a_zero_filled_file(self, tmp_path, blob_store, committed):
+        payload = bytes(range(256)) * 40
+        blob_store.put(BLOB_URL, payload)
+        blob = blob_store.client(BLOB_URL)
+        _, _, version = dataset_utils._get_remote_state(blob)
+
+        # The state a kill -9 leaves between preallocate() and the first
+        # progress save: a full-length zero-filled .part and its sidecar
+        # (without "committed" when written by an older client).
+        tmp = tmp_path / "out" / "result.bam.part"
+        tmp.parent.mkdir(parents=True)
+        tmp.write_bytes(bytes(len(payload)))
+        dataset_utils._save_part_state(tmp, version, committed)
+
+        _, _, ok, note = _download(tmp_path)
+
+        assert (ok, note) == (True, "downloaded")
+        assert (tmp_path / "out" / "result.bam").read_bytes() == payload
+
+    def test_interrupted_ranged_download_resumes_from_committed_prefix(self, tmp_path, blob_store):
+        payload = bytes(range(256)) * 40
+        blob_store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+
+        real_pwrite = transfer._pwrite_all
+        calls = []
+
+        def failing_pwrite(*args):
+            calls.append(args)
+            if len(calls) > 2:
+                raise OSError(5, "EIO")
+            real_pwrite(*args)
+
+        with patch("thoa.core.dataset_utils.DOWNLOAD_RETRIES", 0):
+            with patch("thoa.core.transfer._pwrite_all", side_effect=failing_pwrite):
+                _, _, ok, _ = _download_one("out/result.bam", "id1", {"url": BLOB_URL}, tmp_path, True, 1, 1000)
+        assert not ok
+
+        blob_store.ranges.clear()
+        _, _, ok, note = _download(tmp_path, verify_md5=True)
+
+        assert (ok, note) == (True, "downloaded_verified")
+        assert min(start for start, _ in blob_store.ranges) == 2000
+        assert (tmp_path / "out" / "result.bam").read_bytes() == payload
+
+
+class TestDownloadJobOutputs:
+
+    def _client(self, job, links):
+        client = MagicMock()
+        client.get.side_effect = lambda url, params=None: [job] if url.startswith("/jobs") else links
+        return client
+
+    def test_outputs_land_relative_to_the_output_directory(self, tmp_path, blob_store):
+        urls = {name: f"https://acct.blob.core.windows.net/o/{name}?sig=x" for name in ("a.txt", "b.txt")}
+        for name, url in urls.items():
+            blob_store.put(url, name.encode() * 10)
+        job = {"output_dataset_public_id": "ds1", "output_directory": "/home/u/results"}
+        links = [
+            {"url": urls["a.txt"], "client_path": "/home/u/results/a.txt"},
+            {"url": urls["b.txt"], "client_path": "/home/u/results/sub/b.txt"},
+        ]
+
+        with patch("thoa.core.dataset_utils.client", self._client(job, links)):
+            assert download_job_outputs("job1", tmp_path, verify_md5=False)
+
+        assert (tmp_path / "a.txt").read_bytes() == b"a.txt" * 10
+        assert (tmp_path / "sub" / "b.txt").read_bytes() == b"b.txt" * 10
+
+    @pytest.mark.parametrize("output_directory", ["./", ".", "results/.."])
+    def test_relative_output_directory_is_taken_against_the_working_directory(
+        self, tmp_path, blob_store, output_directory
+    ):
+        url = "https://acct.blob.core.windows.net/o/x.txt?sig=x"
+        blob_store.put(url, b"x" * 10)
+        job = {
+            "output_dataset_public_id": "ds1",
+            "output_directory": output_directory,
+            "current_working_directory": "/home/u/proj",
+        }
+        links = [{"url": url, "client_path": "/home/u/proj/sub/x.txt"}]
+
+        with patch("thoa.core.dataset_utils.client", self._client(job, links)):
+            assert download_job_outputs("job1", tmp_path, verify_md5=False)
+
+        assert (tmp_path / "sub" / "x.txt").read_bytes() == b"x" * 10
+
+    def test_present_outputs_are_skipped_and_failures_reported(self, tmp_path, blob_store):
+        url = "https://acct.blob.core.windows.net/o/a.txt?sig=x"
+        blob_store.put(url, b"payload")
+        (tmp_path / "a.txt").write_bytes(b"payload")
+        job = {"output_dataset_public_id": "ds1", "output_directory": "/out", "download_directory": str(tmp_path)}
+        links = [{"url": url, "client_path": "/out/a.txt"}, {"client_path": "/out/missing.txt"}]
+
+        with patch("thoa.core.dataset_utils.client", self._client(job, links)), \
+                patch("thoa.core.dataset_utils._print_download_summary") as summary:
+            assert not download_job_outputs("job1")
+
+        counts, failures = summary.call_args.args
+        assert counts["skipped"] == 1
+        assert failures == [("missing.txt", "no_url")]
+
+
+class TestDownloadManifestIntegration:
+
+    def test_completed_downloads_are_recorded_and_then_skipped_without_requests(self, tmp_path, blob_store):
+        payload = b"x" * 2500
+        blob_store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+        files = {"out/result.bam": "id1"}
+
+        manifest = DownloadManifest.load(tmp_path)
+        counts, _ = download_files(
+            [("out/result.bam", "id1", {"url": BLOB_URL})], tmp_path, verify_md5=True, manifest=manifest
+        )
+        assert counts["success"] == 1
+
+        reloaded = DownloadManifest.load(tmp_path)
+        assert reloaded.get("out/result.bam")["md5"] == hashlib.md5(payload).hexdigest()
+        current, pending = _split_by_manifest(files, tmp_path, reloaded)
+        assert (current, pending) == (files, {})
+
+    def test_changed_file_id_or_local_edit_is_downloaded_again(self, tmp_path, blob_store):
+        blob_store.put(BLOB_URL, b"payload")
+        manifest = DownloadManifest.load(tmp_path)
+        download_files([("out/result.bam", "id1", {"url": BLOB_URL})], tmp_path, verify_md5=False, manifest=manifest)
+
+        assert _split_by_manifest({"out/result.bam": "id2"}, tmp_path, manifest)[1] == {"out/result.bam": "id2"}
+
+        (tmp_path / "out" / "result.bam").write_bytes(b"edited!")
+        assert _split_by_manifest({"out/result.bam": "id1"}, tmp_path, manifest)[1] == {"out/result.bam": "id1"}
+
+
+class TestContentStoreIntegration:
+
+    def test_verified_download_populates_store_and_second_destination_is_linked(self, tmp_path, blob_store):
+        payload = b"reference" * 300
+        blob_store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+        store = ContentStore.load(tmp_path / "store", max_bytes=1 << 20)
+        downloads = [("out/result.bam", "id1", {"url": BLOB_URL})]
+
+        counts, _ = download_files(downloads, tmp_path / "p1", verify_md5=True, store=store)
+        assert counts["success"] == 1
+        assert len(store) == 1
+
+        blob_store.ranges.clear()
+        counts, _ = download_files(downloads, tmp_path / "p2", verify_md5=True, store=store)
+
+        assert counts["cached"] == 1
+        assert blob_store.ranges == []
+        assert (tmp_path / "p2" / "out" / "result.bam").read_bytes() == payload
+
+    def test_unverified_download_is_not_stored(self, tmp_path, blob_store):
+        blob_store.put(BLOB_URL, b"payload", {"md5": hashlib.md5(b"payload").hexdigest()})
+        store = ContentStore.load(tmp_path / "store", max_bytes=1 << 20)
+
+        download_files([("out/result.bam", "id1", {"url": BLOB_URL})], tmp_path / "p1", verify_md5=False, store=store)
+
+        assert len(store) == 0
+
+
+class TestDuplicateFileIds:
+
+    def test_group_by_file_id_keeps_first_path(self):
+        files = {"a.fa": "id1", "b.txt": "id2", "copy/a.fa": "id1", "again/a.fa": "id1"}
+
+        primaries, aliases = _group_by_file_id(files)
+
+        assert primaries == {"a.fa": "id1", "b.txt": "id2"}
+        assert aliases == {"a.fa": ["copy/a.fa", "again/a.fa"]}
+
+    def test_each_file_id_is_downloaded_once_and_linked_elsewhere(self, tmp_path, blob_store):
+        payload = b"genome" * 500
+        blob_store.put(BLOB_URL, payload)
+        manifest = DownloadManifest.load(tmp_path)
+
+        counts, failures = download_files(
+            [("ref/a.fa", "id1", {"url": BLOB_URL})], tmp_path, verify_md5=False, manifest=manifest,
+            aliases={"ref/a.fa": ["p1/a.fa", "p2/a.fa"]},
+        )
+
+        assert failures == []
+        assert (counts["success"], counts["linked"], counts["bytes_saved"]) == (1, 2, 2 * len(payload))
+        assert blob_store.calls["download_blob"] == 1
+        for path in ("ref/a.fa", "p1/a.fa", "p2/a.fa"):
+            assert (tmp_path / path).read_bytes() == payload
+            assert manifest.is_current(path, "id1", tmp_path / path)
+
+    def test_aliases_fail_with_their_download(self, tmp_path, blob_store):
+        counts, failures = download_files(
+            [("ref/a.fa", "id1", None)], tmp_path, aliases={"ref/a.fa": ["p1/a.fa"]},
+        )
+
+        assert counts["failed"] == 2
+        assert failures == [("ref/a.fa", "no_url"), ("p1/a.fa", "no_url")]
+
+
+class TestStreamDatasetFile:
+
+    @pytest.fixture
+    def dataset(self, blob_store):
+        payload = b"##fileformat=VCFv4.2\n" * 500
+        blob_store.put(BLOB_URL, payload, {"md5": hashlib.md5(payload).hexdigest()})
+        client = MagicMock()
+        client.get.return_value = [{
+            "adjusted_context": {"/home/u/calls/sample.vcf.gz": "id1", "/home/u/x.txt": "id2"},
+            "remaining_downloads": 3,
+        }]
+        client.post.return_value = {"url": BLOB_URL}
+        with patch("thoa.core.dataset_utils.client", client), \
+                patch("thoa.core.transfer.DOWNLOAD_RANGE_SIZE", 1000):
+            yield client
+
+    def test_streams_the_file_in_order(self, dataset, blob_store, tmp_path):
+        payload = blob_store.data(BLOB_URL)
+        out = io.BytesIO()
+
+        written = stream_dataset_file("ds1", "sample.vcf.gz", out, verify_md5=True, workers=4)
+
+        assert out.getvalue() == payload
+        assert written == len(payload)
+        assert len(blob_store.ranges) == 11
+        assert list(tmp_path.iterdir()) == []
+        dataset.put.assert_called_once_with("/datasets/ds1/decrement_downloads")
+
+    def test_refuses_when_no_downloads_remain(self, dataset, blob_store):
+        dataset.get.return_value[0]["remaining_downloads"] = 0
+
+        with pytest.raises(PermissionError, match="no remaining downloads"):
+            stream_dataset_file("ds1", "sample.vcf.gz", io.BytesIO())
+
+        dataset.put.assert_not_called()
+        dataset.post.assert_not_called()
+        assert blob_store.ranges == []
+
+    def test_md5_mismatch_is_reported_after_streaming(self, dataset, blob_store):
+        blob_store.metadata(BLOB_URL)["md5"] = "0" * 32
+
+        with pytest.raises(ValueError, match="MD5 mismatch"):
+            stream_dataset_file("ds1", "calls/sample.vcf.gz", io.BytesIO())
+
+    def test_resolve_dataset_path(self):
+        files = {"/a/sample.vcf.gz": "id1", "/b/sample.vcf.gz": "id2", "/a/x.txt": "id3"}
+
+        assert _resolve_dataset_path(files, "a/x.txt") == ("/a/x.txt", "id3")
+        assert _resolve_dataset_path(files, "x.txt") == ("/a/x.txt", "id3")
+        assert _resolve_dataset_path(files, "id2") == ("/b/sample.vcf.gz", "id2")
+        with pytest.raises(ValueError):
+            _resolve_dataset_path(files, "sample.vcf.gz")
+        with pytest.raises(FileNotFoundError):
+            _resolve_dataset_path(files, "missing")
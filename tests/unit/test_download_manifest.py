@@ -0,0 +1,44 @@
+import os
+
+from thoa.core.download_manifest import DownloadManifest, DOWNLOAD_MANIFEST_FILENAME
+
+
+class TestDownloadManifest:
+
+    def test_roundtrip_through_disk(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("hello")
+
+        manifest = DownloadManifest.load(tmp_path)
+        manifest.put("a.txt", "id1", f, md5="5d41", etag='"e1"')
+        manifest.save()
+
+        reloaded = DownloadManifest.load(tmp_path)
+        assert (tmp_path / DOWNLOAD_MANIFEST_FILENAME).exists()
+        assert reloaded.is_current("a.txt", "id1", f)
+        assert reloaded.get("a.txt")["etag"] == '"e1"'
+
+    def test_different_file_id_is_not_current(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("hello")
+        manifest = DownloadManifest.load(tmp_path)
+        manifest.put("a.txt", "id1", f)
+
+        assert not manifest.is_current("a.txt", "id2", f)
+
+    def test_local_changes_are_not_current(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("hello")
+        manifest = DownloadManifest.load(tmp_path)
+        manifest.put("a.txt", "id1", f)
+
+        st = f.stat()
+        os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert not manifest.is_current("a.txt", "id1", f)
+
+        f.unlink()
+        assert not manifest.is_current("a.txt", "id1", f)
+
+    def test_corrupt_manifest_is_ignored(self, tmp_path):
+        (tmp_path / DOWNLOAD_MANIFEST_FILENAME).write_text("{not json")
+        assert len(DownloadManifest.load(tmp_path)) == 0
@@ -0,0 +1,138 @@
+import os
+
+from thoa.core.file_utils import FileRecord, scan_files, collapse_hardlinks, format_bytes, _mount_source
+
+
+class TestScanFiles:
+
+    def test_records_carry_stat_fields(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("hello")
+        st = os.stat(f)
+
+        [record] = scan_files([tmp_path])
+
+        assert record == FileRecord(f, 5, st.st_mtime_ns, st.st_ino, st.st_dev)
+
+    def test_nested_directories_sorted(self, tmp_path):
+        (tmp_path / "b").mkdir()
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b" / "2.txt").touch()
+        (tmp_path / "a" / "1.txt").touch()
+        (tmp_path / "root.txt").touch()
+
+        names = [r.path.relative_to(tmp_path).as_posix() for r in scan_files([tmp_path])]
+
+        assert names == ["root.txt", "a/1.txt", "b/2.txt"]
+
+    def test_overlapping_inputs_are_not_duplicated(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.touch()
+        assert len(scan_files([tmp_path, f, tmp_path])) == 1
+
+    def test_symlink_loop_terminates(self, tmp_path):
+        sub = tmp_path / "sub"
+        sub.mkdir()
+        (sub / "data.txt").touch()
+        (sub / "loop").symlink_to(tmp_path, target_is_directory=True)
+
+        records = scan_files([tmp_path])
+
+        assert [r.path.name for r in records] == ["data.txt"]
+
+    def test_directory_reached_through_two_symlinks_keeps_every_path(self, tmp_path):
+        real = tmp_path / "real"
+        real.mkdir()
+        (real / "a.txt").write_text("a")
+        (tmp_path / "link1").symlink_to(real, target_is_directory=True)
+        (tmp_path / "link2").symlink_to(real, target_is_directory=True)
+
+        names = [r.path.relative_to(tmp_path).as_posix() for r in scan_files([tmp_path])]
+
+        assert names == ["link1/a.txt", "link2/a.txt", "real/a.txt"]
+        unique, aliases = collapse_hardlinks(scan_files([tmp_path]))
+        assert len(unique) == 1 and len(aliases) == 2
+
+    def test_same_directory_passed_through_different_paths(self, tmp_path):
+        real = tmp_path / "real"
+        real.mkdir()
+        (real / "a.txt").write_text("a")
+        (tmp_path / "link1").symlink_to(real, target_is_directory=True)
+        (tmp_path / "link2").symlink_to(real, target_is_directory=True)
+
+        records = scan_files([tmp_path / "link1", tmp_path / "link2", real])
+
+        assert [r.path for r in records] == [
+            tmp_path / "link1" / "a.txt",
+            tmp_path / "link2" / "a.txt",
+            real / "a.txt",
+        ]
+
+    def test_relative_input_made_absolute(self, tmp_path, monkeypatch):
+        (tmp_path / "a.txt").touch()
+        monkeypatch.chdir(tmp_path)
+
+        [record] = scan_files(["a.txt"])
+
+        assert record.path.is_absolute()
+
+    def test_missing_path_ignored(self, tmp_path):
+        assert scan_files([tmp_path / "missing"]) == []
+
+
+class TestCollapseHardlinks:
+
+    def test_hardlinks_and_symlinks_map_onto_first_path(self, tmp_path):
+        ref = tmp_path / "ref.fa"
+        ref.write_text(">chr1\nACGT\n")
+        os.link(ref, tmp_path / "hard.fa")
+        (tmp_path / "soft.fa").symlink_to(ref)
+        (tmp_path / "copy.fa").write_text(">chr1\nACGT\n")
+
+        unique, aliases = collapse_hardlinks(scan_files([tmp_path]))
+
+        assert sorted(r.path.name for r in unique) == ["copy.fa", "hard.fa"]
+        assert aliases == {tmp_path / "ref.fa": tmp_path / "hard.fa", tmp_path / "soft.fa": tmp_path / "hard.fa"}
+
+    def test_plain_paths_are_kept(self, tmp_path):
+        unique, aliases = collapse_hardlinks([tmp_path / "a", tmp_path / "a"])
+
+        assert len(unique) == 2 and aliases == {}
+
+
+class TestFormatBytes:
+
+    def test_bytes(self):
+        assert format_bytes(500) == "500.00 B"
+
+    def test_kibibytes(self):
+        result = format_bytes(2048)
+        assert "KiB" in result
+
+    def test_mebibytes(self):
+        result = format_bytes(5 * 1024 * 1024)
+        assert "MiB" in result
+
+    def test_gibibytes(self):
+        result = format_bytes(2 * 1024 ** 3)
+        assert "GiB" in result
+
+    def test_zero(self):
+        assert format_bytes(0) == "0.00 B"
+
+
+class TestMountSource:
+
+    def test_anonymous_device_maps_to_its_mount_source(self, tmp_path):
+        mountinfo = tmp_path / "mountinfo"
+        mountinfo.write_text(
+            "25 28 0:6 / /dev rw,relatime - devtmpfs devtmpfs rw\n"
+            "30 1 0:45 /@home /home rw,relatime shared:1 master:2 - btrfs /dev/nvme0n1p2 rw,ssd\n"
+        )
+
+        assert _mount_source(os.makedev(0, 45), str(mountinfo)) == "/dev/nvme0n1p2"
+        assert _mount_source(os.makedev(0, 6), str(mountinfo)) == "devtmpfs"
+        assert _mount_source(os.makedev(0, 99), str(mountinfo)) is None
+
+    def test_unreadable_mountinfo(self, tmp_path):
+        assert _mount_source(os.makedev(0, 45), str(tmp_path / "missing")) is None
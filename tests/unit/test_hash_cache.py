@@ -0,0 +1,104 @@
+import json
+import os
+import time
+
+import pytest
+
+from thoa.core import hash_cache as hc
+from thoa.core.hash_cache import HashCache, HASH_CACHE_FILENAME
+from thoa.core.job_utils import hash_all
+from thoa.core.file_utils import FileRecord
+
+
+def _age(path, seconds=60):
+    """Push mtime into the past so the entry is outside the racy window."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+class TestHashCache:
+
+    def test_roundtrip_through_disk(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("hello")
+        _age(f)
+
+        cache = HashCache.load(tmp_path / "cache")
+        cache.put(FileRecord.from_path(f), "abc")
+        cache.save()
+
+        reloaded = HashCache.load(tmp_path / "cache")
+        assert reloaded.get(FileRecord.from_path(f)) == "abc"
+        assert reloaded.hits == 1
+
+    def test_changed_mtime_is_a_miss_and_evicted(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("hello")
+        _age(f, 120)
+
+        cache = HashCache.load(tmp_path)
+        cache.put(FileRecord.from_path(f), "abc")
+        _age(f, 60)
+
+        assert cache.get(FileRecord.from_path(f)) is None
+        assert len(cache) == 0
+
+    def test_recently_modified_file_is_not_cached(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("hello")
+
+        cache = HashCache.load(tmp_path)
+        cache.put(FileRecord.from_path(f), "abc")
+        assert len(cache) == 0
+
+    def test_old_entries_evicted_on_save(self, tmp_path, monkeypatch):
+        f = tmp_path / "a.txt"
+        f.write_text("hello")
+        _age(f)
+
+        cache = HashCache.load(tmp_path)
+        cache.put(FileRecord.from_path(f), "abc")
+        monkeypatch.setattr(hc, "HASH_CACHE_MAX_AGE_SECONDS", -1)
+        cache.save()
+
+        payload = json.loads((tmp_path / HASH_CACHE_FILENAME).read_text())
+        assert payload["entries"] == {}
+
+    def test_corrupt_file_starts_empty(self, tmp_path):
+        (tmp_path / HASH_CACHE_FILENAME).write_text("{not json")
+        assert len(HashCache.load(tmp_path)) == 0
+
+
+class TestHashAllWithCache:
+
+    def test_second_run_skips_hashing(self, tmp_path, monkeypatch):
+        files = []
+        for i in range(3):
+            f = tmp_path / f"file_{i}.txt"
+            f.write_text(f"content_{i}")
+            _age(f)
+            files.append(f)
+
+        first = hash_all(files, workers=2, cache=HashCache.load(tmp_path / "cache"))
+
+        def fail(path, *args, **kwargs):
+            raise AssertionError(f"{path} should not be re-hashed")
+
+        monkeypatch.setattr("thoa.core.job_utils.choose_hash_strategy", fail)
+        cache = HashCache.load(tmp_path / "cache")
+        second = hash_all(files, workers=2, cache=cache)
+
+        assert second == first
+        assert cache.hits == 3
+
+    def test_modified_file_is_rehashed(self, tmp_path):
+        f = tmp_path / "data.txt"
+        f.write_text("one")
+        _age(f, 120)
+        first = hash_all([f], workers=1, cache=HashCache.load(tmp_path / "cache"))
+
+        f.write_text("two")
+        _age(f, 60)
+        second = hash_all([f], workers=1, cache=HashCache.load(tmp_path / "cache"))
+
+        assert first[f] != second[f]
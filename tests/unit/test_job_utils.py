@@ -1,4 +1,5 @@
 import pytest
+from unittest.mock import MagicMock, patch
 from pathlib import Path
 from datetime import datetime
 
@@ -6,12 +7,33 @@ from thoa.core.job_utils import (
     collect_files,
     compute_md5_buffered,
     compute_md5_mmap,
+    compute_md5_fadvise,
     choose_hash_strategy,
     hash_all,
+    device_hash_workers,
     file_sizes_in_bytes,
+    upload_file_streaming,
+    upload_file_sas,
+    upload_all,
+    hash_and_register,
+    RegistrationError,
+    iter_upload_links,
     _parse_job_timestamp,
     _fmt_job_timestamp,
 )
+from thoa.core.file_utils import scan_files
+from thoa.config import settings
+from fake_blob import FakeBlobStore, FakeBlobClient
+
+SAS_URL = "https://acct.blob.core.windows.net/container/file-001?sig=xxx"
+
+
+@pytest.fixture
+def blob_store(monkeypatch, tmp_path):
+    store = FakeBlobStore()
+    monkeypatch.setattr("thoa.core.job_utils.BlobClient.from_blob_url", store.client)
+    monkeypatch.setattr(settings, "THOA_CACHE_DIR", str(tmp_path / "cache"))
+    return store
 
 
 class TestCollectFiles:
@@ -87,6 +109,25 @@ class TestMd5Hashing:
         assert isinstance(md5, str)
         assert len(md5) == 32
 
+    def test_fadvise_md5_matches_buffered_across_windows(self, tmp_path):
+        f = tmp_path / "test.bin"
+        f.write_bytes(bytes(range(256)) * 1000)
+        assert compute_md5_fadvise(f, buffer_size=1000, drop_window=4096) == compute_md5_buffered(f)
+
+    def test_choose_hash_strategy_explicit_fadvise(self, tmp_path, monkeypatch):
+        f = tmp_path / "test.bin"
+        f.write_bytes(b"hello world")
+        monkeypatch.setattr("thoa.core.job_utils.compute_md5_mmap", None)
+        monkeypatch.setattr("thoa.core.job_utils.compute_md5_buffered", None)
+        _, md5 = choose_hash_strategy(f, strategy="fadvise")
+        assert md5 == "5eb63bbbe01eeed093cb22bb8f5acdc3"
+
+    def test_choose_hash_strategy_unknown_strategy_is_error(self, tmp_path):
+        f = tmp_path / "test.bin"
+        f.write_bytes(b"x")
+        _, result = choose_hash_strategy(f, strategy="sha9000")
+        assert result.startswith("ERROR:")
+
     def test_choose_hash_strategy_returns_error_on_missing_file(self, tmp_path):
         f = tmp_path / "missing.bin"
         path, result = choose_hash_strategy(f)
@@ -108,6 +149,388 @@ class TestMd5Hashing:
         assert result == {}
 
 
+class TestDeviceAwareHashing:
+
+    def test_rotational_device_is_serialised(self, monkeypatch):
+        monkeypatch.setattr("thoa.core.job_utils.device_is_rotational", lambda dev: True)
+        monkeypatch.setattr("thoa.core.job_utils.settings.THOA_HASH_WORKERS_ROTATIONAL", 1)
+        assert device_hash_workers(123, workers=16) == 1
+
+    def test_ssd_limit_capped_by_workers(self, monkeypatch):
+        monkeypatch.setattr("thoa.core.job_utils.device_is_rotational", lambda dev: False)
+        monkeypatch.setattr("thoa.core.job_utils.settings.THOA_HASH_WORKERS_SSD", 32)
+        assert device_hash_workers(123, workers=8) == 8
+
+    def test_unknown_device_gets_the_ssd_limit_by_default(self, monkeypatch):
+        monkeypatch.setattr("thoa.core.job_utils.device_is_rotational", lambda dev: None)
+        assert device_hash_workers(123, workers=64) == settings.THOA_HASH_WORKERS_SSD
+
+    def test_override_wins_over_detection(self, monkeypatch):
+        monkeypatch.setattr("thoa.core.job_utils.device_is_rotational", lambda dev: False)
+        assert device_hash_workers(123, workers=8, overrides={123: 2}) == 2
+
+    def test_largest_files_hashed_first(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("thoa.core.job_utils.device_is_rotational", lambda dev: True)
+        monkeypatch.setattr("thoa.core.job_utils.settings.THOA_HASH_WORKERS_ROTATIONAL", 1)
+        for name, size in [("small", 1), ("large", 300), ("medium", 20)]:
+            (tmp_path / name).write_bytes(b"x" * size)
+
+        order = []
+        real = choose_hash_strategy
+
+        def spy(path, *args, **kwargs):
+            order.append(path.name)
+            return real(path, *args, **kwargs)
+
+        monkeypatch.setattr("thoa.core.job_utils.choose_hash_strategy", spy)
+        hash_all(sorted(tmp_path.iterdir()), workers=4)
+
+        assert order == ["large", "medium", "small"]
+
+    def test_stats_report_per_device(self, tmp_path):
+        for i in range(3):
+            (tmp_path / f"f{i}").write_bytes(b"x" * 10)
+        stats = {}
+
+        hash_all(sorted(tmp_path.iterdir()), workers=2, stats=stats)
+
+        [row] = stats.values()
+        assert row["files"] == 3
+        assert row["bytes"] == 30
+        assert row["seconds"] >= 0
+
+
+class TestHashAndRegister:
+
+    def test_registers_every_file_with_its_hash(self, tmp_path):
+        files = []
+        for i in range(4):
+            f = tmp_path / f"f{i}.txt"
+            f.write_text(f"content_{i}")
+            files.append(f)
+        seen = {}
+
+        def register(record, md5):
+            seen[record.path] = md5
+            return {"public_id": f"id-{record.path.name}"}
+
+        hashes, registrations = hash_and_register(files, register, workers=2, queue_size=1)
+
+        assert seen == hashes
+        assert registrations[files[0]] == {"public_id": "id-f0.txt"}
+
+    def test_registrations_run_concurrently(self, tmp_path):
+        import threading
+        files = []
+        for i in range(3):
+            f = tmp_path / f"f{i}.txt"
+            f.write_text(str(i))
+            files.append(f)
+        barrier = threading.Barrier(3, timeout=5)
+
+        def register(record, md5):
+            barrier.wait()  # only passes if three registrations are in flight at once
+            return {"public_id": record.path.name}
+
+        _, registrations = hash_and_register(files, register, workers=1, register_workers=3)
+
+        assert len(registrations) == 3
+
+    def test_identical_content_is_registered_once(self, tmp_path):
+        import os
+        ref = tmp_path / "ref.fa"
+        ref.write_text(">chr1\nACGT\n")
+        copy = tmp_path / "copy.fa"
+        copy.write_text(">chr1\nACGT\n")
+        link = tmp_path / "link.fa"
+        os.link(ref, link)
+        other = tmp_path / "other.fa"
+        other.write_text(">chr2\nTTTT\n")
+        register = MagicMock(side_effect=lambda record, md5: {"public_id": f"id-{md5[:6]}"})
+
+        hashes, registrations = hash_and_register(scan_files([tmp_path]), register, workers=2)
+
+        assert register.call_count == 2
+        assert set(hashes) == {ref, copy, link, other}
+        assert registrations[ref] == registrations[copy] == registrations[link]
+        assert registrations[other] != registrations[ref]
+
+    def test_registration_error_summarised(self, tmp_path):
+        f = tmp_path / "a.txt"
+        f.write_text("a")
+
+        def register(record, md5):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RegistrationError) as exc:
+            hash_and_register([f], register, workers=1)
+
+        assert exc.value.failures == [(f, "boom")]
+        assert exc.value.registered == 0
+        assert exc.value.total == 1
+
+    def test_hash_error_is_not_registered(self, tmp_path):
+        missing = tmp_path / "missing.txt"
+        register = MagicMock()
+
+        with pytest.raises(RegistrationError) as exc:
+            hash_and_register([missing], register, workers=1)
+
+        register.assert_not_called()
+        assert exc.value.failures[0][1].startswith("ERROR:")
+
+    def test_fails_fast_after_first_error(self, tmp_path):
+        files = []
+        for i in range(20):
+            f = tmp_path / f"f{i:02d}.txt"
+            f.write_text(str(i))
+            files.append(f)
+        calls = []
+
+        def register(record, md5):
+            calls.append(record.path)
+            raise RuntimeError("down")
+
+        with pytest.raises(RegistrationError):
+            hash_and_register(files, register, workers=1, register_workers=1, queue_size=1)
+
+        assert len(calls) < len(files)
+
+
+class TestIterUploadLinks:
+
+    def test_yields_links_as_they_appear(self):
+        polls = [
+            [{"file_public_id": "a"}],
+            [{"file_public_id": "a"}, {"file_public_id": "b"}],
+        ]
+        mock_api = MagicMock()
+        mock_api.get.side_effect = polls
+
+        with patch("thoa.core.job_utils.api_client", mock_api), \
+             patch("thoa.core.job_utils.time") as mock_time:
+            links = iter_upload_links("job", "ds", ["a", "b"])
+            assert next(links)["file_public_id"] == "a"
+            assert mock_api.get.call_count == 1
+            assert [l["file_public_id"] for l in links] == ["b"]
+
+        assert mock_time.sleep.call_count == 1
+
+    def test_backs_off_while_idle_and_resets_on_progress(self):
+        empty = []
+        polls = [empty, empty, empty, [{"file_public_id": "a"}], [{"file_public_id": "a"}], [{"file_public_id": "b"}]]
+        mock_api = MagicMock()
+        mock_api.get.side_effect = polls
+
+        with patch("thoa.core.job_utils.api_client", mock_api), \
+             patch("thoa.core.job_utils.time") as mock_time:
+            list(iter_upload_links("job", "ds", ["a", "b"], initial_interval=0.25, max_interval=0.6))
+
+        delays = [c.args[0] for c in mock_time.sleep.call_args_list]
+        assert delays == [0.25, 0.5, 0.6, 0.25, 0.5]
+
+
+class TestUploadFileStreaming:
+
+    def test_uploads_blocks_and_commits_md5_metadata(self, tmp_path, blob_store):
+        f = tmp_path / "data.bin"
+        payload = bytes(range(256)) * 40
+        f.write_bytes(payload)
+
+        md5 = upload_file_streaming(f, SAS_URL, block_size=1000, max_concurrency=2)
+
+        assert md5 == compute_md5_buffered(f)
+        assert blob_store.data(SAS_URL) == payload
+        assert blob_store.metadata(SAS_URL) == {"md5": md5, "upload": "complete"}
+        assert blob_store.calls["stage_block"] == 11
+        assert blob_store.calls["commit_block_list"] == 1
+        assert blob_store.calls["get_blob_properties"] == 0
+
+    def test_empty_file_commits_empty_blob(self, tmp_path, blob_store):
+        f = tmp_path / "empty.bin"
+        f.touch()
+
+        upload_file_streaming(f, SAS_URL)
+
+        assert blob_store.data(SAS_URL) == b""
+        assert blob_store.calls["stage_block"] == 0
+
+    def test_changed_file_is_not_committed(self, tmp_path, blob_store):
+        f = tmp_path / "data.bin"
+        f.write_bytes(b"new content")
+
+        with pytest.raises(ValueError, match="changed"):
+            upload_file_streaming(f, SAS_URL, local_md5="0" * 32)
+
+        assert blob_store.blobs == {}
+
+    def _interrupt_after(self, monkeypatch, n_blocks):
+        real_stage = FakeBlobClient.stage_block
+
+        def flaky_stage(client, block_id, data, **kwargs):
+            if client.store.calls["stage_block"] >= n_blocks:
+                raise ConnectionError("connection reset")
+            return real_stage(client, block_id, data, **kwargs)
+
+        monkeypatch.setattr(FakeBlobClient, "stage_block", flaky_stage)
+
+    def test_interrupted_upload_resumes_missing_blocks(self, tmp_path, blob_store, monkeypatch):
+        f = tmp_path / "data.bin"
+        payload = bytes(range(256)) * 40
+        f.write_bytes(payload)
+        md5 = compute_md5_buffered(f)
+
+        with monkeypatch.context() as m:
+            self._interrupt_after(m, 4)
+            with pytest.raises(ConnectionError):
+                upload_file_streaming(f, SAS_URL, local_md5=md5, block_size=1000, max_concurrency=1)
+        assert blob_store.blobs == {}
+
+        blob_store.calls.clear()
+        resumed_url = SAS_URL.replace("sig=xxx", "sig=fresh")
+        upload_file_streaming(f, resumed_url, local_md5=md5, block_size=1000, max_concurrency=1)
+
+        assert blob_store.data(SAS_URL) == payload
+        assert blob_store.calls["get_block_list"] == 1
+        assert blob_store.calls["stage_block"] == 11 - 4
+        assert not list((tmp_path / "cache" / "upload_journal").iterdir())
+
+    def test_restages_blocks_the_service_discarded(self, tmp_path, blob_store, monkeypatch):
+        f = tmp_path / "data.bin"
+        payload = b"z" * 5000
+        f.write_bytes(payload)
+        md5 = compute_md5_buffered(f)
+
+        with monkeypatch.context() as m:
+            self._interrupt_after(m, 2)
+            with pytest.raises(ConnectionError):
+                upload_file_streaming(f, SAS_URL, local_md5=md5, block_size=1000, max_concurrency=1)
+        blob_store.uncommitted.clear()
+        blob_store.calls.clear()
+
+        upload_file_streaming(f, SAS_URL, local_md5=md5, block_size=1000, max_concurrency=1)
+
+        assert blob_store.data(SAS_URL) == payload
+        assert blob_store.calls["stage_block"] == 5
+
+
+class TestUploadFileSas:
+
+    def test_small_file_is_one_request_with_complete_metadata(self, tmp_path, blob_store):
+        f = tmp_path / "small.bed"
+        f.write_bytes(b"chr1\t1\t2\n")
+        md5 = compute_md5_buffered(f)
+
+        upload_file_sas(f, SAS_URL, md5)
+
+        assert blob_store.metadata(SAS_URL) == {"md5": md5, "upload": "complete"}
+        assert sum(blob_store.calls.values()) == 1
+
+    def test_large_file_commits_blocks_with_metadata(self, tmp_path, blob_store, monkeypatch):
+        monkeypatch.setattr("thoa.core.job_utils.SINGLE_PUT_MAX_BYTES", 10)
+        f = tmp_path / "large.bam"
+        f.write_bytes(b"x" * 100)
+        md5 = compute_md5_buffered(f)
+
+        upload_file_sas(f, SAS_URL, md5)
+
+        assert blob_store.metadata(SAS_URL) == {"md5": md5, "upload": "complete"}
+        assert blob_store.calls["get_blob_properties"] == 0
+        assert blob_store.calls["set_blob_metadata"] == 0
+        assert blob_store.calls["commit_block_list"] == 1
+
+
+class TestUploadAll:
+
+    def _link(self, file_id):
+        return {"file_public_id": file_id, "url": f"https://acct.blob.core.windows.net/c/{file_id}?sig=x"}
+
+    def test_skips_present_blobs_and_reports_bytes(self, tmp_path, blob_store):
+        present = tmp_path / "present.bin"
+        present.write_bytes(b"a" * 10)
+        fresh = tmp_path / "fresh.bin"
+        fresh.write_bytes(b"b" * 7)
+        md5s = {"p": compute_md5_buffered(present), "f": compute_md5_buffered(fresh)}
+        blob_store.put(self._link("p")["url"], present.read_bytes(), {"md5": md5s["p"], "upload": "complete"})
+
+        summary = upload_all(
+            [self._link("p"), self._link("f")],
+            {"p": str(present), "f": str(fresh)},
+            md5s,
+            max_workers=2,
+        )
+
+        assert summary["skipped"] == 1
+        assert summary["skipped_bytes"] == 10
+        assert summary["uploaded"] == 1
+        assert summary["uploaded_bytes"] == 7
+        assert blob_store.data(self._link("f")["url"]) == b"b" * 7
+
+    def test_existence_checks_run_in_worker_pool(self, tmp_path, monkeypatch):
+        import threading
+        main = threading.get_ident()
+        threads = []
+
+        def fake_exists(url, md5, path=None):
+            threads.append(threading.get_ident())
+            return True
+
+        monkeypatch.setattr("thoa.core.job_utils.blob_exists_with_same_md5", fake_exists)
+        f = tmp_path / "a.bin"
+        f.write_bytes(b"x")
+
+        upload_all([self._link("a")], {"a": str(f)}, {"a": "0" * 32})
+
+        assert threads and main not in threads
+
+    def test_missing_local_file_counted(self, tmp_path, blob_store):
+        summary = upload_all([self._link("m")], {"m": str(tmp_path / "gone")}, {"m": "0" * 32})
+        assert summary["missing"] == 1
+
+    def test_prepare_runs_concurrently_before_each_upload(self, tmp_path, blob_store):
+        import threading
+        barrier = threading.Barrier(3, timeout=5)
+        files = {}
+        for name in "abc":
+            files[name] = tmp_path / f"{name}.bin"
+            files[name].write_bytes(name.encode())
+
+        def prepare(link):
+            barrier.wait()  # only passes if all three link updates are in flight at once
+
+        summary = upload_all(
+            [self._link(name) for name in files],
+            {name: str(path) for name, path in files.items()},
+            {name: compute_md5_buffered(path) for name, path in files.items()},
+            prepare=prepare,
+        )
+
+        assert summary["uploaded"] == 3
+
+    def test_prepare_failures_are_aggregated_and_not_uploaded(self, tmp_path, blob_store):
+        files = {}
+        for name in "ab":
+            files[name] = tmp_path / f"{name}.bin"
+            files[name].write_bytes(name.encode())
+        failures = []
+
+        def prepare(link):
+            if link["file_public_id"] == "b":
+                raise RuntimeError("link update rejected")
+
+        summary = upload_all(
+            [self._link(name) for name in files],
+            {name: str(path) for name, path in files.items()},
+            {name: compute_md5_buffered(path) for name, path in files.items()},
+            prepare=prepare,
+            failures=failures,
+        )
+
+        assert summary["uploaded"] == 1 and summary["failed"] == 1
+        assert failures == [("b", "link update rejected")]
+        assert list(blob_store.blobs) == ["acct.blob.core.windows.net/c/a"]
+
+
 class TestFileSizesInBytes:
 
     def test_single_file(self, tmp_path):
@@ -0,0 +1,35 @@
+import json
+
+from thoa.core.json_store import read_versioned_json, write_json_atomic
+
+
+class TestJsonStore:
+
+    def test_roundtrip(self, tmp_path):
+        path = tmp_path / "sub" / "index.json"
+
+        write_json_atomic(path, {"version": 2, "entries": {"a": [1, 2]}})
+
+        assert read_versioned_json(path, 2) == {"a": [1, 2]}
+        assert [p.name for p in path.parent.iterdir()] == ["index.json"]
+
+    def test_missing_corrupt_or_other_version_reads_empty(self, tmp_path):
+        path = tmp_path / "index.json"
+        assert read_versioned_json(path, 1) == {}
+
+        path.write_text("{not json")
+        assert read_versioned_json(path, 1) == {}
+
+        path.write_text(json.dumps({"version": 0, "entries": {"a": 1}}))
+        assert read_versioned_json(path, 1) == {}
+
+        path.write_text(json.dumps({"version": 1, "entries": []}))
+        assert read_versioned_json(path, 1) == {}
+
+    def test_unwritable_directory_is_ignored(self, tmp_path):
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+
+        write_json_atomic(blocker / "index.json", {"version": 1, "entries": {}})
+
+        assert [p.name for p in tmp_path.iterdir()] == ["file"]
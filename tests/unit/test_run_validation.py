@@ -3,6 +3,7 @@ Client-side validation tests for `thoa run`.
 These do NOT require a live backend - they test CLI argument validation.
 """
 
+from collections import Counter
 from unittest.mock import patch, MagicMock
 from typer.testing import CliRunner
 from thoa.cli import app
@@ -25,6 +26,28 @@ def test_run_rejects_more_than_1000_files(tmp_path):
     assert "1000" in result.output
 
 
+def test_run_shard_small_files_lifts_the_1000_file_limit(tmp_path):
+    for i in range(1001):
+        (tmp_path / f"file_{i}.txt").write_text("x")
+
+    mock_api = MagicMock()
+    mock_api.get.side_effect = lambda path, **kwargs: {"valid": True} if path == "/users/validate_job_request" else {}
+
+    with patch("thoa.cli.commands.run.api_client", mock_api), \
+         patch("thoa.core.job_utils.api_client", mock_api):
+        result = runner.invoke(app, [
+            "run",
+            "--input", str(tmp_path),
+            "--tools", "bash",
+            "--cmd", "echo hello",
+            "--shard-small-files",
+            "--dry-run",
+        ])
+
+    assert result.exit_code == 0, result.output
+    assert "1001 file(s)" in result.output
+
+
 def test_run_requires_tools_or_env_source():
     result = runner.invoke(app, [
         "run",
@@ -94,8 +117,7 @@ def test_run_async_exits_after_upload(tmp_path):
 
     with patch("thoa.cli.commands.run.api_client", mock_api), \
          patch("thoa.core.job_utils.api_client", mock_api), \
-         patch("thoa.cli.commands.run.upload_all") as mock_upload, \
-         patch("thoa.cli.commands.run.all_files_have_upload_links", return_value=True), \
+         patch("thoa.cli.commands.run.upload_all", return_value=Counter()) as mock_upload, \
          patch("thoa.cli.commands.run.time", mock_time), \
          patch("thoa.core.resolve_environment_spec", return_value=""):
 
@@ -245,3 +267,127 @@ def test_cancel_job_already_completed():
 
     assert result.exit_code == 0
     mock_api.post.assert_called_once_with("/jobs/abc-123-def/cancel")
+
+
+def test_run_reports_failed_file_registrations(tmp_path):
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_text(name)
+
+    def api_post_side_effect(path, **kwargs):
+        if path == "/files":
+            return None  # ApiClient returns None after printing the error readout
+        return {"public_id": "x-001"}
+
+    mock_api = MagicMock()
+    mock_api.post.side_effect = api_post_side_effect
+    mock_api.put.return_value = {"public_id": "job-001"}
+    mock_api.get.return_value = {"valid": True}
+
+    with patch("thoa.cli.commands.run.api_client", mock_api), \
+         patch("thoa.core.job_utils.api_client", mock_api), \
+         patch("thoa.cli.commands.run.upload_all") as mock_upload, \
+         patch("thoa.cli.commands.run.time", MagicMock()), \
+         patch("thoa.core.resolve_environment_spec", return_value=""):
+
+        result = runner.invoke(app, [
+            "run",
+            "--input", str(tmp_path),
+            "--tools", "bash",
+            "--cmd", "echo hello",
+            "--no-hash-cache",
+        ])
+
+    assert result.exit_code == 1
+    assert "could not be registered" in result.output
+    assert mock_upload.call_count == 0
+
+
+def test_run_uploads_identical_inputs_once(tmp_path):
+    ref = tmp_path / "ref.fa"
+    ref.write_text(">chr1\nACGT\n")
+    copy = tmp_path / "copy.fa"
+    copy.write_text(">chr1\nACGT\n")
+
+    posts = []
+    puts = []
+
+    def api_post_side_effect(path, **kwargs):
+        posts.append((path, kwargs.get("json")))
+        if path == "/files":
+            return {"public_id": "file-001", "filename": kwargs["json"]["filename"]}
+        return {"public_id": f"{path.strip('/')}-001"}
+
+    def api_put_side_effect(path, **kwargs):
+        puts.append((path, kwargs.get("json")))
+        return {"public_id": "jobs-001"}
+
+    def api_get_side_effect(path, **kwargs):
+        if path == "/users/validate_job_request":
+            return {"valid": True}
+        if "temporary_links" in path:
+            return [{"public_id": "link-001", "file_public_id": "file-001", "url": "https://x/c/f?s"}]
+        return {}
+
+    mock_api = MagicMock()
+    mock_api.post.side_effect = api_post_side_effect
+    mock_api.put.side_effect = api_put_side_effect
+    mock_api.get.side_effect = api_get_side_effect
+
+    with patch("thoa.cli.commands.run.api_client", mock_api), \
+         patch("thoa.core.job_utils.api_client", mock_api), \
+         patch("thoa.cli.commands.run.upload_all", return_value=Counter()) as mock_upload, \
+         patch("thoa.cli.commands.run.time", MagicMock()), \
+         patch("thoa.core.resolve_environment_spec", return_value=""):
+
+        result = runner.invoke(app, [
+            "run",
+            "--input", str(tmp_path),
+            "--tools", "bash",
+            "--cmd", "echo hello",
+            "--run-async",
+            "--no-hash-cache",
+        ])
+
+    assert result.exit_code == 0, result.output
+    assert [path for path, _ in posts].count("/files") == 1
+    assert [body for path, body in posts if path == "/datasets"] == [{"files": ["file-001"]}]
+    context = next(body["input_context"] for _, body in puts if body and "input_context" in body)
+    assert context == {str(copy): "file-001", str(ref): "file-001"}
+    assert len(mock_upload.call_args.args[1]) == 1
+
+
+def test_run_reports_failed_uploads_and_exits(tmp_path):
+    input_file = tmp_path / "data.txt"
+    input_file.write_text("hello")
+
+    def api_post_side_effect(path, **kwargs):
+        if path == "/files":
+            return {"public_id": "file-001", "filename": str(input_file)}
+        return {"public_id": f"{path.strip('/')}-001"}
+
+    def fake_upload_all(links, file_map, md5_map, prepare=None, failures=None):
+        failures.append(("file-001", "link update rejected"))
+        return Counter(failed=1)
+
+    mock_api = MagicMock()
+    mock_api.post.side_effect = api_post_side_effect
+    mock_api.put.return_value = {"public_id": "jobs-001"}
+    mock_api.get.side_effect = lambda path, **kwargs: {"valid": True} if path == "/users/validate_job_request" else {}
+
+    with patch("thoa.cli.commands.run.api_client", mock_api), \
+         patch("thoa.core.job_utils.api_client", mock_api), \
+         patch("thoa.cli.commands.run.upload_all", side_effect=fake_upload_all), \
+         patch("thoa.cli.commands.run.time", MagicMock()), \
+         patch("thoa.core.resolve_environment_spec", return_value=""):
+
+        result = runner.invoke(app, [
+            "run",
+            "--input", str(input_file),
+            "--tools", "bash",
+            "--cmd", "echo hello",
+            "--no-hash-cache",
+        ])
+
+    assert result.exit_code == 1
+    assert "could not be uploaded" in result.output
+    assert "link update rejected" in result.output
@@ -0,0 +1,125 @@
+import hashlib
+import io
+import os
+import tarfile
+
+import pytest
+
+from thoa.core.file_utils import scan_files
+from thoa.core.shards import TarShard, plan_shards, hash_shards, shard_manifest
+from thoa.core.job_utils import upload_all
+from thoa.config import settings
+from fake_blob import FakeBlobStore
+
+
+def _inputs(tmp_path, sizes):
+    for i, size in enumerate(sizes):
+        (tmp_path / f"f{i:03d}.txt").write_bytes(bytes([65 + i % 26]) * size)
+    return scan_files([tmp_path])
+
+
+def _archive(shard):
+    return b"".join(shard.iter_chunks(chunk_size=7))
+
+
+class TestPlanShards:
+
+    def test_packs_small_files_and_leaves_large_ones_loose(self, tmp_path):
+        records = _inputs(tmp_path, [10, 20, 30, 5000, 40])
+
+        shards, loose = plan_shards(records, max_shard_bytes=50, small_file_bytes=100, root=tmp_path)
+
+        assert [r.size for r in loose] == [5000]
+        assert [[r.size for r in s.members] for s in shards] == [[10, 20], [30], [40]]
+        assert [s.name for s in shards] == ["shard-00000.tar", "shard-00001.tar", "shard-00002.tar"]
+
+    def test_oversized_small_file_gets_its_own_shard(self, tmp_path):
+        records = _inputs(tmp_path, [80])
+
+        shards, loose = plan_shards(records, max_shard_bytes=50, small_file_bytes=100, root=tmp_path)
+
+        assert loose == [] and len(shards) == 1
+
+
+class TestTarShard:
+
+    def test_stream_is_a_valid_tar_of_the_original_files(self, tmp_path):
+        records = _inputs(tmp_path, [0, 1, 511, 512, 513, 3000])
+        shard = TarShard(0, records, tmp_path)
+
+        data = _archive(shard)
+
+        assert len(data) == shard.size
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            members = tar.getmembers()
+            assert [m.name for m in members] == [TarShard.arcname(r) for r in records]
+            for member, record in zip(members, records):
+                assert tar.extractfile(member).read() == record.path.read_bytes()
+                assert member.mtime == record.mtime_ns // 1_000_000_000
+
+    def test_archive_bytes_are_deterministic(self, tmp_path):
+        records = _inputs(tmp_path, [100, 200])
+
+        first = TarShard(0, records, tmp_path)
+        second = TarShard(0, records, tmp_path)
+
+        assert _archive(first) == _archive(second)
+        assert first.md5() == hashlib.md5(_archive(second)).hexdigest()
+
+    def test_reader_returns_the_same_bytes(self, tmp_path):
+        shard = TarShard(0, _inputs(tmp_path, [700, 9000]), tmp_path)
+
+        with shard.open("rb") as f:
+            pieces = iter(lambda: f.read(1000), b"")
+            assert b"".join(pieces) == _archive(shard)
+
+    def test_member_changed_since_scan_is_an_error(self, tmp_path):
+        records = _inputs(tmp_path, [10])
+        shard = TarShard(0, records, tmp_path)
+        records[0].path.write_bytes(b"grown" * 10)
+
+        with pytest.raises(ValueError, match="changed"):
+            shard.md5()
+
+
+def test_hash_shards_reports_errors_as_digests(tmp_path):
+    records = _inputs(tmp_path, [10, 10])
+    good, bad = TarShard(0, records[:1], tmp_path), TarShard(1, records[1:], tmp_path)
+    os.remove(records[1].path)
+
+    hashes = hash_shards([good, bad], workers=2)
+
+    assert hashes[good.path] == good.md5()
+    assert hashes[bad.path].startswith("ERROR")
+
+
+def test_manifest_maps_members_to_original_paths(tmp_path):
+    records = _inputs(tmp_path, [1, 2])
+    shard = TarShard(0, records, tmp_path)
+
+    manifest = shard_manifest([shard], {shard.path: {"public_id": "file-1"}})
+
+    entry = manifest["shards"][0]
+    assert entry["file_public_id"] == "file-1"
+    assert entry["filename"] == str(shard.path)
+    assert [m["path"] for m in entry["members"]] == [str(r.path) for r in records]
+
+
+def test_upload_all_streams_shards(tmp_path, monkeypatch):
+    store = FakeBlobStore()
+    monkeypatch.setattr("thoa.core.job_utils.BlobClient.from_blob_url", store.client)
+    monkeypatch.setattr(settings, "THOA_CACHE_DIR", str(tmp_path / "cache"))
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    shard = TarShard(0, _inputs(inputs, [100, 200]), tmp_path)
+    url = "https://acct.blob.core.windows.net/c/shard?sig=x"
+
+    summary = upload_all(
+        [{"file_public_id": "s", "url": url}],
+        {"s": shard},
+        {"s": shard.md5()},
+    )
+
+    assert summary["uploaded"] == 1
+    assert store.data(url) == _archive(shard)
+    assert store.metadata(url)["md5"] == shard.md5()
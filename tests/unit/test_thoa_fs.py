@@ -0,0 +1,150 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("fsspec")
+
+from thoa.core.thoa_fs import ThoaFileSystem
+from fake_blob import FakeBlobStore
+
+DATASET = "ds1"
+FILES = {
+    "/data/sample.bam": "id-bam",
+    "/data/qc/stats.tsv": "id-tsv",
+    "/README": "id-readme",
+}
+
+
+@pytest.fixture
+def blob_store(monkeypatch):
+    store = FakeBlobStore(chunk_size=1000)
+    monkeypatch.setattr("thoa.core.dataset_utils.BlobClient.from_blob_url", store.client)
+    for file_id, data in {"id-bam": bytes(range(256)) * 400, "id-tsv": b"a\tb\n1\t2\n", "id-readme": b"hi"}.items():
+        store.put(f"https://acct.blob.core.windows.net/c/{file_id}?sig=x", data)
+
+    client = MagicMock()
+    client.get.return_value = [{"adjusted_context": FILES, "remaining_downloads": 2}]
+    client.post.side_effect = lambda path: {"url": f"https://acct.blob.core.windows.net/c/{path.split('/')[2]}?sig=x"}
+    with patch("thoa.core.dataset_utils.client", client):
+        yield store
+
+
+@pytest.fixture
+def fs(blob_store):
+    return ThoaFileSystem(block_size=4096, max_blocks=4, skip_instance_cache=True)
+
+
+class TestThoaFileSystem:
+
+    def test_ls_builds_directories_from_the_file_map(self, fs):
+        assert fs.ls(f"thoa://{DATASET}", detail=False) == [f"{DATASET}/README", f"{DATASET}/data"]
+        entries = fs.ls(f"thoa://{DATASET}/data")
+        assert [(e["name"], e["type"]) for e in entries] == [
+            (f"{DATASET}/data/qc", "directory"),
+            (f"{DATASET}/data/sample.bam", "file"),
+        ]
+
+    def test_info_and_missing_paths(self, fs):
+        assert fs.info(f"thoa://{DATASET}/data/qc/stats.tsv")["type"] == "file"
+        assert fs.isdir(f"thoa://{DATASET}/data")
+        with pytest.raises(FileNotFoundError):
+            fs.info(f"thoa://{DATASET}/nope")
+
+    def test_exists_and_info_do_not_claim_a_download(self, fs, blob_store):
+        from thoa.core import dataset_utils
+
+        assert fs.exists(f"thoa://{DATASET}/README")
+        assert fs.isfile(f"thoa://{DATASET}/data/qc/stats.tsv")
+        assert fs.info(f"thoa://{DATASET}/README")["size"] is None
+
+        dataset_utils.client.put.assert_not_called()
+        dataset_utils.client.post.assert_not_called()
+
+    def test_ls_and_info_agree_on_sizes(self, fs, blob_store):
+        path = f"thoa://{DATASET}/data/qc/stats.tsv"
+
+        def sizes():
+            listed = {e["name"]: e["size"] for e in fs.ls(f"thoa://{DATASET}/data/qc")}
+            return listed[f"{DATASET}/data/qc/stats.tsv"], fs.info(path)["size"]
+
+        assert sizes() == (None, None)
+        fs.cat_file(path)
+        assert sizes() == (8, 8)
+
+    def test_ranged_reads_only_fetch_the_blocks_needed(self, fs, blob_store):
+        payload = bytes(range(256)) * 400
+
+        with fs.open(f"thoa://{DATASET}/data/sample.bam", cache_type="blockcache") as f:
+            f.seek(50_000)
+            assert f.read(100) == payload[50_000:50_100]
+            assert f.read(10) == payload[50_100:50_110]
+
+        assert blob_store.ranges == [(49_152, 53_248)]
+
+    def test_background_cache_reads_ahead(self, fs, blob_store):
+        payload = bytes(range(256)) * 400
+
+        with fs.open(f"thoa://{DATASET}/data/sample.bam") as f:
+            assert f.read() == payload
+
+        assert sum(end - start for start, end in blob_store.ranges) >= len(payload)
+        assert all(end - start <= 4096 for start, end in blob_store.ranges)
+
+    def test_link_is_minted_once_per_file(self, fs, blob_store):
+        from thoa.core import dataset_utils
+
+        fs.cat_file(f"thoa://{DATASET}/README")
+        fs.cat_file(f"thoa://{DATASET}/README")
+
+        assert dataset_utils.client.post.call_count == 1
+
+    def test_reading_claims_one_download_per_dataset(self, fs, blob_store):
+        from thoa.core import dataset_utils
+
+        fs.ls(f"thoa://{DATASET}")
+        dataset_utils.client.put.assert_not_called()
+
+        fs.cat_file(f"thoa://{DATASET}/README")
+        fs.cat_file(f"thoa://{DATASET}/data/qc/stats.tsv")
+
+        dataset_utils.client.put.assert_called_once_with(f"/datasets/{DATASET}/decrement_downloads")
+
+    def test_claim_does_not_hold_the_cache_lock_during_api_calls(self, fs, blob_store):
+        from thoa.core import dataset_utils
+
+        fs.ls(f"thoa://{DATASET}")
+        in_put, release = threading.Event(), threading.Event()
+
+        def slow_put(path):
+            in_put.set()
+            assert release.wait(5)
+
+        dataset_utils.client.put.side_effect = slow_put
+        readers = [threading.Thread(target=fs.cat_file, args=(f"thoa://{DATASET}/README",)) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        assert in_put.wait(5)
+
+        lister = threading.Thread(target=fs.ls, args=(f"thoa://{DATASET}/data",))
+        lister.start()
+        lister.join(2)
+        assert not lister.is_alive()
+
+        release.set()
+        for reader in readers:
+            reader.join(5)
+        dataset_utils.client.put.assert_called_once()
+
+    def test_refuses_when_no_downloads_remain(self, fs, blob_store):
+        from thoa.core import dataset_utils
+
+        dataset_utils.client.get.return_value[0]["remaining_downloads"] = 0
+
+        with pytest.raises(PermissionError, match="no remaining downloads"):
+            fs.cat_file(f"thoa://{DATASET}/README")
+        dataset_utils.client.post.assert_not_called()
+
+    def test_is_read_only(self, fs):
+        with pytest.raises(NotImplementedError):
+            fs.open(f"thoa://{DATASET}/README", "wb")
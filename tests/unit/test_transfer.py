@@ -0,0 +1,223 @@
+import hashlib
+import os
+import random
+import threading
+import time
+
+import pytest
+from azure.core.exceptions import ResourceModifiedError, ServiceResponseError
+
+from thoa.core.transfer import (
+    TransferBudget,
+    TransferScheduler,
+    block_concurrency_for,
+    download_ranges,
+    iter_ranges,
+    preallocate,
+)
+from fake_blob import FakeBlobStore
+
+BLOB_URL = "https://acct.blob.core.windows.net/c/big.bin?sig=x"
+
+
+class TestTransferBudget:
+
+    def test_bytes_are_capped(self):
+        budget = TransferBudget(max_connections=8, max_inflight_bytes=100)
+        budget.acquire_bytes(60)
+        acquired = threading.Event()
+
+        def second():
+            budget.acquire_bytes(60)
+            acquired.set()
+
+        t = threading.Thread(target=second)
+        t.start()
+        assert not acquired.wait(0.1)
+        budget.release_bytes(60)
+        assert acquired.wait(1)
+        t.join()
+        assert budget.peak_inflight_bytes == 60
+
+    def test_oversized_request_allowed_when_idle(self):
+        budget = TransferBudget(max_connections=1, max_inflight_bytes=10)
+        budget.acquire_bytes(1000)
+        budget.release_bytes(1000)
+
+    def test_connections_are_capped(self):
+        budget = TransferBudget(max_connections=2, max_inflight_bytes=1)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def request():
+            with budget.connection():
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.02)
+                with lock:
+                    active.pop()
+
+        threads = [threading.Thread(target=request) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert max(peak) == 2
+
+
+class TestTransferScheduler:
+
+    def test_large_lane_runs_largest_first(self):
+        order = []
+        gate = threading.Event()
+
+        with TransferScheduler(small_threshold=10, small_workers=1, large_workers=1) as scheduler:
+            scheduler.submit(1000, gate.wait)  # occupies the only large worker
+            for size in (200, 5000, 700):
+                scheduler.submit(size, order.append, size)
+            gate.set()
+
+        assert order == [5000, 700, 200]
+
+    def test_small_files_not_blocked_by_large(self):
+        gate = threading.Event()
+
+        with TransferScheduler(small_threshold=10, small_workers=1, large_workers=1) as scheduler:
+            scheduler.submit(10 ** 9, gate.wait)
+            small = scheduler.submit(5, lambda: "done")
+            assert small.result(timeout=1) == "done"
+            gate.set()
+
+    def test_exceptions_propagate_to_future(self):
+        def boom():
+            raise RuntimeError("nope")
+
+        with TransferScheduler(small_threshold=10, small_workers=1, large_workers=1) as scheduler:
+            fut = scheduler.submit(1, boom)
+            with pytest.raises(RuntimeError):
+                fut.result(timeout=1)
+
+
+class TestBlockConcurrency:
+
+    def test_scales_with_size(self):
+        assert block_concurrency_for(10 * 1024 ** 2, 16) == 2
+        assert block_concurrency_for(512 * 1024 ** 2, 16) == 8
+        assert block_concurrency_for(200 * 1024 ** 3, 16) == 16
+
+
+class JitteryBlobClient:
+    """Wraps a fake blob so ranges finish out of order."""
+
+    def __init__(self, inner, fail_at=None):
+        self.inner = inner
+        self.fail_at = fail_at
+
+    def download_blob(self, offset=None, length=None, **kwargs):
+        time.sleep(random.uniform(0, 0.005))
+        if self.fail_at is not None and offset >= self.fail_at:
+            raise ServiceResponseError("connection reset")
+        return self.inner.download_blob(offset=offset, length=length, **kwargs)
+
+
+@pytest.fixture
+def big_blob():
+    store = FakeBlobStore(chunk_size=300)
+    payload = os.urandom(10_000)
+    store.put(BLOB_URL, payload)
+    return store, payload
+
+
+class TestDownloadRanges:
+
+    def _open(self, path, size):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        preallocate(fd, size)
+        return fd
+
+    def test_writes_ranges_in_place_and_folds_md5_in_order(self, tmp_path, big_blob):
+        store, payload = big_blob
+        commits = []
+        md5 = hashlib.md5()
+        fd = self._open(tmp_path / "out", len(payload))
+        try:
+            end = download_ranges(
+                JitteryBlobClient(store.client(BLOB_URL)), fd, 0, len(payload),
+                md5=md5, workers=4, range_size=1024, on_commit=commits.append,
+            )
+        finally:
+            os.close(fd)
+
+        assert end == len(payload)
+        assert (tmp_path / "out").read_bytes() == payload
+        assert md5.hexdigest() == hashlib.md5(payload).hexdigest()
+        assert commits == sorted(commits) and commits[-1] == len(payload)
+
+    def test_resumes_from_an_offset(self, tmp_path, big_blob):
+        store, payload = big_blob
+        md5 = hashlib.md5(payload[:4096])
+        (tmp_path / "out").write_bytes(payload[:4096])
+        fd = self._open(tmp_path / "out", len(payload))
+        try:
+            download_ranges(store.client(BLOB_URL), fd, 4096, len(payload), md5=md5, range_size=1000)
+        finally:
+            os.close(fd)
+
+        assert (tmp_path / "out").read_bytes() == payload
+        assert md5.hexdigest() == hashlib.md5(payload).hexdigest()
+        assert min(start for start, _ in store.ranges) == 4096
+
+    def test_error_stops_with_a_contiguous_committed_prefix(self, tmp_path, big_blob):
+        store, payload = big_blob
+        commits = [0]
+        fd = self._open(tmp_path / "out", len(payload))
+        try:
+            with pytest.raises(ServiceResponseError):
+                download_ranges(
+                    JitteryBlobClient(store.client(BLOB_URL), fail_at=6000), fd, 0, len(payload),
+                    workers=3, range_size=1000, on_commit=commits.append,
+                )
+        finally:
+            os.close(fd)
+
+        assert commits[-1] <= 6000
+        assert (tmp_path / "out").read_bytes()[:commits[-1]] == payload[:commits[-1]]
+
+    def test_requests_are_conditional_on_the_etag(self, tmp_path, big_blob):
+        store, payload = big_blob
+        fd = self._open(tmp_path / "out", len(payload))
+        try:
+            with pytest.raises(ResourceModifiedError):
+                download_ranges(store.client(BLOB_URL), fd, 0, len(payload), etag='"stale"', range_size=4096)
+        finally:
+            os.close(fd)
+
+
+class TestIterRanges:
+
+    def test_yields_in_order_despite_out_of_order_completion(self, big_blob):
+        store, payload = big_blob
+
+        chunks = list(iter_ranges(JitteryBlobClient(store.client(BLOB_URL)), 0, len(payload), workers=4, range_size=700))
+
+        assert b"".join(chunks) == payload
+        assert sorted(store.ranges) == sorted(set(store.ranges))
+
+    def test_prefetch_stays_within_the_buffer_bound(self, big_blob):
+        store, payload = big_blob
+        gen = iter_ranges(store.client(BLOB_URL), 0, len(payload), workers=4, range_size=1000, max_buffered_bytes=3000)
+
+        next(gen)
+        time.sleep(0.05)
+
+        # The first range plus the three that fit in the buffer.
+        assert len(store.ranges) == 4
+        gen.close()
+
+    def test_requests_are_conditional_on_the_etag(self, big_blob):
+        store, payload = big_blob
+
+        with pytest.raises(ResourceModifiedError):
+            list(iter_ranges(store.client(BLOB_URL), 0, len(payload), etag='"stale"', range_size=4096))
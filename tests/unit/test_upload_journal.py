@@ -0,0 +1,31 @@
+from thoa.core.upload_journal import UploadJournal
+
+SAS_URL = "https://acct.blob.core.windows.net/container/file-001?sig=xxx"
+
+
+class TestUploadJournal:
+
+    def test_records_survive_reopen_with_a_new_sas(self, tmp_path):
+        journal = UploadJournal.open(SAS_URL, "a" * 32, 1000, journal_dir=tmp_path)
+        journal.record("00000000", "1" * 32)
+        journal.record("00000001", "2" * 32)
+        journal.close()
+
+        reopened = UploadJournal.open(SAS_URL.replace("xxx", "yyy"), "a" * 32, 1000, journal_dir=tmp_path)
+
+        assert reopened.staged == {"00000000": "1" * 32, "00000001": "2" * 32}
+
+    def test_keyed_by_file_md5_and_block_size(self, tmp_path):
+        journal = UploadJournal.open(SAS_URL, "a" * 32, 1000, journal_dir=tmp_path)
+        journal.record("00000000", "1" * 32)
+        journal.close()
+
+        assert UploadJournal.open(SAS_URL, "b" * 32, 1000, journal_dir=tmp_path).staged == {}
+        assert UploadJournal.open(SAS_URL, "a" * 32, 2000, journal_dir=tmp_path).staged == {}
+
+    def test_discard_removes_the_journal(self, tmp_path):
+        journal = UploadJournal.open(SAS_URL, "a" * 32, 1000, journal_dir=tmp_path)
+        journal.record("00000000", "1" * 32)
+        journal.discard()
+
+        assert list(tmp_path.iterdir()) == []
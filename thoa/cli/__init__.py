@@ -6,6 +6,7 @@ from .dataset_app import app as dataset_app
 from .commands.tools import app as tools_app
 from .commands.jobs import app as jobs_app
 from .commands.envs import app as envs_app
+from .commands.cache import app as cache_app
 from thoa.core.job_utils import console
 
 app = typer.Typer(help="THOA CLI tool", add_completion=False, context_settings={"help_option_names": ["-h", "--help"]})
@@ -13,6 +14,7 @@ app.add_typer(dataset_app, name="dataset", help="Dataset-related commands")
 app.add_typer(tools_app, name="tools")
 app.add_typer(jobs_app, name="jobs")
 app.add_typer(envs_app, name="envs", help="Environment-related commands")
+app.add_typer(cache_app, name="cache", help="Local download store commands")
 
 
 @app.command("run")
@@ -79,6 +81,13 @@ def run_cmd(
     verbose: bool = typer.Option(
         False, "--verbose", help="Enable verbose output."
     ),
+    no_hash_cache: bool = typer.Option(
+        False, "--no-hash-cache", help="Re-hash every input file instead of reusing digests cached from earlier runs."
+    ),
+    shard_small_files: bool = typer.Option(
+        False, "--shard-small-files", help="Pack small input files into tar shards while uploading. "
+        "Lifts the 1000-file limit; the job side unpacks them into the original paths."
+    ),
 ):
 
     has_input_data = bool(inputs) or bool(input_dataset)
@@ -117,6 +126,8 @@ def run_cmd(
         verbose=verbose,
         has_input_data=has_input_data,
         use_existing_input_dataset=bool(input_dataset),
+        use_hash_cache=not no_hash_cache,
+        shard_small_files=shard_small_files,
     )
 
     
\ No newline at end of file
@@ -0,0 +1,50 @@
+import typer
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+
+from thoa.config import settings
+from thoa.core.content_store import ContentStore
+from thoa.core.file_utils import format_bytes
+
+console = Console()
+
+app = typer.Typer(help="Local download store commands", context_settings={"help_option_names": ["-h", "--help"]})
+
+
+@app.command("info")
+def info():
+    """Show where the local store lives and how much it holds."""
+    store = ContentStore.load()
+
+    table = Table(show_header=False, box=None, padding=(0, 1))
+    table.add_column("Field", style="bold cyan")
+    table.add_column("Value", style="white")
+    table.add_row("Enabled", "yes" if settings.THOA_STORE_ENABLED else "no (set THOA_STORE_ENABLED=1)")
+    table.add_row("Location", str(store.root))
+    table.add_row("Objects", str(len(store)))
+    table.add_row("Size", format_bytes(store.total_bytes()))
+    table.add_row("Limit", format_bytes(store.max_bytes))
+    table.add_row("Link mode", store.link_mode)
+
+    console.print(Panel(table, title="[bold green]Download Store[/bold green]", expand=False))
+
+
+@app.command("prune")
+def prune(
+    max_gb: float = typer.Option(None, "--max-gb", help="Shrink the store to this many GiB. Defaults to THOA_STORE_MAX_BYTES."),
+    all_: bool = typer.Option(False, "--all", help="Remove every object."),
+):
+    """Evict least-recently-used objects from the local store."""
+    store = ContentStore.load()
+    limit = 0 if all_ else int(max_gb * 1024 ** 3) if max_gb is not None else None
+
+    removed, freed = store.evict(limit)
+    store.save()
+
+    console.print(Panel(
+        f"Removed [cyan]{removed}[/cyan] object(s), freed [green]{format_bytes(freed)}[/green]. "
+        f"Store now holds {format_bytes(store.total_bytes())}.",
+        title="Prune",
+        style="bold",
+    ))
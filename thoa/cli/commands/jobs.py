@@ -2,6 +2,7 @@ import typer
 import time
 from thoa.core.job_utils import list_jobs, current_job_status, print_job_detail
 from thoa.core.job_status import JobStatus, TERMINAL_STATUSES
+from thoa.core.dataset_utils import download_job_outputs
 from thoa.core.api_utils import api_client
 from rich.console import Console
 from rich.panel import Panel
@@ -75,3 +76,14 @@ def cancel(
         pass
     else:
         console.print(f"[red]Failed to cancel job:[/red] {response}")
+
+
+@app.command("download")
+def download(
+    job_id: str = typer.Argument(..., help="Public ID of the job whose outputs to download."),
+    destination_path: str = typer.Argument(None, help="Directory to download into. Defaults to the job's download directory."),
+    no_verify: bool = typer.Option(False, "--no-verify", help="Skip MD5 verification of downloaded files."),
+):
+    """Download the output files of a finished job."""
+    if not download_job_outputs(job_id, destination_path, verify_md5=not no_verify):
+        raise typer.Exit(1)
@@ -15,23 +15,19 @@ from threading import Thread
 from thoa.config import settings
 
 import concurrent.futures
-from azure.storage.blob import BlobClient
 
 import time
-import hashlib
-import mmap
 from pathlib import Path
 import os
 
 from thoa.core.job_utils import (
     print_config,
     validate_user_command,
-    collect_files,
-    compute_md5_buffered,
-    hash_all,
-    file_sizes_in_bytes,
+    hash_and_register,
+    RegistrationError,
+    print_hash_stats,
     current_job_status,
-    all_files_have_upload_links,
+    iter_upload_links,
     upload_all,
     max_threads,
     console
@@ -43,6 +39,10 @@ from thoa.core.remote_inputs import (
     project_input_context,
 )
 from thoa.core.job_status import JobStatus, UPLOAD_STATUSES
+from thoa.core.hash_cache import HashCache
+from thoa.core.file_utils import format_bytes, scan_files
+from thoa.core.shards import TarShard, plan_shards, hash_shards, shard_manifest
+from thoa.core.dataset_utils import download_job_outputs
 
 max_threads = min(32, os.cpu_count() * 2)
 
@@ -60,6 +60,33 @@ def _print_env_build_failure(job_id: str) -> None:
         pass
 
 
+def _print_registration_failure(error, limit: int = 10) -> None:
+    lines = [f"[red]{path}[/red]\n  {reason}" for path, reason in error.failures[:limit]]
+    if len(error.failures) > limit:
+        lines.append(f"... and {len(error.failures) - limit} more")
+    console.print(Panel(
+        "\n".join(lines) + f"\n\n{error.registered} of {error.total} file(s) were registered before stopping.",
+        title=f"[bold red]{len(error.failures)} input file(s) could not be registered[/bold red]",
+        expand=False,
+        border_style="red",
+    ))
+
+
+def _print_upload_failures(failures, items_by_public_id, limit: int = 10) -> None:
+    lines = [
+        f"[red]{items_by_public_id[file_id].path if file_id in items_by_public_id else file_id}[/red]\n  {reason}"
+        for file_id, reason in failures[:limit]
+    ]
+    if len(failures) > limit:
+        lines.append(f"... and {len(failures) - limit} more")
+    console.print(Panel(
+        "\n".join(lines),
+        title=f"[bold red]{len(failures)} input file(s) could not be uploaded[/bold red]",
+        expand=False,
+        border_style="red",
+    ))
+
+
 def _print_dry_run_summary(
     n_files: int,
     total_size_bytes: int,
@@ -67,14 +94,7 @@ def _print_dry_run_summary(
     estimate,
     validation_passed: bool,
 ):
-    if total_size_bytes < 1024:
-        size_str = f"{total_size_bytes} B"
-    elif total_size_bytes < 1024 ** 2:
-        size_str = f"{total_size_bytes / 1024:.1f} KB"
-    elif total_size_bytes < 1024 ** 3:
-        size_str = f"{total_size_bytes / 1024 ** 2:.1f} MB"
-    else:
-        size_str = f"{total_size_bytes / 1024 ** 3:.2f} GB"
+    size_str = format_bytes(total_size_bytes)
 
     table = Table(show_header=False, box=None, expand=False, padding=(0, 1))
 
@@ -123,6 +143,8 @@ def run_cmd(
     verbose: bool = False,
     has_input_data: bool = True,
     use_existing_input_dataset: bool = False,
+    use_hash_cache: bool = True,
+    shard_small_files: bool = False,
 ):
     
     """Run the job with the given configuration using the Bioconda-based execution environment."""
@@ -191,8 +213,10 @@ def run_cmd(
         )
         exit(1)
 
+    input_shards = []
+
     if input_dataset:
-        all_files = []
+        input_records = []
         input_dataset = input_dataset.strip()
         input_dataset_response = api_client.get(f"/datasets?public_id={input_dataset}&include_adjusted_context=True&include_jobs_as_input=False&include_jobs_as_output=False")[0]
         if input_dataset_response.get("deletion_pending"):
@@ -210,12 +234,20 @@ def run_cmd(
             raise typer.Exit(code=1)
 
     elif inputs:
-        all_files = collect_files(inputs)
-        if len(all_files) > 1000:
+        # Scan once: the same records feed the count check, dry-run sizing,
+        # hashing and /files registration below.
+        input_records = scan_files(inputs)
+        if shard_small_files:
+            # Small files travel inside tar shards, so only shards and large
+            # files count towards the limit.
+            input_shards, loose_records = plan_shards(input_records)
+        else:
+            input_shards, loose_records = [], input_records
+        if len(loose_records) + len(input_shards) > 1000:
             console.print(
                 "[bold red]Error:[/bold red] More than 1000 input files detected. "
                 "This amount is currently not supported. "
-                "Please consider compressing your files into an archive and try again."
+                "Please re-run with --shard-small-files or compress your files into an archive and try again."
             )
             raise typer.Exit(code=1)
 
@@ -260,9 +292,8 @@ def run_cmd(
             n_files = len(input_dataset_response.get("adjusted_context") or {})
             dataset_source = "existing"
         elif inputs:
-            file_sizes = file_sizes_in_bytes(all_files)
-            total_size_bytes = sum(file_sizes.values())
-            n_files = len(all_files)
+            total_size_bytes = sum(record.size for record in input_records)
+            n_files = len(input_records)
             dataset_source = "upload"
         else:
             total_size_bytes = 0
@@ -412,22 +443,62 @@ def run_cmd(
 
         elif inputs:
 
-            all_files = collect_files(inputs)
-            file_sizes = file_sizes_in_bytes(all_files)
-            all_hashes = hash_all(all_files)
-            file_responses = []
-            local_path_by_public_id = {}
+            hash_cache = HashCache.load() if use_hash_cache else None
+            hash_stats = {}
 
-            for path, size in file_sizes.items():
+            def register_file(record, md5):
                 response = api_client.post("/files", json={
-                    "filename": str(path),
-                    "md5sum": all_hashes[path],
-                    "size": size,
+                    "filename": str(record.path),
+                    "md5sum": md5,
+                    "size": record.size,
                 })
-                file_responses.append(response)
-                local_path_by_public_id[response["public_id"]] = str(path)
+                if response is None:
+                    raise RuntimeError(f"Failed to register {record.path}")
+                return response
+
+            # Each file is registered as soon as its hash is ready, overlapping
+            # /files round trips with hashing of the remaining inputs.
+            try:
+                all_hashes, registrations = hash_and_register(
+                    loose_records, register_file, cache=hash_cache, stats=hash_stats
+                )
+                if input_shards:
+                    shard_hashes, shard_registrations = hash_and_register(
+                        input_shards,
+                        register_file,
+                        hasher=lambda shards, on_hashed: hash_shards(shards, workers=max_threads, on_hashed=on_hashed),
+                    )
+                    all_hashes.update(shard_hashes)
+                    registrations.update(shard_registrations)
+            except RegistrationError as e:
+                _print_registration_failure(e)
+                raise typer.Exit(code=1)
+            if verbose:
+                if hash_cache is not None:
+                    console.print(f"[green]Hash cache:[/green] {hash_cache.hits} reused, {hash_cache.misses} computed")
+                print_hash_stats(hash_stats)
+
+            # Copies of the same content share one registration: upload the
+            # first path for each file id and map every path in input_context.
+            upload_items = list(loose_records) + list(input_shards)
+            upload_item_by_public_id = {}
+            for item in upload_items:
+                upload_item_by_public_id.setdefault(registrations[item.path]["public_id"], item)
+            file_responses = [registrations[item.path] for item in upload_item_by_public_id.values()]
+            if verbose and len(upload_item_by_public_id) < len(upload_items):
+                console.print(
+                    f"[green]Deduplicated:[/green] {len(upload_items)} input(s) share "
+                    f"{len(upload_item_by_public_id)} distinct file(s)"
+                )
+            if verbose and input_shards:
+                console.print(
+                    f"[green]Sharding:[/green] {len(input_records) - len(loose_records)} small file(s) "
+                    f"packed into {len(input_shards)} tar shard(s)"
+                )
 
             names_to_public_ids = {f['filename']: f['public_id'] for f in file_responses}
+            for item in upload_items:
+                names_to_public_ids.setdefault(str(item.path), registrations[item.path]["public_id"])
 
             new_input_dataset = api_client.post("/datasets", json={
                 "files": [f['public_id'] for f in file_responses],
@@ -435,59 +506,69 @@ def run_cmd(
 
         # Only update if we have an input dataset
         if new_input_dataset:
+            input_update_payload = {
+                "input_dataset_public_id": new_input_dataset["public_id"],
+                "input_context": names_to_public_ids,
+            }
+            if input_shards:
+                input_update_payload["input_shard_manifest"] = shard_manifest(input_shards, registrations)
             updated_job_response = api_client.put(
                 f"/jobs/{job_response['public_id']}",
-                json={
-                    "input_dataset_public_id": new_input_dataset["public_id"],
-                    "input_context": names_to_public_ids 
-                }
+                json=input_update_payload,
             )
             
     if new_input_dataset:
-        # STEP 5: Create signed azure URLs for the file objects
-        with console.status(f"Creating Upload URLs for your files", spinner="dots12"):
-            
-            while not all_files_have_upload_links(
-                updated_job_response['public_id'], 
-                new_input_dataset['public_id'],
-                [f.get("public_id") for f in file_responses]
-            ):
-                time.sleep(4)
-
-            upload_links = api_client.get("/temporary_links", params={
-                "dataset_public_id": new_input_dataset['public_id'],
-                "job_public_id": updated_job_response['public_id'],
-                "link_type": "upload"
-            })
-
-            file_link_map = {link["file_public_id"]: link for link in upload_links}
-
-
-        # STEP 7: Upload the files to Azure
+        # STEP 5 + 7: Upload each file as soon as the server has created its signed URL
         with console.status(f"Uploading Files to Thoa", spinner="dots12"):
-            
+
             # Use the actual scanned local path, not FileModel.filename from the API,
             # because dedup may reuse an existing file row with an old filename.
-            file_map = dict(local_path_by_public_id)
+            # Shards are passed through as-is and streamed from their members.
+            file_map = {
+                public_id: item if isinstance(item, TarShard) else str(item.path)
+                for public_id, item in upload_item_by_public_id.items()
+            }
 
             md5_map = {
-                public_id: all_hashes[Path(local_path)]
-                for public_id, local_path in local_path_by_public_id.items()
+                public_id: all_hashes[item.path]
+                for public_id, item in upload_item_by_public_id.items()
             }
 
-            for file_public_id, link in file_link_map.items():
-
-                link_id = link["public_id"]
-                filename = file_map.get(file_public_id)
-
-                updated_links = api_client.put(
-                    f"/temporary_links/{link_id}",
+            def record_client_path(link):
+                response = api_client.put(
+                    f"/temporary_links/{link['public_id']}",
                     json={
-                        "client_path": filename
+                        "client_path": str(upload_item_by_public_id[link["file_public_id"]].path)
                     }
                 )
+                if response is None:
+                    raise RuntimeError("could not record the client path on the upload link")
+
+            # The client_path update runs inside each upload worker, so link
+            # updates overlap with each other and with the transfers.
+            upload_failures = []
+            upload_summary = upload_all(
+                iter_upload_links(
+                    updated_job_response['public_id'],
+                    new_input_dataset['public_id'],
+                    [f.get("public_id") for f in file_responses],
+                ),
+                file_map,
+                md5_map,
+                prepare=record_client_path,
+                failures=upload_failures,
+            )
+            console.print(
+                f"[green]Uploaded {upload_summary['uploaded']} file(s) ({format_bytes(upload_summary['uploaded_bytes'])})[/green], "
+                f"[yellow]skipped {upload_summary['skipped']} already present ({format_bytes(upload_summary['skipped_bytes'])})[/yellow]"
+                + (f", [red]{upload_summary['failed'] + upload_summary['missing']} failed[/red]"
+                   if upload_summary['failed'] or upload_summary['missing'] else "")
+            )
 
-            upload_all(upload_links, file_map, md5_map, max_workers=max_threads)
+            if upload_failures:
+                # The job cannot leave the upload phase without these files.
+                _print_upload_failures(upload_failures, upload_item_by_public_id)
+                raise typer.Exit(code=1)
 
             while current_job_status(updated_job_response['public_id']) in UPLOAD_STATUSES:
                 time.sleep(4)
@@ -590,50 +671,7 @@ def run_cmd(
             if current_job_status(updated_job_response['public_id']) == JobStatus.COMPLETED:
                 break
 
-    with console.status(f"Downloading output files", spinner="dots12"):
-        if download_path:
-            job_with_output = api_client.get(f"/jobs?public_id={updated_job_response['public_id']}")[0]
-            output_dataset_id = job_with_output.get("output_dataset_public_id")
-            
-            output_links = api_client.get(
-                "/temporary_links", 
-                params={
-                    "dataset_public_id": output_dataset_id,
-                    "job_public_id": updated_job_response['public_id'],
-                    "link_type": "download_outputs"
-                }
-            )
-
-            for link in output_links:
-
-                remote_output_path_parent = Path(output)
-                local_output_path = Path(download_path) 
-
-                remote_link_path = Path(link.get("client_path"))
-                local_link_path = Path(str(remote_link_path).replace(str(remote_output_path_parent), str(local_output_path)))
-
-                if not local_link_path.parent.exists():
-                    local_link_path.parent.mkdir(parents=True, exist_ok=True)
-
-                try:
-                    sas_url = link["url"]
-                    blob = BlobClient.from_blob_url(sas_url)
-                    print(f"[DOWNLOAD] {blob.blob_name} -> {local_link_path}")
-                    stream = blob.download_blob(max_concurrency=4)
-                    with open(local_link_path, "wb") as fh:
-                        for chunk in stream.chunks():
-                            fh.write(chunk)
-
-                    # Optional: verify MD5 if uploader set it in metadata
-                    try:
-                        remote_md5 = (blob.get_blob_properties().metadata or {}).get("md5")
-                        if remote_md5:
-                            local_md5 = compute_md5_buffered(local_link_path)
-                            if local_md5 != remote_md5:
-                                print(f"[WARN] MD5 mismatch for {local_link_path.name}: remote={remote_md5} local={local_md5}")
-                    except Exception:
-                        pass
-                    print(f"[SUCCESS] Downloaded {local_link_path}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to download from {sas_url}: {e}")
+    if download_path:
+        if not download_job_outputs(updated_job_response['public_id'], download_path, remote_root=str(output)):
+            raise typer.Exit(code=1)
                 
@@ -1,11 +1,14 @@
+import os
+import sys
 import typer
-from thoa.core.dataset_utils import list_datasets, download_dataset, list_files_in_dataset
+from thoa.core.dataset_utils import list_datasets, download_dataset, list_files_in_dataset, stream_dataset_file
 from rich.panel import Panel
 from rich.console import Console
 from typing import List
 from typing import Optional
 
 console = Console()
+err_console = Console(stderr=True)
 
 app = typer.Typer(help="Dataset-related commands", context_settings={"help_option_names": ["-h", "--help"]})
 
@@ -36,14 +39,16 @@ def download(
     dataset_id: str = typer.Argument(..., help="The UUID of the dataset to download."),
     destination_path: str = typer.Argument(..., help="The path to download the dataset to."),
     include: List[str] = typer.Option(None, "--include", "-i", help="List of file public IDs to include. If not set, includes all files."),
-    exclude: List[str] = typer.Option(None, "--exclude", "-e", help="List of file public IDs to exclude. If not set, excludes no files.")
+    exclude: List[str] = typer.Option(None, "--exclude", "-e", help="List of file public IDs to exclude. If not set, excludes no files."),
+    no_verify: bool = typer.Option(False, "--no-verify", help="Skip MD5 verification of downloaded files.")
 ):
     """Download a dataset by its UUID."""
     download_dataset(
         dataset_id, 
         destination_path,
         include=include,
-        exclude=exclude
+        exclude=exclude,
+        verify_md5=not no_verify,
     )
 
 
@@ -57,3 +62,22 @@ def ls(
     list_files_in_dataset(dataset_id, level)
 
     
+
+
+@app.command("cat")
+def cat(
+    dataset_id: str = typer.Argument(..., help="The UUID of the dataset."),
+    path: str = typer.Argument(..., help="Path (or trailing part of a path, or file ID) of the file to stream."),
+    no_verify: bool = typer.Option(False, "--no-verify", help="Skip MD5 verification of the streamed bytes."),
+):
+    """Stream a dataset file to stdout, e.g. `thoa dataset cat <id> sample.vcf.gz | bcftools view -`."""
+    try:
+        stream_dataset_file(dataset_id, path, sys.stdout.buffer, verify_md5=not no_verify)
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); point stdout at devnull so the
+        # interpreter's final flush does not complain.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        raise typer.Exit(0)
+    except Exception as e:
+        err_console.print(Panel(f"[red]{e}[/red]", title="Error", style="bold red"))
+        raise typer.Exit(1)
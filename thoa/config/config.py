@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict
 
 class Settings(BaseSettings):
 
@@ -8,9 +8,27 @@ class Settings(BaseSettings):
     THOA_API_KEY: Optional[str] = None
     THOA_API_DEBUG: bool = False
     THOA_API_TIMEOUT: int = 30
+    THOA_API_CONCURRENCY: int = 8
     THOA_GDRIVE_CALLBACK_HOST: str = "127.0.0.1"
     THOA_GDRIVE_CALLBACK_PORT: int = 54389
     THOA_GDRIVE_OPEN_BROWSER: bool = True
+    THOA_CACHE_DIR: str = "~/.cache/thoa"
+    THOA_HASH_STRATEGY: str = "auto"
+    THOA_HASH_WORKERS_ROTATIONAL: int = 1
+    THOA_HASH_WORKERS_SSD: int = 32
+    THOA_HASH_WORKERS_UNKNOWN: int = 32
+    THOA_HASH_DEVICE_WORKERS: Dict[str, int] = {}
+    THOA_UPLOAD_MAX_CONNECTIONS: int = 32
+    THOA_UPLOAD_MAX_INFLIGHT_BYTES: int = 512 * 1024 * 1024
+    THOA_UPLOAD_SMALL_FILE_WORKERS: int = 8
+    THOA_UPLOAD_LARGE_FILE_WORKERS: int = 4
+    THOA_UPLOAD_MAX_BLOCK_CONCURRENCY: int = 16
+    THOA_SHARD_MAX_BYTES: int = 256 * 1024 * 1024
+    THOA_SHARD_SMALL_FILE_BYTES: int = 4 * 1024 * 1024
+    THOA_STORE_ENABLED: bool = False
+    THOA_STORE_DIR: Optional[str] = None
+    THOA_STORE_MAX_BYTES: int = 50 * 1024 ** 3
+    THOA_STORE_LINK_MODE: str = "auto"
 
     class Config:
         @classmethod
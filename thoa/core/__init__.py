@@ -1,19 +1,28 @@
 from .api_utils import api_client
 from .env_utils import resolve_environment_spec
 from .dataset_utils import download_dataset
+from .hash_cache import HashCache
+from .content_store import ContentStore
+from .download_manifest import DownloadManifest
+from .file_utils import FileRecord, format_bytes, scan_files
+from .upload_journal import UploadJournal
+from .shards import TarShard, plan_shards
 from .job_utils import (
     print_config,
     validate_user_command,
     collect_files,  
     compute_md5_buffered,
     compute_md5_mmap,
+    compute_md5_fadvise,
     choose_hash_strategy,
     hash_all,
+    hash_and_register,
     max_threads,
     file_sizes_in_bytes,
     current_job_status,
-    all_files_have_upload_links,
+    iter_upload_links,
     upload_file_sas,
+    upload_file_streaming,
     upload_all,
     blob_exists_with_same_md5,
     console
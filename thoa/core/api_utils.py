@@ -48,6 +48,8 @@ class ApiClient:
                 "Accept": "application/json",
             },
             timeout=httpx.Timeout(timeout),
+            # Keep enough idle connections for concurrent registration/link requests.
+            limits=httpx.Limits(max_keepalive_connections=max(20, settings.THOA_API_CONCURRENCY)),
         )
 
     def _request(self, method: str, path: str, **kwargs):
@@ -0,0 +1,224 @@
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from thoa.config import settings
+from thoa.core.hash_cache import default_cache_dir
+from thoa.core.json_store import read_versioned_json, write_json_atomic
+
+STORE_DIRNAME = "store"
+STORE_INDEX_FILENAME = "index.json"
+STORE_INDEX_VERSION = 1
+
+# ioctl(dest_fd, FICLONE, src_fd): share extents copy-on-write (btrfs, XFS, bcachefs).
+FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dest: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as s, open(dest, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError:
+        try:
+            dest.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return False
+
+
+def place(src: Path, dest: Path, mode: str = "auto") -> str:
+    """
+    Make `dest` a copy of `src` as cheaply as the filesystem allows.
+
+    "auto" tries a reflink (copy-on-write, so later edits stay private),
+    then a hardlink, then a byte copy; "copy" never hardlinks. The file
+    appears at `dest` atomically. Returns the method used.
+    """
+    dest = Path(dest)
+    scratch = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        if _reflink(src, scratch):
+            method = "reflink"
+        elif mode == "auto" and _try_link(src, scratch):
+            method = "hardlink"
+        else:
+            shutil.copyfile(src, scratch)
+            method = "copy"
+        os.replace(scratch, dest)
+        return method
+    finally:
+        try:
+            scratch.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def _try_link(src: Path, dest: Path) -> bool:
+    try:
+        os.link(src, dest)
+        return True
+    except OSError:
+        return False
+
+
+class ContentStore:
+    """
+    Local content-addressed store of downloaded files, keyed by MD5.
+
+    Objects live at `<root>/objects/<md5[:2]>/<md5>`. The index records each
+    object's size and mtime_ns when it was stored, plus when it was last
+    used; an object whose stat no longer matches (for instance a hardlinked
+    checkout edited in place) is dropped instead of being handed out.
+    `evict()` removes least-recently-used objects until the store fits in
+    `max_bytes`.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, link_mode: str = "auto"):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.link_mode = link_mode
+        self.index_path = self.root / STORE_INDEX_FILENAME
+        self._entries: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._removed: set[str] = set()
+        self._dirty = False
+        self.hits = 0
+        self.bytes_reused = 0
+
+    @classmethod
+    def load(cls, root: Path | None = None, max_bytes: int | None = None, link_mode: str | None = None) -> "ContentStore":
+        store = cls(
+            Path(root or settings.THOA_STORE_DIR or default_cache_dir() / STORE_DIRNAME).expanduser(),
+            max_bytes if max_bytes is not None else settings.THOA_STORE_MAX_BYTES,
+            link_mode or settings.THOA_STORE_LINK_MODE,
+        )
+        store._entries = store._read_entries()
+        return store
+
+    @classmethod
+    def from_settings(cls) -> "ContentStore | None":
+        """The configured store, or None when THOA_STORE_ENABLED is off."""
+        return cls.load() if settings.THOA_STORE_ENABLED else None
+
+    def _read_entries(self) -> dict[str, list]:
+        return read_versioned_json(self.index_path, STORE_INDEX_VERSION)
+
+    def object_path(self, md5: str) -> Path:
+        md5 = md5.lower()
+        return self.root / "objects" / md5[:2] / md5
+
+    def _valid(self, md5: str, size: int | None) -> Path | None:
+        """Object path if it is indexed, intact and (when given) `size` bytes; else drop it."""
+        entry = self._entries.get(md5)
+        if entry is None:
+            return None
+        path = self.object_path(md5)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or st.st_size != entry[0] or st.st_mtime_ns != entry[1]:
+            self._drop(md5)
+            return None
+        if size is not None and size != entry[0]:
+            return None
+        return path
+
+    def _drop(self, md5: str):
+        self._entries.pop(md5, None)
+        self._removed.add(md5)
+        self._dirty = True
+        try:
+            self.object_path(md5).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def checkout(self, md5: str, dest: Path, size: int | None = None) -> bool:
+        """Materialise the object for `md5` at `dest`; False if the store does not have it."""
+        if not md5:
+            return False
+        md5 = md5.lower()
+        with self._lock:
+            path = self._valid(md5, size)
+            if path is None:
+                return False
+            self._entries[md5][2] = int(time.time())
+            self._dirty = True
+        try:
+            place(path, dest, self.link_mode)
+        except OSError:
+            return False
+        with self._lock:
+            self.hits += 1
+            self.bytes_reused += self._entries.get(md5, [0])[0]
+        return True
+
+    def add(self, md5: str, src: Path) -> None:
+        """Store the file at `src` under `md5`, which the caller has verified."""
+        if not md5:
+            return
+        md5 = md5.lower()
+        with self._lock:
+            if self._valid(md5, None) is not None:
+                self._entries[md5][2] = int(time.time())
+                self._dirty = True
+                return
+        path = self.object_path(md5)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            place(src, path, self.link_mode)
+            st = os.stat(path)
+        except OSError:
+            # The store is an optimisation; a full or read-only disk must not fail the download.
+            return
+        with self._lock:
+            self._entries[md5] = [st.st_size, st.st_mtime_ns, int(time.time())]
+            self._removed.discard(md5)
+            self._dirty = True
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry[0] for entry in self._entries.values())
+
+    def evict(self, max_bytes: int | None = None) -> tuple[int, int]:
+        """Remove least-recently-used objects until the store fits; returns (objects, bytes) removed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        removed = freed = 0
+        with self._lock:
+            total = sum(entry[0] for entry in self._entries.values())
+            for md5, entry in sorted(self._entries.items(), key=lambda kv: kv[1][2]):
+                if total <= limit:
+                    break
+                self._drop(md5)
+                total -= entry[0]
+                removed += 1
+                freed += entry[0]
+        return removed, freed
+
+    def save(self) -> None:
+        """Merge with the on-disk index, evict down to max_bytes and write atomically."""
+        with self._lock:
+            if not self._dirty:
+                return
+            merged = self._read_entries()
+            for md5 in self._removed:
+                merged.pop(md5, None)
+            merged.update(self._entries)
+            self._entries = merged
+            self._removed.clear()
+        self.evict()
+        with self._lock:
+            payload = {"version": STORE_INDEX_VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+
+        write_json_atomic(self.index_path, payload)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -22,20 +22,44 @@ from rich import box
 from .api_utils import api_client as client
 from pathlib import Path, PurePath
 from azure.storage.blob import BlobClient
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    HttpResponseError,
+    ResourceModifiedError,
+    ServiceRequestError,
+    ServiceResponseError,
+)
 from thoa.core.job_utils import compute_md5_buffered
 import os
+import sys
+import json
+import time
+import contextlib
+import hashlib
 import shutil
 import base64
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from collections import Counter
 import fnmatch
 
+from thoa.config import settings
+from thoa.core.content_store import ContentStore, place
+from thoa.core.download_manifest import DownloadManifest
+from thoa.core.file_utils import format_bytes
+from thoa.core.transfer import RANGED_DOWNLOAD_SUPPORTED, download_ranges, iter_ranges, preallocate
+
 console = Console()
 
 FILE_WORKERS = min(16, (os.cpu_count() or 4) * 2)
 PER_BLOB_CONCURRENCY = 8                           
 CHUNK_SIZE = 8 * 1024 * 1024                       
-VERIFY_MD5 = False                                 
+VERIFY_MD5 = True
+DOWNLOAD_RETRIES = 4
+DOWNLOAD_BACKOFF_SECONDS = 1.0
+_TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RANGED_DOWNLOAD_MIN_BYTES = 32 * 1024 * 1024
+PART_STATE_SAVE_INTERVAL = 64 * 1024 * 1024
+STREAM_MAX_BUFFERED_BYTES = 64 * 1024 * 1024
 
 def _filter_files_by_id_or_path(
     files: dict[str, str],
@@ -77,13 +101,6 @@ def _filter_files_by_id_or_path(
     return result
 
 
-def _fmt_bytes(n: int) -> str:
-    for unit in ["B","KiB","MiB","GiB","TiB","PiB"]:
-        if n < 1024 or unit == "PiB":
-            return f"{n:.2f} {unit}"
-        n /= 1024
-    return f"{n:.2f} B"
-
 def _nearest_existing_parent(path: Path) -> Path:
     p = path
     while not p.exists():
@@ -160,16 +177,105 @@ def _normalize_md5_hex_or_b64_to_hex(s: str | None) -> str | None:
         pass
     return None
 
-def _get_size_and_remote_md5(blob: BlobClient) -> tuple[int | None, str | None]:
-    """Use EXACTLY your source of truth: metadata['md5'] (hex or base64)."""
+def _get_remote_state(blob: BlobClient) -> tuple[int | None, str | None, dict | None]:
+    """
+    Return (size, md5_hex, version) from one HEAD request.
+
+    md5 comes from metadata['md5'] (hex or base64), our source of truth.
+    `version` identifies this exact blob content (etag, last-modified, size)
+    and is what a partial download is validated against before resuming.
+    """
     try:
         props = blob.get_blob_properties()
         size = getattr(props, "size", None)
         meta = getattr(props, "metadata", None) or {}
         md5_hex = _normalize_md5_hex_or_b64_to_hex(meta.get("md5"))
-        return size, md5_hex
+        etag = getattr(props, "etag", None)
+        version = None
+        if size is not None and etag:
+            version = {
+                "etag": etag,
+                "last_modified": str(getattr(props, "last_modified", None)),
+                "size": size,
+            }
+        return size, md5_hex, version
     except Exception:
-        return None, None
+        return None, None, None
+
+
+def _is_transient(e: Exception) -> bool:
+    """Network failures and throttling/5xx responses are worth retrying."""
+    if isinstance(e, (ServiceRequestError, ServiceResponseError, ConnectionError, TimeoutError)):
+        return True
+    return isinstance(e, HttpResponseError) and getattr(e, "status_code", None) in _TRANSIENT_STATUS_CODES
+
+
+def _md5_of_prefix(path: Path, n_bytes: int, buffer_size: int = CHUNK_SIZE):
+    """MD5 object over the first `n_bytes` of `path`, ready to be extended."""
+    h = hashlib.md5()
+    remaining = n_bytes
+    with open(path, "rb") as f:
+        while remaining:
+            chunk = f.read(min(buffer_size, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h
+
+
+def _part_state_path(tmp: Path) -> Path:
+    return tmp.with_name(tmp.name + ".json")
+
+
+def _discard_part(tmp: Path):
+    for p in (tmp, _part_state_path(tmp)):
+        try:
+            p.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+
+def _resume_offset(tmp: Path, version: dict | None) -> int:
+    """
+    Bytes of an existing .part file that can be kept.
+
+    A partial is only reused if its sidecar records the same remote version
+    (etag, last-modified, size); otherwise it belongs to content that has
+    since been replaced, and it is discarded. Without a known version there
+    is nothing to validate against, so the download starts over.
+    """
+    state_path = _part_state_path(tmp)
+    try:
+        saved = json.loads(state_path.read_text())
+        offset = tmp.stat().st_size
+    except (OSError, ValueError):
+        saved, offset = None, 0
+
+    # Ranged downloads preallocate the file, so its length says nothing;
+    # they record how far it is contiguous under "committed" instead.
+    committed = saved.pop("committed", None) if isinstance(saved, dict) else None
+
+    if version is None or saved != version or offset > version["size"]:
+        _discard_part(tmp)
+        offset = 0
+        if version is not None:
+            _save_part_state(tmp, version)
+    elif committed is not None:
+        offset = min(offset, committed)
+    elif offset and offset == version["size"]:
+        # A full-length .part without "committed" may be a preallocated file
+        # whose ranged download never recorded progress; trust none of it.
+        offset = 0
+    return offset
+
+
+def _save_part_state(tmp: Path, version: dict, committed: int | None = None):
+    state = dict(version) if committed is None else {**version, "committed": committed}
+    state_path = _part_state_path(tmp)
+    scratch = state_path.with_name(state_path.name + ".tmp")
+    scratch.write_text(json.dumps(state))
+    os.replace(scratch, state_path)
 
 def _extract_url(link_info: dict | None) -> str | None:
     """Handle common server payload shapes."""
@@ -189,6 +295,92 @@ def _safe_dest(base_dir: Path, key_path: str) -> Path:
     return (base_dir / p).resolve()
 
 
+class _RangedDownloadError(Exception):
+    """Carries how far a failed ranged download got; the cause is the original error."""
+
+    def __init__(self, committed: int):
+        super().__init__(f"ranged download stopped at {committed}")
+        self.committed = committed
+
+
+class _PartWriter:
+    """
+    Seekable wrapper around a .part file handed to `downloader.readinto`.
+
+    With max_concurrency > 1 the SDK seeks and writes chunks out of order,
+    so this tracks how far the file is contiguous (`committed`, for
+    resuming) and folds bytes into `md5` only while they arrive in order
+    (`hashed`); anything after a gap is hashed from disk at the end.
+    """
+
+    def __init__(self, fh, offset: int, md5=None):
+        self.fh = fh
+        self.md5 = md5
+        self.committed = self.hashed = offset
+        self._ahead: dict[int, int] = {}
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.fh.tell()
+
+    def seek(self, pos: int, whence: int = os.SEEK_SET) -> int:
+        return self.fh.seek(pos, whence)
+
+    def write(self, data) -> int:
+        start = self.fh.tell()
+        n = self.fh.write(data)
+        if self.md5 is not None and start == self.hashed:
+            self.md5.update(data)
+            self.hashed += n
+        if start == self.committed:
+            self.committed += n
+            while self.committed in self._ahead:
+                self.committed = self._ahead.pop(self.committed)
+        elif start > self.committed:
+            self._ahead[start] = start + n
+        return n
+
+
+def _download_ranged(blob: BlobClient, tmp: Path, version: dict, offset: int, md5, workers: int) -> int:
+    """
+    Fill a preallocated `tmp` from `offset` to the end with parallel ranged GETs.
+
+    `md5`, when given, already covers the first `offset` bytes and is folded
+    forward in order. The contiguous prefix is recorded in the part sidecar
+    as it grows, so an interrupted file resumes from there. Returns the end
+    offset; raises _RangedDownloadError (chaining the real error) otherwise.
+    """
+    committed = offset
+    saved = offset
+
+    def on_commit(n):
+        nonlocal committed, saved
+        committed = n
+        if committed - saved >= PART_STATE_SAVE_INTERVAL:
+            _save_part_state(tmp, version, committed)
+            saved = committed
+
+    # Record the real progress before the file grows to full length, so a
+    # crash right after preallocating never looks like a finished download.
+    _save_part_state(tmp, version, offset)
+    fd = os.open(tmp, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        preallocate(fd, version["size"])
+        return download_ranges(
+            blob, fd, offset, version["size"],
+            etag=version["etag"], md5=md5, workers=workers, on_commit=on_commit,
+        )
+    except ResourceModifiedError:
+        raise
+    except Exception as e:
+        raise _RangedDownloadError(committed) from e
+    finally:
+        os.close(fd)
+        _save_part_state(tmp, version, committed)
+
+
 # Per-file worker
 def _download_one(path_string: str,
                   file_id: str,
@@ -196,10 +388,30 @@ def _download_one(path_string: str,
                   base_dir: Path,
                   verify_md5: bool,
                   per_blob_concurrency: int,
-                  chunk_size: int) -> tuple[str, str, bool, str]:
+                  chunk_size: int,
+                  manifest: DownloadManifest | None = None,
+                  store: ContentStore | None = None) -> tuple[str, str, bool, str]:
     """
     Returns (path_string, file_id, ok, note)
-    note in {"skipped_exists_verified","skipped_exists","downloaded_verified","downloaded","no_url","md5_mismatch","error:..."}
+    note in {"skipped_exists_verified","skipped_exists","linked_from_store","downloaded_verified","downloaded","no_url","md5_mismatch","error:..."}
+
+    Data is appended to `<dest>.part`. After a failure the partial is kept
+    and the next attempt (in this run, after a backoff, or in a later run)
+    continues with a ranged GET from its length, provided the blob's etag,
+    last-modified and size still match the ones recorded when it started.
+
+    With `verify_md5`, the digest is folded in as chunks arrive, so checking
+    a fresh download costs no extra reads; only a partial left by an earlier
+    run is read back once to seed the digest.
+
+    Blobs of RANGED_DOWNLOAD_MIN_BYTES and up are written by parallel ranged
+    GETs into a preallocated .part (see _download_ranged) instead of one
+    sequential stream.
+
+    With `manifest`, every file that ends up in place is recorded in it.
+    With `store`, a blob whose MD5 is already in the local content store is
+    linked from there instead of downloaded, and every file whose MD5 was
+    verified is added to it.
     """
     sas_url = _extract_url(link_info)
     if not sas_url:
@@ -211,55 +423,405 @@ def _download_one(path_string: str,
 
     blob = BlobClient.from_blob_url(sas_url)
 
-    expected_size, remote_md5_hex = _get_size_and_remote_md5(blob)
+    expected_size, remote_md5_hex, version = _get_remote_state(blob)
+
+    def record(md5):
+        if manifest is not None:
+            manifest.put(path_string, file_id, dest, md5=md5, etag=version["etag"] if version else None)
 
     if expected_size is not None and _sizes_match(dest, expected_size):
         if verify_md5 and remote_md5_hex:
             try:
                 local_md5 = (compute_md5_buffered(dest) or "").lower()
                 if local_md5 == remote_md5_hex:
+                    record(local_md5)
+                    if store is not None:
+                        store.add(local_md5, dest)
                     return (path_string, file_id, True, "skipped_exists_verified")
                 dest.unlink(missing_ok=True)
             except Exception:
                 pass
         else:
+            record(remote_md5_hex)
             return (path_string, file_id, True, "skipped_exists")
 
-    try:
-        downloader = blob.download_blob(max_concurrency=per_blob_concurrency)
+    if (
+        store is not None
+        and remote_md5_hex
+        and expected_size is not None
+        and store.checkout(remote_md5_hex, dest, expected_size)
+    ):
+        record(remote_md5_hex)
+        return (path_string, file_id, True, "linked_from_store")
 
-        with open(tmp, "wb") as fh:
-            try:
-                downloader.readinto(fh)
-            except TypeError:
-                try:
-                    for chunk in downloader.chunks(chunk_size=chunk_size):
-                        fh.write(chunk)
-                except TypeError:
-                    for chunk in downloader.chunks():
-                        fh.write(chunk)
+    hash_inline = verify_md5 and bool(remote_md5_hex)
+    h, hashed = hashlib.md5(), 0
 
-        if verify_md5 and remote_md5_hex:
-            local_md5 = (compute_md5_buffered(tmp) or "").lower()
-            if local_md5 != remote_md5_hex:
-                try:
-                    tmp.unlink(missing_ok=True)
-                except Exception:
-                    pass
+    attempt = 0
+    while True:
+        try:
+            offset = _resume_offset(tmp, version)
+            if hash_inline and offset != hashed:
+                h, hashed = _md5_of_prefix(tmp, offset), offset
+
+            if (
+                RANGED_DOWNLOAD_SUPPORTED
+                and version is not None
+                and expected_size >= RANGED_DOWNLOAD_MIN_BYTES
+            ):
+                hashed = _download_ranged(
+                    blob, tmp, version, offset, h if hash_inline else None, per_blob_concurrency
+                )
+                break
+
+            if version is None:
+                downloader = blob.download_blob(max_concurrency=per_blob_concurrency)
+            elif offset < expected_size:
+                downloader = blob.download_blob(
+                    offset=offset,
+                    length=expected_size - offset,
+                    max_concurrency=per_blob_concurrency,
+                    etag=version["etag"],
+                    match_condition=MatchConditions.IfNotModified,
+                )
+            else:
+                downloader = None
+
+            with open(tmp, "r+b" if offset else "wb") as fh:
+                # Drop anything past the resume point, e.g. chunks a parallel
+                # readinto wrote ahead of a gap before it was interrupted.
+                fh.seek(offset)
+                fh.truncate()
+                if downloader is not None:
+                    part = _PartWriter(fh, offset, h if hash_inline else None)
+                    try:
+                        downloader.readinto(part)
+                    finally:
+                        hashed = part.hashed
+                        if version is not None:
+                            _save_part_state(tmp, version, part.committed)
+            break
+
+        except ResourceModifiedError:
+            # Replaced since we looked: drop the partial and start on the new content.
+            _discard_part(tmp)
+            expected_size, remote_md5_hex, version = _get_remote_state(blob)
+            hash_inline = verify_md5 and bool(remote_md5_hex)
+            h, hashed = hashlib.md5(), 0
+            if attempt >= DOWNLOAD_RETRIES:
+                return (path_string, file_id, False, "error:remote blob kept changing during download")
+            attempt += 1
+        except _RangedDownloadError as e:
+            hashed = e.committed
+            if attempt >= DOWNLOAD_RETRIES or not _is_transient(e.__cause__):
+                return (path_string, file_id, False, f"error:{e.__cause__!r}")
+            time.sleep(DOWNLOAD_BACKOFF_SECONDS * 2 ** attempt)
+            attempt += 1
+        except Exception as e:
+            if attempt >= DOWNLOAD_RETRIES or not _is_transient(e):
+                if version is None:
+                    _discard_part(tmp)
+                return (path_string, file_id, False, f"error:{e!r}")
+            time.sleep(DOWNLOAD_BACKOFF_SECONDS * 2 ** attempt)
+            attempt += 1
+
+    try:
+        if hash_inline:
+            if hashed != tmp.stat().st_size:
+                h = _md5_of_prefix(tmp, tmp.stat().st_size)
+            if h.hexdigest() != remote_md5_hex:
+                _discard_part(tmp)
                 return (path_string, file_id, False, "md5_mismatch")
 
-        os.replace(tmp, dest) 
-        return (path_string, file_id, True, "downloaded_verified" if (verify_md5 and remote_md5_hex) else "downloaded")
+        os.replace(tmp, dest)
+        _discard_part(tmp)
+        record(h.hexdigest() if hash_inline else remote_md5_hex)
+        if store is not None and hash_inline:
+            store.add(remote_md5_hex, dest)
+        return (path_string, file_id, True, "downloaded_verified" if hash_inline else "downloaded")
 
     except Exception as e:
-        try:
-            if tmp.exists():
-                tmp.unlink(missing_ok=True)
-        except Exception:
-            pass
+        _discard_part(tmp)
+        return (path_string, file_id, False, f"error:{e!r}")
+
+
+def _split_by_manifest(files: dict[str, str], base_dir: Path, manifest: DownloadManifest):
+    """Split {path: file_id} into files the manifest says are already in place and the rest."""
+    current, pending = {}, {}
+    for path_string, file_id in files.items():
+        if manifest.is_current(path_string, str(file_id), _safe_dest(base_dir, path_string)):
+            current[path_string] = file_id
+        else:
+            pending[path_string] = file_id
+    return current, pending
+
+
+def _group_by_file_id(files: dict[str, str]) -> tuple[dict[str, str], dict[str, list[str]]]:
+    """
+    Pick one path per file id to download.
+
+    Returns ({path: file_id} with the first path seen for each id,
+    {that path: [the other paths with the same id]}).
+    """
+    primaries, aliases, first_path = {}, {}, {}
+    for path_string, file_id in files.items():
+        fid = str(file_id)
+        if fid in first_path:
+            aliases.setdefault(first_path[fid], []).append(path_string)
+        else:
+            first_path[fid] = path_string
+            primaries[path_string] = file_id
+    return primaries, aliases
+
+
+def _link_duplicate(source_path: str, path_string: str, file_id: str, base_dir: Path,
+                    manifest: DownloadManifest | None = None) -> tuple[str, str, bool, str]:
+    """Materialise another path of an already downloaded file id from its first copy."""
+    source = _safe_dest(base_dir, source_path)
+    dest = _safe_dest(base_dir, path_string)
+    try:
+        _ensure_parent(dest)
+        if dest.exists() and os.path.samefile(source, dest):
+            note = "skipped_exists"
+        else:
+            place(source, dest, settings.THOA_STORE_LINK_MODE)
+            note = "linked_duplicate"
+        if manifest is not None:
+            source_entry = manifest.get(source_path) or {}
+            manifest.put(path_string, file_id, dest, md5=source_entry.get("md5"), etag=source_entry.get("etag"))
+        return (path_string, file_id, True, note)
+    except Exception as e:
         return (path_string, file_id, False, f"error:{e!r}")
 
 
+def _get_dataset(dataset_id: str) -> dict | None:
+    datasets = client.get(f"/datasets?public_id={dataset_id}")
+    return datasets[0] if datasets else None
+
+
+def _dataset_files(dataset_id: str) -> dict[str, str] | None:
+    """{path: file_id} for a dataset, or None if it does not exist."""
+    dataset = _get_dataset(dataset_id)
+    if dataset is None:
+        return None
+    return dataset.get("adjusted_context") or {}
+
+
+def _claim_download(dataset_id: str, dataset: dict) -> int | None:
+    """
+    Count one download against the dataset's quota.
+
+    Returns the downloads left afterwards, or None (and claims nothing) if
+    the quota is already used up.
+    """
+    remaining = dataset.get("remaining_downloads") or 0
+    if remaining <= 0:
+        return None
+    client.put(f"/datasets/{dataset_id}/decrement_downloads")
+    return remaining - 1
+
+
+def _resolve_dataset_path(files: dict[str, str], path: str) -> tuple[str, str]:
+    """
+    Find (path, file_id) in a dataset's file map.
+
+    `path` may be the stored path with or without its leading slash, a file
+    id, or a trailing part of one stored path (e.g. "sample.vcf.gz"). Raises
+    FileNotFoundError if nothing matches and ValueError if several do.
+    """
+    wanted = path.strip("/")
+    for key, file_id in files.items():
+        if key.strip("/") == wanted or str(file_id) == path:
+            return key, str(file_id)
+
+    matches = [key for key in files if key.strip("/").endswith("/" + wanted)]
+    if len(matches) == 1:
+        return matches[0], str(files[matches[0]])
+    if matches:
+        raise ValueError(f"'{path}' matches several files: " + ", ".join(sorted(matches)[:5]))
+    raise FileNotFoundError(path)
+
+
+def stream_dataset_file(dataset_id: str, path: str, out, verify_md5: bool = VERIFY_MD5,
+                        workers: int = PER_BLOB_CONCURRENCY) -> int:
+    """
+    Write one dataset file to the binary stream `out` without touching disk.
+
+    The blob is fetched by iter_ranges: `workers` parallel ranged GETs
+    pinned to its etag, reassembled in order with at most
+    STREAM_MAX_BUFFERED_BYTES held. With `verify_md5` the bytes are hashed
+    as they are written; since they have already been emitted, a mismatch
+    raises ValueError afterwards so the caller can exit non-zero. Returns
+    the number of bytes written.
+
+    Streaming counts as one download of the dataset, like `download_dataset`.
+    `out` is often stdout, so anything the API client prints (errors,
+    THOA_API_DEBUG dumps) is sent to stderr instead.
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        dataset = _get_dataset(dataset_id)
+        if dataset is None:
+            raise FileNotFoundError(f"dataset {dataset_id} not found")
+        key, file_id = _resolve_dataset_path(dataset.get("adjusted_context") or {}, path)
+        if _claim_download(dataset_id, dataset) is None:
+            raise PermissionError(f"dataset {dataset_id} has no remaining downloads")
+        link_info = _request_download_link(file_id)
+
+    sas_url = _extract_url(link_info)
+    if not sas_url:
+        raise PermissionError(f"could not get a download link for {key}")
+    blob = BlobClient.from_blob_url(sas_url)
+    size, remote_md5_hex, version = _get_remote_state(blob)
+    if size is None:
+        raise FileNotFoundError(key)
+
+    h = hashlib.md5() if verify_md5 and remote_md5_hex else None
+    written = 0
+    for chunk in iter_ranges(
+        blob, 0, size,
+        etag=version["etag"] if version else None,
+        workers=workers,
+        max_buffered_bytes=STREAM_MAX_BUFFERED_BYTES,
+    ):
+        out.write(chunk)
+        if h is not None:
+            h.update(chunk)
+        written += len(chunk)
+    out.flush()
+
+    if h is not None and h.hexdigest() != remote_md5_hex:
+        raise ValueError(f"MD5 mismatch for {key}: remote={remote_md5_hex} local={h.hexdigest()}")
+    return written
+
+
+def _request_download_link(file_id: str) -> dict | None:
+    try:
+        return client.post(f"/temporary_links/{file_id}/request-download")
+    except Exception:
+        return None
+
+
+def _with_download_links(files: dict[str, str], workers: int | None = None):
+    """
+    Yield (path_string, file_id, link_info) for every file as its link is minted.
+
+    Links are requested on `workers` threads (default THOA_API_CONCURRENCY),
+    once per distinct file id, and yielded in completion order so transfers
+    can start while the remaining links are still being minted. A failed
+    request yields link_info None, which _download_one reports as "no_url".
+    """
+    paths_by_file_id = {}
+    for path_string, file_id in files.items():
+        paths_by_file_id.setdefault(str(file_id), []).append(path_string)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers or settings.THOA_API_CONCURRENCY)) as pool:
+        futures = {pool.submit(_request_download_link, fid): fid for fid in paths_by_file_id}
+        try:
+            for fut in as_completed(futures):
+                fid = futures[fut]
+                link_info = fut.result()
+                for path_string in paths_by_file_id[fid]:
+                    yield path_string, fid, link_info
+        finally:
+            for fut in futures:
+                fut.cancel()
+
+
+def download_files(
+    downloads,
+    base_dir: Path,
+    verify_md5: bool = VERIFY_MD5,
+    workers: int = FILE_WORKERS,
+    manifest: DownloadManifest | None = None,
+    store: ContentStore | None = None,
+    aliases: dict[str, list[str]] | None = None,
+) -> tuple[Counter, list[tuple[str, str]]]:
+    """
+    Run _download_one for every (path_string, file_id, link_info) in `downloads`.
+
+    `downloads` may be a generator: each file is submitted to the pool as
+    soon as it is yielded. Completed files are recorded in `manifest`,
+    which is saved when the pool finishes, even if interrupted, as is
+    `store` (see _download_one).
+
+    `aliases` maps a downloaded path to other paths with the same file id
+    (see _group_by_file_id); once the download succeeds they are linked
+    from it instead of downloaded again, and fail with it otherwise.
+
+    Returns (outcome_counts, failures_details) with counts under "success",
+    "skipped", "cached", "linked" and "failed", and the bytes that linking
+    saved under "bytes_saved".
+    """
+    outcome_counts = Counter()
+    failures_details = []
+    aliases = aliases or {}
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {
+            pool.submit(
+                _download_one,
+                path_string,
+                str(file_id),
+                link_info,
+                base_dir,
+                verify_md5,
+                PER_BLOB_CONCURRENCY,
+                CHUNK_SIZE,
+                manifest,
+                store,
+            )
+            for path_string, file_id, link_info in downloads
+        }
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                path_string, file_id, ok, note = fut.result()
+
+                if ok:
+                    if str(note).startswith("skipped"):
+                        outcome_counts["skipped"] += 1
+                    elif note == "linked_from_store":
+                        outcome_counts["cached"] += 1
+                    elif note == "linked_duplicate":
+                        outcome_counts["linked"] += 1
+                        outcome_counts["bytes_saved"] += _safe_dest(base_dir, path_string).stat().st_size
+                    else:
+                        outcome_counts["success"] += 1
+                else:
+                    outcome_counts["failed"] += 1
+                    failures_details.append((path_string, note))
+
+                for alias in aliases.pop(path_string, ()):
+                    if ok:
+                        pending.add(pool.submit(_link_duplicate, path_string, alias, file_id, base_dir, manifest))
+                    else:
+                        outcome_counts["failed"] += 1
+                        failures_details.append((alias, note))
+
+    except KeyboardInterrupt:
+        console.print(
+            Panel(
+                "[red]Download interrupted by user (Ctrl+C)[/red]",
+                title="Aborted",
+                style="bold red",
+            )
+        )
+        pool.shutdown(cancel_futures=True)
+        raise
+    except Exception as e:
+        failures_details.append(("__executor__", f"error:{e!r}"))
+        outcome_counts["failed"] += 1
+    finally:
+        pool.shutdown(wait=True)
+        if manifest is not None:
+            manifest.save()
+        if store is not None:
+            store.save()
+
+    return outcome_counts, failures_details
+
 
 def download_dataset(
     dataset_id: UUID,
@@ -279,9 +841,9 @@ def download_dataset(
         spinner="dots12",
     ):
         try:
-            datasets = client.get(f"/datasets?public_id={dataset_id}")
-            
-            if not datasets:
+            dataset = _get_dataset(dataset_id)
+
+            if dataset is None:
                 console.print(
                     Panel(
                         f"[red]Dataset {dataset_id} not found.[/red]",
@@ -290,14 +852,12 @@ def download_dataset(
                     )
                 )
                 return
-            dataset = datasets[0]
-            downloads_remaining = dataset.get("remaining_downloads")
+            downloads_remaining = _claim_download(dataset_id, dataset)
 
-            if downloads_remaining > 0:
-                client.put(f"/datasets/{dataset_id}/decrement_downloads")
+            if downloads_remaining is not None:
                 console.print(
                     Panel(
-                        f"[green]Dataset {dataset_id} has {downloads_remaining - 1} downloads remaining.[/green]",
+                        f"[green]Dataset {dataset_id} has {downloads_remaining} downloads remaining.[/green]",
                         title="Download Count",
                         style="bold green",
                     )
@@ -346,9 +906,9 @@ def download_dataset(
                 console.print(
                     Panel(
                         "[red]Insufficient disk space.[/red]\n"
-                        f"Required (with headroom): [bold]{_fmt_bytes(required)}[/bold]\n"
-                        f"Available at target:       [bold]{_fmt_bytes(avail)}[/bold]\n"
-                        f"Short by:                  [bold]{_fmt_bytes(missing)}[/bold]\n\n"
+                        f"Required (with headroom): [bold]{format_bytes(required)}[/bold]\n"
+                        f"Available at target:       [bold]{format_bytes(avail)}[/bold]\n"
+                        f"Short by:                  [bold]{format_bytes(missing)}[/bold]\n\n"
                         "Free up space or choose another destination and try again.",
                         title="Disk Space Check",
                         style="bold red",
@@ -359,15 +919,6 @@ def download_dataset(
             base_dir = target.resolve()
             base_dir.mkdir(parents=True, exist_ok=True)
 
-            download_links = {}
-            for path_string, file_id in files.items():
-                fid = str(file_id)
-                if fid in download_links:
-                    continue
-                download_links[fid] = client.post(
-                    f"/temporary_links/{file_id}/request-download"
-                )
-
         except Exception as e:
             console.print(
                 Panel(
@@ -379,72 +930,154 @@ def download_dataset(
             return
 
     total = len(files)
-    outcome_counts = Counter()
-    failures_details = []
+    manifest = DownloadManifest.load(base_dir)
+    current, files = _split_by_manifest(files, base_dir, manifest)
+    remaining = len(files)
+    files, aliases = _group_by_file_id(files)
 
     with console.status(
-        f"[bold green]Downloading {total} files to {destination_path} (~{dgb} GiB) ...[/bold green]",
+        f"[bold green]Downloading {remaining} of {total} files to {destination_path} (~{dgb} GiB) ...[/bold green]",
         spinner="dots12",
     ):
-        pool = ThreadPoolExecutor(max_workers=FILE_WORKERS)
+        outcome_counts, failures_details = download_files(
+            _with_download_links(files),
+            base_dir,
+            verify_md5=verify_md5,
+            manifest=manifest,
+            store=ContentStore.from_settings(),
+            aliases=aliases,
+        )
+    outcome_counts["skipped"] += len(current)
+
+    _print_download_summary(outcome_counts, failures_details)
+
+
+def _print_download_summary(outcome_counts: Counter, failures_details: list[tuple[str, str]]):
+    if failures_details:
+        for p, note in failures_details:
+            console.print(
+                Panel(f"[red]{note}[/red]\n{p}", title="File failed", style="bold red")
+            )
+
+    parts = [
+        f"Success: [green]{outcome_counts.get('success', 0)}[/green]",
+        f"Skipped(existing): [yellow]{outcome_counts.get('skipped', 0)}[/yellow]",
+    ]
+    if outcome_counts.get("cached"):
+        parts.append(f"From store: [cyan]{outcome_counts['cached']}[/cyan]")
+    if outcome_counts.get("linked"):
+        parts.append(
+            f"Linked duplicates: [cyan]{outcome_counts['linked']}[/cyan] "
+            f"({format_bytes(outcome_counts['bytes_saved'])} saved)"
+        )
+    parts.append(f"Failed: [red]{outcome_counts.get('failed', 0)}[/red]")
+
+    console.print(Panel("  •  ".join(parts), title="Download Summary", style="bold"))
+
+
+def _output_path_string(client_path: str, remote_root: str | None) -> str:
+    """Path of a job output relative to the job's output directory, if it lies under it."""
+    if remote_root:
         try:
-            futures = [
-                pool.submit(
-                    _download_one,
-                    path_string,
-                    str(file_id),
-                    download_links.get(str(file_id)),
-                    base_dir,
-                    verify_md5,
-                    PER_BLOB_CONCURRENCY,
-                    CHUNK_SIZE,
-                )
-                for path_string, file_id in files.items()
-            ]
+            return PurePath(client_path).relative_to(PurePath(remote_root)).as_posix()
+        except ValueError:
+            pass
+    return client_path
 
-            for fut in as_completed(futures):
-                path_string, file_id, ok, note = fut.result()
 
-                if ok:
-                    if str(note).startswith("skipped"):
-                        outcome_counts["skipped"] += 1
-                    else:
-                        outcome_counts["success"] += 1
-                else:
-                    outcome_counts["failed"] += 1
-                    failures_details.append((path_string, note))
+def _absolute_output_root(remote_root: str | None, working_directory: str | None) -> str | None:
+    """A relative output directory (e.g. the default "-o ./") taken against the job's working directory."""
+    if remote_root and working_directory and not PurePath(remote_root).is_absolute():
+        return os.path.normpath(os.path.join(working_directory, remote_root))
+    return remote_root
+
 
-        except KeyboardInterrupt:
+def _job_output_downloads(output_links: list[dict] | None, remote_root: str | None = None):
+    """
+    Yield (path_string, file_id, link_info) for "download_outputs" links.
+
+    Output links already carry their SAS URL, so no extra requests are made;
+    each file lands at its path below `remote_root` (the job's output
+    directory) relative to the download directory.
+    """
+    for link in output_links or []:
+        client_path = link.get("client_path")
+        if not client_path:
+            continue
+        file_id = link.get("file_public_id") or link.get("public_id") or client_path
+        yield _output_path_string(client_path, remote_root), str(file_id), link
+
+
+def download_job_outputs(
+    job_id: str,
+    destination_path: str | Path | None = None,
+    remote_root: str | None = None,
+    verify_md5: bool = VERIFY_MD5,
+) -> bool:
+    """
+    Download a job's output dataset with the same engine as download_dataset.
+
+    Files already present with the right size (and MD5, when verifying) are
+    skipped, transient failures are retried and interrupted files resume.
+    `destination_path` and `remote_root` default to the job's recorded
+    download and output directories. Returns True if nothing failed.
+    """
+    with console.status(
+        f"[bold green]Preparing outputs of job [/bold green][bold cyan]{job_id}[/bold cyan][bold green] ...[/bold green]",
+        spinner="dots12",
+    ):
+        jobs = client.get(f"/jobs?public_id={job_id}")
+        if not jobs:
+            console.print(Panel(f"[red]Job {job_id} not found.[/red]", title="Error", style="bold red"))
+            return False
+        job = jobs[0]
+
+        output_dataset_id = job.get("output_dataset_public_id")
+        if not output_dataset_id:
             console.print(
-                Panel(
-                    "[red]Download interrupted by user (Ctrl+C)[/red]",
-                    title="Aborted",
-                    style="bold red",
-                )
+                Panel(f"[yellow]Job {job_id} has no output dataset yet.[/yellow]", title="Notice", style="bold")
             )
-            pool.shutdown(cancel_futures=True)
-            raise
-        except Exception as e:
-            failures_details.append(("__executor__", f"error:{e!r}"))
-            outcome_counts["failed"] += 1
-        finally:
-            pool.shutdown(wait=True)
+            return False
+
+        if destination_path is None:
+            recorded = job.get("download_directory")
+            destination_path = recorded if recorded and recorded != "None" else "."
+        if remote_root is None:
+            remote_root = job.get("output_directory")
+        remote_root = _absolute_output_root(
+            str(remote_root) if remote_root else None, job.get("current_working_directory")
+        )
 
-    if failures_details:
-        for p, note in failures_details:
+        output_links = client.get(
+            "/temporary_links",
+            params={
+                "dataset_public_id": output_dataset_id,
+                "job_public_id": job_id,
+                "link_type": "download_outputs",
+            },
+        )
+        if output_links is None:
             console.print(
-                Panel(f"[red]{note}[/red]\n{p}", title="File failed", style="bold red")
+                Panel(f"[red]Could not fetch download links for job {job_id}.[/red]", title="Error", style="bold red")
             )
+            return False
+
+        base_dir = Path(destination_path).expanduser().resolve()
+        base_dir.mkdir(parents=True, exist_ok=True)
 
-    console.print(
-        Panel(
-            f"Success: [green]{outcome_counts.get('success', 0)}[/green]  •  "
-            f"Skipped(existing): [yellow]{outcome_counts.get('skipped', 0)}[/yellow]  •  "
-            f"Failed: [red]{outcome_counts.get('failed', 0)}[/red]",
-            title="Download Summary",
-            style="bold",
+    with console.status(
+        f"[bold green]Downloading {len(output_links)} output files to {destination_path} ...[/bold green]",
+        spinner="dots12",
+    ):
+        outcome_counts, failures_details = download_files(
+            _job_output_downloads(output_links, remote_root),
+            base_dir,
+            verify_md5=verify_md5,
+            store=ContentStore.from_settings(),
         )
-    )
+
+    _print_download_summary(outcome_counts, failures_details)
+    return not failures_details
 
 def list_datasets(n: int = None, sort_by: str = "created", ascending: bool = True):
     """
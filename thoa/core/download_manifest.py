@@ -0,0 +1,86 @@
+import os
+import threading
+from pathlib import Path
+
+from thoa.core.json_store import read_versioned_json, write_json_atomic
+
+DOWNLOAD_MANIFEST_FILENAME = ".thoa-manifest.json"
+DOWNLOAD_MANIFEST_VERSION = 1
+
+
+class DownloadManifest:
+    """
+    Record of the files a download has completed in one destination directory.
+
+    Entries are keyed by the dataset path and hold the file id, size, MD5 and
+    etag of the blob that was written, plus the size and mtime_ns the local
+    file had right after it was written. A later download into the same
+    directory trusts an entry only while the file id is unchanged and the
+    local file still has that size and mtime, so it can skip the file without
+    minting a link or asking storage for its properties.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, base_dir: Path) -> "DownloadManifest":
+        manifest = cls(Path(base_dir) / DOWNLOAD_MANIFEST_FILENAME)
+        manifest._entries = manifest._read_entries()
+        return manifest
+
+    def _read_entries(self) -> dict[str, dict]:
+        return read_versioned_json(self.path, DOWNLOAD_MANIFEST_VERSION)
+
+    def get(self, path_string: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(path_string)
+            return dict(entry) if entry else None
+
+    def is_current(self, path_string: str, file_id: str, dest: Path) -> bool:
+        """True if `dest` is still the file recorded for `path_string` and `file_id`."""
+        entry = self.get(path_string)
+        if not entry or entry.get("file_id") != str(file_id):
+            return False
+        try:
+            st = os.stat(dest)
+        except OSError:
+            return False
+        return st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+    def put(self, path_string: str, file_id: str, dest: Path, md5: str | None = None, etag: str | None = None) -> None:
+        """Record that `dest` now holds the blob for `file_id`."""
+        try:
+            st = os.stat(dest)
+        except OSError:
+            return
+        with self._lock:
+            self._entries[path_string] = {
+                "file_id": str(file_id),
+                "size": st.st_size,
+                "md5": md5,
+                "etag": etag,
+                "mtime_ns": st.st_mtime_ns,
+            }
+            self._dirty = True
+
+    def discard(self, path_string: str) -> None:
+        with self._lock:
+            if self._entries.pop(path_string, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write the manifest atomically; failures are ignored like the other caches."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": DOWNLOAD_MANIFEST_VERSION, "entries": dict(self._entries)}
+            self._dirty = False
+
+        write_json_atomic(self.path, payload)
+
+    def __len__(self) -> int:
+        return len(self._entries)
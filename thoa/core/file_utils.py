@@ -0,0 +1,177 @@
+import os
+import stat
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+
+class FileRecord(NamedTuple):
+    """Everything a submission needs to know about one input file, from a single stat."""
+    path: Path
+    size: int
+    mtime_ns: int
+    ino: int
+    dev: int
+
+    @classmethod
+    def from_stat(cls, path: Path, st: os.stat_result) -> "FileRecord":
+        return cls(path, st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev)
+
+    @classmethod
+    def from_path(cls, path: Path, follow_symlinks: bool = True) -> "FileRecord":
+        return cls.from_stat(path, os.stat(path, follow_symlinks=follow_symlinks))
+
+
+def scan_files(paths, follow_symlinks=True) -> list[FileRecord]:
+    """
+    Walk files and directories once with os.scandir and return one FileRecord per file.
+
+    Each file is stat'ed exactly once and duplicate paths collapse. A
+    directory reached through several paths (e.g. two symlinks to it) is
+    walked under each of them, so every path is returned; only a directory
+    that is its own ancestor (a symlink loop) is skipped. Shared content is
+    merged later by inode (collapse_hardlinks) and MD5.
+    """
+    records = []
+    seen_paths = set()
+    walked_dirs = set()
+
+    def add_file(path: Path, st: os.stat_result):
+        if path in seen_paths:
+            return
+        seen_paths.add(path)
+        records.append(FileRecord.from_stat(path, st))
+
+    # Walk inputs in the order given; within a directory, entries are sorted
+    # so the resulting record list is deterministic.
+    # Each directory is pushed with the (st_dev, st_ino) of the directories
+    # above it, which is all a loop check needs.
+    stack = [(Path(os.path.abspath(p)), frozenset()) for p in reversed(list(paths))]
+
+    while stack:
+        path, ancestors = stack.pop()
+
+        try:
+            if path.is_symlink() and not follow_symlinks:
+                continue
+            st = os.stat(path)
+        except (FileNotFoundError, PermissionError):
+            continue
+
+        if stat.S_ISDIR(st.st_mode):
+            key = (st.st_dev, st.st_ino)
+            if key in ancestors or path in walked_dirs:
+                continue
+            walked_dirs.add(path)
+            ancestors = ancestors | {key}
+
+            subdirs = []
+            try:
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except (FileNotFoundError, PermissionError):
+                continue
+
+            for entry in entries:
+                try:
+                    if entry.is_symlink() and not follow_symlinks:
+                        continue
+                    if entry.is_dir(follow_symlinks=follow_symlinks):
+                        subdirs.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=follow_symlinks):
+                        add_file(Path(entry.path), entry.stat(follow_symlinks=follow_symlinks))
+                except (FileNotFoundError, PermissionError):
+                    pass
+
+            stack.extend((subdir, ancestors) for subdir in reversed(subdirs))
+
+        elif stat.S_ISREG(st.st_mode):
+            add_file(path, st)
+
+    return records
+
+
+def collapse_hardlinks(records):
+    """
+    Keep the first record for each (dev, inode) and map the other paths onto it.
+
+    Hardlinks and symlinked copies of one file share an inode, so only one of
+    them needs to be read. Items that are not FileRecords, or whose inode is
+    unknown, are always kept. Returns (unique, {alias_path: kept_path}).
+    """
+    unique = []
+    aliases = {}
+    kept = {}
+    for record in records:
+        if not isinstance(record, FileRecord) or record.ino <= 0:
+            unique.append(record)
+            continue
+        first = kept.setdefault((record.dev, record.ino), record)
+        if first is record:
+            unique.append(record)
+        else:
+            aliases[record.path] = first.path
+    return unique, aliases
+
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+
+
+def _mount_source(dev: int, mountinfo_path: str = MOUNTINFO_PATH) -> str | None:
+    """The mount source (e.g. "/dev/nvme0n1p2") /proc/self/mountinfo lists for `dev`."""
+    wanted = f"{os.major(dev)}:{os.minor(dev)}"
+    try:
+        with open(mountinfo_path, "r", encoding="utf-8") as fh:
+            lines = fh.readlines()
+    except OSError:
+        return None
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 3 or fields[2] != wanted:
+            continue
+        try:
+            # Optional fields end with a lone "-", followed by fstype and source.
+            sep = fields.index("-", 6)
+        except ValueError:
+            continue
+        if len(fields) > sep + 2:
+            return fields[sep + 2]
+    return None
+
+
+@lru_cache(maxsize=None)
+def device_is_rotational(dev: int) -> bool | None:
+    """
+    Return True for spinning disks, False for SSD/NVMe, None when unknown.
+
+    Reads /sys/dev/block/<major>:<minor>/queue/rotational, falling back to the
+    parent device for partitions. Filesystems with an anonymous device
+    (major 0, e.g. btrfs subvolumes) are traced to their mount source through
+    /proc/self/mountinfo; network and virtual ones (tmpfs, overlayfs, NFS)
+    have no block device behind them and report None.
+    """
+    major, minor = os.major(dev), os.minor(dev)
+    if major == 0:
+        source = _mount_source(dev)
+        try:
+            st = os.stat(source) if source else None
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISBLK(st.st_mode):
+            return None
+        major, minor = os.major(st.st_rdev), os.minor(st.st_rdev)
+    base = Path(f"/sys/dev/block/{major}:{minor}")
+    for candidate in (base / "queue" / "rotational", base / ".." / "queue" / "rotational"):
+        try:
+            return candidate.read_text().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def format_bytes(n: int) -> str:
+    """Human-readable size in binary units, e.g. "1.50 GiB"."""
+    for unit in ["B", "KiB", "MiB", "GiB", "TiB", "PiB"]:
+        if n < 1024 or unit == "PiB":
+            return f"{n:.2f} {unit}"
+        n /= 1024
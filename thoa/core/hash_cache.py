@@ -0,0 +1,111 @@
+import threading
+import time
+from pathlib import Path
+
+from thoa.config import settings
+from thoa.core.file_utils import FileRecord
+from thoa.core.json_store import read_versioned_json, write_json_atomic
+
+HASH_CACHE_FILENAME = "hash_cache.json"
+HASH_CACHE_VERSION = 1
+HASH_CACHE_MAX_AGE_SECONDS = 30 * 24 * 3600
+HASH_CACHE_MAX_ENTRIES = 500_000
+
+# Files modified this recently may still change within the same mtime tick,
+# so their digest is not trusted for the next run.
+RACY_MTIME_WINDOW_NS = 2 * 1_000_000_000
+
+
+def default_cache_dir() -> Path:
+    return Path(settings.THOA_CACHE_DIR).expanduser()
+
+
+class HashCache:
+    """
+    On-disk MD5 cache keyed by file identity.
+
+    Entries are keyed by "<st_dev>:<st_ino>" and only trusted when the current
+    size and mtime_ns still match what was recorded at hashing time.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._removed: set[str] = set()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, cache_dir: Path | None = None) -> "HashCache":
+        cache = cls(Path(cache_dir or default_cache_dir()) / HASH_CACHE_FILENAME)
+        cache._entries = cache._read_entries()
+        return cache
+
+    def _read_entries(self) -> dict[str, list]:
+        return read_versioned_json(self.path, HASH_CACHE_VERSION)
+
+    @staticmethod
+    def _key(record: FileRecord) -> str:
+        return f"{record.dev}:{record.ino}"
+
+    def get(self, record: FileRecord) -> str | None:
+        """Return the cached MD5 for a file, or None if missing or stale."""
+        key = self._key(record)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            size, mtime_ns, md5, _ = entry
+            if size != record.size or mtime_ns != record.mtime_ns:
+                # Same inode, different content: drop it right away.
+                del self._entries[key]
+                self._removed.add(key)
+                self._dirty = True
+                self.misses += 1
+                return None
+
+            entry[3] = int(time.time())
+            self._dirty = True
+            self.hits += 1
+            return md5
+
+    def put(self, record: FileRecord, md5: str) -> None:
+        """Record the MD5 computed for the file described by `record`."""
+        if time.time_ns() - record.mtime_ns < RACY_MTIME_WINDOW_NS:
+            return
+        with self._lock:
+            key = self._key(record)
+            self._entries[key] = [record.size, record.mtime_ns, md5, int(time.time())]
+            self._removed.discard(key)
+            self._dirty = True
+
+    def _evict(self, entries: dict[str, list]) -> dict[str, list]:
+        cutoff = int(time.time()) - HASH_CACHE_MAX_AGE_SECONDS
+        fresh = {k: v for k, v in entries.items() if v[3] >= cutoff}
+        if len(fresh) > HASH_CACHE_MAX_ENTRIES:
+            newest = sorted(fresh.items(), key=lambda kv: kv[1][3], reverse=True)
+            fresh = dict(newest[:HASH_CACHE_MAX_ENTRIES])
+        return fresh
+
+    def save(self) -> None:
+        """Merge with the on-disk copy, evict stale entries and write atomically."""
+        with self._lock:
+            if not self._dirty:
+                return
+            merged = self._read_entries()
+            for key in self._removed:
+                merged.pop(key, None)
+            merged.update(self._entries)
+            self._entries = self._evict(merged)
+            payload = {"version": HASH_CACHE_VERSION, "entries": dict(self._entries)}
+            self._removed.clear()
+            self._dirty = False
+
+        write_json_atomic(self.path, payload)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -12,17 +12,32 @@ from rich.spinner import Spinner
 from rich import box
 from thoa.core import resolve_environment_spec
 from concurrent.futures import ThreadPoolExecutor
-from threading import Thread
+from threading import Thread, Event, Lock, local
 from datetime import datetime
+from collections import Counter
+from contextlib import nullcontext
 
 import concurrent.futures
-from azure.storage.blob import BlobClient
+from azure.storage.blob import BlobClient, BlobBlock
 
 import time
+import queue
 import hashlib
 import mmap
 from pathlib import Path
 import os
+
+from thoa.config import settings
+from thoa.core.file_utils import FileRecord, scan_files, device_is_rotational, collapse_hardlinks
+from thoa.core.upload_journal import UploadJournal
+from thoa.core.shards import TarShard
+from thoa.core.transfer import (
+    TransferBudget,
+    TransferScheduler,
+    block_concurrency_for,
+    budget_connection,
+)
+
 max_threads = min(32, os.cpu_count() * 2) 
 
 console = Console(theme=Theme({
@@ -93,14 +108,7 @@ def validate_user_command(
 
 
 def collect_files(paths):
-    all_files = []
-    for path in paths:
-        path = Path(os.path.abspath(path))
-        if path.is_file():
-            all_files.append(path)
-        elif path.is_dir():
-            all_files.extend(path.rglob("*"))  # recursive
-    return [p for p in all_files if p.is_file()]  # filter out subdirs
+    return [record.path for record in scan_files(paths)]
 
 
 def compute_md5_buffered(path):
@@ -119,8 +127,79 @@ def compute_md5_mmap(path):
     return h.hexdigest()
 
 
-def choose_hash_strategy(path, mmap_threshold_bytes=10 * 1024 * 1024):
+HASH_READ_BUFFER_SIZE = 4 * 1024 * 1024
+HASH_DROP_WINDOW_BYTES = 64 * 1024 * 1024
+_hash_buffers = local()
+
+
+def _reusable_hash_buffer(size):
+    """One read buffer per hashing thread, reused across files."""
+    buf = getattr(_hash_buffers, "buf", None)
+    if buf is None or len(buf) != size:
+        buf = bytearray(size)
+        _hash_buffers.buf = buf
+    return buf
+
+
+def compute_md5_fadvise(path, buffer_size=HASH_READ_BUFFER_SIZE, drop_window=HASH_DROP_WINDOW_BYTES):
+    """
+    Hash a file without polluting the page cache.
+
+    Reads with readinto() into a reusable per-thread buffer (no per-chunk bytes
+    objects), hints the kernel with POSIX_FADV_SEQUENTIAL, and drops each
+    `drop_window` bytes from the page cache with POSIX_FADV_DONTNEED once it
+    has been hashed. Pages that were already cached before hashing are dropped
+    too, so prefer the other strategies for files another process just wrote.
+    Falls back to plain readinto() where posix_fadvise is unavailable.
+    """
+    h = hashlib.md5()
+    buf = _reusable_hash_buffer(buffer_size)
+    fadvise = getattr(os, "posix_fadvise", None)
+
+    with open(path, "rb", buffering=0) as f, memoryview(buf) as view:
+        fd = f.fileno()
+        if fadvise:
+            fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        offset = dropped = 0
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+            offset += n
+            if fadvise and offset - dropped >= drop_window:
+                fadvise(fd, dropped, offset - dropped, os.POSIX_FADV_DONTNEED)
+                dropped = offset
+
+        if fadvise and offset > dropped:
+            fadvise(fd, dropped, offset - dropped, os.POSIX_FADV_DONTNEED)
+
+    return h.hexdigest()
+
+
+HASH_STRATEGIES = ("auto", "mmap", "buffered", "fadvise")
+
+
+def choose_hash_strategy(path, mmap_threshold_bytes=10 * 1024 * 1024, strategy=None):
+    """
+    Return (path, md5) using the configured strategy, or (path, "ERROR: ...").
+
+    strategy is one of HASH_STRATEGIES and defaults to THOA_HASH_STRATEGY.
+    "auto" keeps the original behaviour: mmap at or above
+    `mmap_threshold_bytes`, buffered reads below it.
+    """
+    strategy = strategy or settings.THOA_HASH_STRATEGY
     try:
+        if strategy == "fadvise":
+            return path, compute_md5_fadvise(path)
+        if strategy == "mmap":
+            return path, compute_md5_mmap(path)
+        if strategy == "buffered":
+            return path, compute_md5_buffered(path)
+        if strategy != "auto":
+            raise ValueError(f"unknown hash strategy {strategy!r}; expected one of {', '.join(HASH_STRATEGIES)}")
+
         size = path.stat().st_size
         if size >= mmap_threshold_bytes:
             return path, compute_md5_mmap(path)
@@ -128,44 +207,303 @@ def choose_hash_strategy(path, mmap_threshold_bytes=10 * 1024 * 1024):
             return path, compute_md5_buffered(path)
     except Exception as e:
         return path, f"ERROR: {e}"
-    
 
-def hash_all(files, workers=max_threads):
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        results = executor.map(choose_hash_strategy, files)
-    return dict(results)
 
+def _hash_record(record):
+    path, md5 = choose_hash_strategy(record.path)
+    return record, md5
 
-def file_sizes_in_bytes(paths, follow_symlinks=True):
-    size_map = {}
-    stack = [p for p in paths]
 
-    while stack:
-        path = stack.pop()
+def _device_override_workers(overrides) -> dict[int, int]:
+    """Map THOA_HASH_DEVICE_WORKERS ({path: workers}) to {st_dev: workers}."""
+    by_dev = {}
+    for path, n in (overrides or {}).items():
+        try:
+            by_dev[os.stat(os.path.expanduser(path)).st_dev] = max(1, int(n))
+        except (OSError, ValueError):
+            continue
+    return by_dev
+
+
+def device_hash_workers(dev: int, workers: int = max_threads, overrides: dict[int, int] | None = None) -> int:
+    """Concurrency limit for hashing files that live on block device `dev`."""
+    if overrides and dev in overrides:
+        return min(workers, overrides[dev])
+    rotational = device_is_rotational(dev)
+    if rotational is True:
+        limit = settings.THOA_HASH_WORKERS_ROTATIONAL
+    elif rotational is False:
+        limit = settings.THOA_HASH_WORKERS_SSD
+    else:
+        limit = settings.THOA_HASH_WORKERS_UNKNOWN
+    return max(1, min(workers, limit))
+
+
+def _hash_device(records, n_workers, on_result):
+    """Hash one device's files largest-first with a bounded pool; return elapsed seconds."""
+    started = time.perf_counter()
+    ordered = sorted(records, key=lambda r: r.size, reverse=True)
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(_hash_record, record) for record in ordered]
+        try:
+            for fut in concurrent.futures.as_completed(futures):
+                on_result(*fut.result())
+        except BaseException:
+            for fut in futures:
+                fut.cancel()
+            raise
+    return time.perf_counter() - started
+
+
+def _hash_by_device(by_device, workers, on_result, stats):
+    """Drain each device's files with that device's concurrency limit."""
+    if not by_device:
+        return
+
+    overrides = _device_override_workers(settings.THOA_HASH_DEVICE_WORKERS)
+    limits = {dev: device_hash_workers(dev, workers, overrides) for dev in by_device}
+
+    # Devices are independent, so each one is drained concurrently by its own pool.
+    with ThreadPoolExecutor(max_workers=len(by_device)) as device_executor:
+        elapsed = dict(zip(
+            by_device,
+            device_executor.map(
+                lambda dev: _hash_device(by_device[dev], limits[dev], on_result),
+                by_device,
+            ),
+        ))
+
+    if stats is not None:
+        for dev, dev_records in by_device.items():
+            stats[dev] = {
+                "rotational": device_is_rotational(dev),
+                "workers": limits[dev],
+                "files": len(dev_records),
+                "bytes": sum(r.size for r in dev_records),
+                "seconds": elapsed[dev],
+            }
+
+
+def hash_all(files, workers=max_threads, cache=None, stats=None, on_hashed=None):
+    """
+    Hash all files in parallel, returning {path: md5}.
+
+    `files` may be paths or FileRecords from scan_files; records avoid another
+    stat per file. When a HashCache is given, files whose (dev, inode, size,
+    mtime_ns) match a cached entry are not read at all, and fresh digests are
+    written back.
+
+    Files are grouped by st_dev and each device gets its own concurrency limit
+    (see device_hash_workers), so spinning disks are read sequentially while
+    SSDs are read in parallel. Pass a dict as `stats` to receive per-device
+    throughput figures keyed by st_dev.
+
+    `on_hashed(record, md5)` is called for every file as soon as its digest is
+    known (cache hits first), from whichever thread produced it.
+    """
+    records = []
+    results = {}
 
+    for item in files:
+        if isinstance(item, FileRecord):
+            records.append(item)
+            continue
         try:
-            if path.is_symlink() and not follow_symlinks:
+            records.append(FileRecord.from_path(item))
+        except OSError as e:
+            records.append(FileRecord(item, -1, -1, -1, -1))
+            results[item] = f"ERROR: {e}"
+
+    by_device = {}
+    for record in records:
+        if record.path in results:
+            if on_hashed is not None:
+                on_hashed(record, results[record.path])
+            continue
+        md5 = cache.get(record) if cache is not None else None
+        if md5:
+            results[record.path] = md5
+            if on_hashed is not None:
+                on_hashed(record, md5)
+        else:
+            by_device.setdefault(record.dev, []).append(record)
+
+    def on_result(record, md5):
+        results[record.path] = md5
+        if on_hashed is not None:
+            on_hashed(record, md5)
+        if cache is not None and not md5.startswith("ERROR"):
+            try:
+                after = FileRecord.from_path(record.path)
+            except OSError:
+                return
+            # Only trust the digest if the file did not change while we read it.
+            if after == record:
+                cache.put(record, md5)
+
+    try:
+        _hash_by_device(by_device, workers, on_result, stats)
+    finally:
+        if cache is not None:
+            cache.save()
+
+    return {record.path: results[record.path] for record in records}
+
+
+def print_hash_stats(stats):
+    """Print per-device hashing throughput collected by hash_all."""
+    if not stats:
+        return
+
+    table = Table(title="Hashing Throughput", box=box.MINIMAL_DOUBLE_HEAD)
+    table.add_column("Device", style="cyan", no_wrap=True)
+    table.add_column("Type", style="magenta")
+    table.add_column("Workers", justify="right")
+    table.add_column("Files", justify="right")
+    table.add_column("Size (MB)", justify="right")
+    table.add_column("MB/s", style="green", justify="right")
+
+    kinds = {True: "hdd", False: "ssd", None: "unknown"}
+    for dev, row in stats.items():
+        mb = row["bytes"] / 1024 ** 2
+        rate = mb / row["seconds"] if row["seconds"] > 0 else 0.0
+        table.add_row(
+            f"{os.major(dev)}:{os.minor(dev)}",
+            kinds[row["rotational"]],
+            str(row["workers"]),
+            str(row["files"]),
+            f"{mb:.1f}",
+            f"{rate:.1f}",
+        )
+
+    console.print(table)
+
+
+REGISTER_QUEUE_SIZE = 256
+
+
+class RegistrationError(Exception):
+    """Raised by hash_and_register when one or more files could not be hashed or registered."""
+
+    def __init__(self, failures, registered, total):
+        self.failures = failures
+        self.registered = registered
+        self.total = total
+        super().__init__(f"{len(failures)} file(s) failed; {registered} of {total} registered")
+
+
+def _record_path(item):
+    return item.path if hasattr(item, "path") else item
+
+
+class _HashingAborted(Exception):
+    pass
+
+
+def hash_and_register(
+    records,
+    register,
+    cache=None,
+    workers=max_threads,
+    stats=None,
+    queue_size=REGISTER_QUEUE_SIZE,
+    register_workers=None,
+    hasher=None,
+):
+    """
+    Hash files and register each one the moment its digest is known.
+
+    `register(record, md5)` runs on `register_workers` consumer threads
+    (default THOA_API_CONCURRENCY) fed through a bounded queue, so
+    registration round trips overlap with each other and with hashing of the
+    remaining files, and hashing pauses if registration falls behind.
+
+    Fails fast: after the first hashing or registration error no new requests
+    are started and hashing is abandoned. In-flight requests finish, then a
+    RegistrationError listing every (path, reason) is raised.
+
+    `hasher(records, on_hashed)` replaces hash_all for items that are not
+    plain files, such as tar shards (see shards.hash_shards).
+
+    Identical inputs are registered once: paths sharing a (dev, inode) are
+    hashed once, and a path whose MD5 matches an earlier one reuses that
+    registration instead of making its own request.
+
+    Returns (hashes, registrations), both keyed by path and covering every
+    input path, duplicates included.
+    """
+    all_records = list(records)
+    records, same_inode = collapse_hardlinks(all_records)
+    register_workers = max(1, register_workers or settings.THOA_API_CONCURRENCY)
+    registrations = {}
+    failures = []
+    failed = Event()
+    pending = queue.Queue(maxsize=queue_size)
+    first_path_by_md5 = {}
+    same_content = {}
+    dedup_lock = Lock()
+
+    def consume():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            if failed.is_set():
                 continue
+            record, md5 = item
+            try:
+                registrations[record.path] = register(record, md5)
+            except Exception as e:
+                failures.append((record.path, str(e)))
+                failed.set()
+
+    def on_hashed(record, md5):
+        if md5.startswith("ERROR"):
+            failures.append((record.path, md5))
+            failed.set()
+        if failed.is_set():
+            raise _HashingAborted()
+        with dedup_lock:
+            first = first_path_by_md5.setdefault(md5, record.path)
+        if first != record.path:
+            same_content[record.path] = first
+            return
+        pending.put((record, md5))
 
-            if path.is_file():
-                size_map[path] = path.stat().st_size
-            elif path.is_dir():
-                with os.scandir(path) as entries:
-                    for entry in entries:
-                        try:
-                            entry_path = Path(entry.path)
-                            if entry.is_symlink() and not follow_symlinks:
-                                continue
-                            if entry.is_file(follow_symlinks=follow_symlinks):
-                                size_map[entry_path] = entry.stat(follow_symlinks=follow_symlinks).st_size
-                            elif entry.is_dir(follow_symlinks=follow_symlinks):
-                                stack.append(entry_path)
-                        except (FileNotFoundError, PermissionError):
-                            pass  
-        except (FileNotFoundError, PermissionError):
-            pass
+    consumers = [Thread(target=consume, daemon=True) for _ in range(register_workers)]
+    for consumer in consumers:
+        consumer.start()
+
+    hashes = {}
+    try:
+        if hasher is not None:
+            hashes = hasher(records, on_hashed)
+        else:
+            hashes = hash_all(records, workers=workers, cache=cache, stats=stats, on_hashed=on_hashed)
+    except _HashingAborted:
+        pass
+    finally:
+        for _ in consumers:
+            pending.put(None)
+        for consumer in consumers:
+            consumer.join()
+
+    if failures:
+        raise RegistrationError(failures, registered=len(registrations), total=len(records))
+
+    for path, first in same_content.items():
+        registrations[path] = registrations[first]
+    for path, kept in same_inode.items():
+        registrations[path] = registrations[kept]
+    hashes = {
+        _record_path(item): hashes[same_inode.get(_record_path(item), _record_path(item))]
+        for item in all_records
+    }
+    return hashes, registrations
 
-    return size_map
+
+def file_sizes_in_bytes(paths, follow_symlinks=True):
+    return {record.path: record.size for record in scan_files(paths, follow_symlinks=follow_symlinks)}
 
 
 def current_job_status(job_id: str):
@@ -180,84 +518,325 @@ def current_job_status(job_id: str):
     return response.get("status", "unknown")
 
 
-def all_files_have_upload_links(job_id, input_dataset_id, file_public_ids):
-    """Check if all files in the job have upload links."""
-    
-    links = api_client.get(
-        f"/temporary_links", 
-        params={
-            "job_public_id": job_id,
-            "dataset_public_id": input_dataset_id,
-            "link_type": "upload"
-        }
-    )
+LINK_POLL_INITIAL_INTERVAL = 0.25
+LINK_POLL_MAX_INTERVAL = 4.0
 
-    link_file_ids = {link['file_public_id'] for link in links}
-    return set(file_public_ids).issubset(set(link_file_ids))
 
+def iter_upload_links(
+    job_id,
+    input_dataset_id,
+    file_public_ids,
+    initial_interval=LINK_POLL_INITIAL_INTERVAL,
+    max_interval=LINK_POLL_MAX_INTERVAL,
+):
+    """
+    Yield upload links as the server creates them, until every file has one.
 
-def upload_file_sas(local_path: Path, sas_url: str, local_md5: str, max_concurrency: int = 4):
+    Callers can start uploading the first files while links for the rest are
+    still being minted. The first poll is immediate; after that the wait
+    starts at `initial_interval` and doubles up to `max_interval` while
+    nothing new appears. Any progress resets it, so small jobs are picked
+    up in well under a second without hammering the API during long waits.
+    """
+    remaining = set(file_public_ids)
+    interval = initial_interval
+
+    while remaining:
+        links = api_client.get(
+            f"/temporary_links",
+            params={
+                "job_public_id": job_id,
+                "dataset_public_id": input_dataset_id,
+                "link_type": "upload"
+            }
+        ) or []
+
+        progressed = False
+        for link in links:
+            if link["file_public_id"] in remaining:
+                remaining.discard(link["file_public_id"])
+                progressed = True
+                yield link
+
+        if remaining:
+            if progressed:
+                interval = initial_interval
+            time.sleep(interval)
+            interval = min(max_interval, interval * 2)
+
+
+UPLOAD_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def _block_id(index: int) -> str:
+    # Azure requires every block id of a blob to have the same length.
+    return f"{index:08d}"
+
+
+def upload_file_streaming(
+    local_path: Path,
+    sas_url: str,
+    local_md5: str | None = None,
+    max_concurrency: int = 4,
+    block_size: int = UPLOAD_BLOCK_SIZE,
+    budget: TransferBudget | None = None,
+    resume: bool = True,
+):
+    """
+    Upload a file with a single sequential read, returning its MD5.
+
+    Every block read from disk feeds the whole-file MD5 and is staged with its
+    own block MD5 computed from the same buffer, so the SDK does not hash it
+    again. At most `max_concurrency` blocks are in flight. The block list is
+    committed together with the final md5 metadata, so the blob only becomes
+    visible once it is complete. If `local_md5` is given and the file no longer
+    matches it, nothing is committed.
+
+    With a TransferBudget, each block holds `block_size` bytes of the global
+    in-flight budget from read until staged, and every request takes one of
+    the global connections.
+
+    When `local_md5` is known and `resume` is set, every staged block is
+    recorded in an UploadJournal. A rerun after an interruption asks the
+    service for the blob's uncommitted blocks and skips each block that is
+    both journaled and still staged with the same size and MD5, so only the
+    missing blocks go over the wire. Block ids are deterministic per index,
+    which is what makes the staged blocks reusable.
+    """
+
+    def stage(block_id, data):
+        try:
+            digest = hashlib.md5(data).digest()
+            with budget_connection(budget):
+                blob_client.stage_block(
+                    block_id,
+                    data,
+                    length=len(data),
+                    transactional_content_md5=digest,
+                )
+            if journal is not None:
+                journal.record(block_id, digest.hex())
+        finally:
+            if budget is not None:
+                budget.release_bytes(block_size)
+
+    def already_staged(block_id, data):
+        return (
+            staged_sizes.get(block_id) == len(data)
+            and journal.staged.get(block_id) == hashlib.md5(data).hexdigest()
+        )
+
+    journal = None
+    try:
+        blob_client = BlobClient.from_blob_url(sas_url)
+        h = hashlib.md5()
+        block_list = []
+        staged_sizes = {}
+        resumed = 0
+
+        if local_md5 and resume:
+            journal = UploadJournal.open(sas_url, local_md5, block_size)
+            if journal.staged:
+                try:
+                    with budget_connection(budget):
+                        _, uncommitted = blob_client.get_block_list("uncommitted")
+                    staged_sizes = {block.id: block.size for block in uncommitted}
+                except Exception:
+                    staged_sizes = {}
+
+        with local_path.open("rb") as f, ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            inflight = set()
+            while True:
+                if budget is not None:
+                    budget.acquire_bytes(block_size)
+                data = f.read(block_size)
+                if not data:
+                    if budget is not None:
+                        budget.release_bytes(block_size)
+                    break
+                h.update(data)
+                block_id = _block_id(len(block_list))
+                block_list.append(BlobBlock(block_id=block_id))
+                if staged_sizes and already_staged(block_id, data):
+                    resumed += 1
+                    if budget is not None:
+                        budget.release_bytes(block_size)
+                    continue
+                inflight.add(pool.submit(stage, block_id, data))
+                if len(inflight) >= max_concurrency:
+                    done, inflight = concurrent.futures.wait(inflight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for fut in done:
+                        fut.result()
+            for fut in concurrent.futures.as_completed(inflight):
+                fut.result()
+
+        md5 = h.hexdigest()
+        if local_md5 and md5 != local_md5:
+            raise ValueError(f"file changed since it was hashed (expected {local_md5}, read {md5})")
+
+        with budget_connection(budget):
+            blob_client.commit_block_list(block_list, metadata={"md5": md5, "upload": "complete"})
+        if journal is not None:
+            journal.discard()
+
+        if resumed:
+            print(f"[RESUME] {local_path.name}: reused {resumed} of {len(block_list)} staged blocks")
+        print(f"[SUCCESS] Uploaded {local_path.name} to Thoa")
+        return md5
+    except Exception as e:
+        print(f"[ERROR] Failed to upload {local_path.name}: {e}")
+        raise
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+SINGLE_PUT_MAX_BYTES = 4 * 1024 * 1024
+
+
+def upload_file_sas(
+    local_path: Path,
+    sas_url: str,
+    local_md5: str,
+    max_concurrency: int = 4,
+    budget: TransferBudget | None = None,
+):
     """
     Upload a file to Azure Blob Storage using a pre-signed SAS URL.
-    Uses parallel uploads for large files.
+
+    The blob is written together with its final metadata ({"md5", "upload":
+    "complete"}) in a single atomic request, so no follow-up metadata round
+    trips are needed: files up to SINGLE_PUT_MAX_BYTES go up as one Put Blob,
+    larger ones are staged block by block and committed with the metadata
+    (see upload_file_streaming). A blob is therefore never visible without its
+    "complete" marker, which is what blob_exists_with_same_md5 relies on.
     """
 
+    size = local_path.stat().st_size
+    # Tar shards are always streamed: the block path re-checks the MD5 before commit.
+    if size > SINGLE_PUT_MAX_BYTES or isinstance(local_path, TarShard):
+        return upload_file_streaming(local_path, sas_url, local_md5, max_concurrency=max_concurrency, budget=budget)
+
     try:
         blob_client = BlobClient.from_blob_url(sas_url)
 
-        with open(local_path, "rb") as data:
+        with open(local_path, "rb") as data, (budget.reserve(size) if budget is not None else nullcontext()):
             blob_client.upload_blob(
                 data,
+                length=size,
                 overwrite=True,
-                max_concurrency=max_concurrency,
                 metadata={
                     "md5": local_md5,
-                    "upload": "incomplete"
+                    "upload": "complete"
                 },
                 validate_content=True
             )
 
-        # Retrieve existing metadata
-        props = blob_client.get_blob_properties()
-        metadata = props.metadata or {}
-
-        metadata["upload"] = "complete"
-
-        # Apply updated metadata
-        blob_client.set_blob_metadata(metadata)
-
-        # print(f"[SUCCESS] Uploaded {local_path.name} to {blob_client.blob_name}")
         print(f"[SUCCESS] Uploaded {local_path.name} to Thoa")
+        return local_md5
     except Exception as e:
         print(f"[ERROR] Failed to upload {local_path.name}: {e}")
         raise
 
 
-def upload_all(upload_links, local_file_map, all_md5s, max_workers=4):
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = []
+def _upload_one(link, local_path: Path, local_md5: str, budget: TransferBudget | None = None, prepare=None):
+    """
+    Worker body for upload_all: prepare hook, existence check, then upload.
 
-        for link in upload_links:
-            file_id = link["file_public_id"]
-            local_path = Path(local_file_map.get(file_id))
-            local_md5 = all_md5s.get(file_id)
+    Returns (outcome, bytes, reason); reason is None unless the file failed.
+    """
+    try:
+        size = local_path.stat().st_size
+    except OSError:
+        print(f"[WARN] File missing: {link['file_public_id']} -> {local_path}")
+        return "missing", 0, f"local file missing: {local_path}"
 
-            if not local_path.exists():
-                print(f"[WARN] File missing: {file_id} -> {local_path}")
-                continue
+    if prepare is not None:
+        try:
+            prepare(link)
+        except Exception as e:
+            print(f"[ERROR] Failed to prepare upload of {local_path.name}: {e}")
+            return "failed", size, str(e)
+
+    # Skip upload if hash already matches
+    with budget_connection(budget):
+        exists = blob_exists_with_same_md5(link["url"], local_md5, local_path)
+    if exists:
+        print(f"[SKIP] {local_path.name} already uploaded with matching MD5")
+        return "skipped", size, None
 
-            # Skip upload if hash already matches
-            if blob_exists_with_same_md5(link["url"], local_md5, local_path):
-                print(f"[SKIP] {local_path.name} already uploaded with matching MD5")
-                continue
+    try:
+        upload_file_sas(
+            local_path,
+            link["url"],
+            local_md5,
+            max_concurrency=block_concurrency_for(size),
+            budget=budget,
+        )
+    except Exception as e:
+        return "failed", size, str(e)
+    return "uploaded", size, None
 
-            futures.append(executor.submit(upload_file_sas, local_path, link["url"], local_md5))
 
-        for future in concurrent.futures.as_completed(futures):
+def upload_all(upload_links, local_file_map, all_md5s, max_workers=None, prepare=None, failures=None):
+    """
+    Upload every linked file, skipping blobs that already hold the same MD5.
+
+    `upload_links` may be any iterable, including a generator that yields links
+    as they become available; uploads start as soon as each link is consumed.
+    The remote existence check runs inside the workers, so HEAD requests for
+    different files overlap with each other and with uploads.
+
+    Files go through a TransferScheduler: small files (single-put size) get
+    their own FIFO lane of THOA_UPLOAD_SMALL_FILE_WORKERS, larger files run
+    largest-first on `max_workers` (default THOA_UPLOAD_LARGE_FILE_WORKERS)
+    with block concurrency scaled to their size. Every request shares one
+    TransferBudget capping connections and in-flight bytes.
+
+    `local_file_map` values are local paths, or TarShards streamed from
+    their member files.
+
+    `prepare(link)` runs in the worker right before a file is checked and
+    uploaded, so per-link API calls (such as recording the client path)
+    proceed concurrently with each other and with transfers. If it raises,
+    that file is not uploaded and counts as failed. Pass a list as
+    `failures` to receive every (file_public_id, reason).
+
+    Returns a Counter with file counts per outcome ("uploaded", "skipped",
+    "missing", "failed") and byte totals under "<outcome>_bytes".
+    """
+    summary = Counter()
+    budget = TransferBudget.from_settings()
+    scheduler = TransferScheduler(
+        small_threshold=SINGLE_PUT_MAX_BYTES,
+        small_workers=settings.THOA_UPLOAD_SMALL_FILE_WORKERS,
+        large_workers=max_workers or settings.THOA_UPLOAD_LARGE_FILE_WORKERS,
+    )
+
+    with scheduler:
+        futures = []
+
+        for link in upload_links:
+            file_id = link["file_public_id"]
+            local_path = local_file_map.get(file_id)
+            if not isinstance(local_path, TarShard):
+                local_path = Path(local_path)
+            local_md5 = all_md5s.get(file_id)
             try:
-                future.result()
-            except Exception:
-                pass 
+                size = local_path.stat().st_size
+            except OSError:
+                size = 0
+            future = scheduler.submit(size, _upload_one, link, local_path, local_md5, budget, prepare)
+            futures.append((file_id, future))
+
+        for file_id, future in futures:
+            outcome, size, reason = future.result()
+            summary[outcome] += 1
+            summary[f"{outcome}_bytes"] += size
+            if reason is not None and failures is not None:
+                failures.append((file_id, reason))
+
+    return summary
 
 
 def blob_exists_with_same_md5(sas_url: str, local_md5: str, local_path: Path | None = None) -> bool:
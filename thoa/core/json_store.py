@@ -0,0 +1,39 @@
+import json
+import os
+from pathlib import Path
+
+
+def read_versioned_json(path: Path, version: int) -> dict:
+    """
+    The "entries" dict of a {"version": ..., "entries": {...}} file.
+
+    A missing, unreadable or corrupt file, or one written with another
+    version, reads as empty.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            payload = json.load(fh)
+    except (FileNotFoundError, ValueError, OSError):
+        return {}
+    if not isinstance(payload, dict) or payload.get("version") != version:
+        return {}
+    entries = payload.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def write_json_atomic(path: Path, payload) -> None:
+    """Write `payload` to `path` through a temporary file and os.replace."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        # These files are caches: a read-only or full directory must never
+        # break a submission or a download.
+        try:
+            tmp.unlink(missing_ok=True)
+        except OSError:
+            pass
@@ -0,0 +1,200 @@
+import hashlib
+import io
+import os
+import tarfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from types import SimpleNamespace
+
+from thoa.config import settings
+from thoa.core.file_utils import FileRecord
+
+SHARD_DIRNAME = ".thoa-shards"
+SHARD_READ_CHUNK = 4 * 1024 * 1024
+MANIFEST_VERSION = 1
+
+_BLOCK = tarfile.BLOCKSIZE
+_RECORD = tarfile.RECORDSIZE
+
+
+def _padding(n: int, unit: int) -> int:
+    return -n % unit
+
+
+class TarShard:
+    """
+    A tar archive of small input files that only exists as a byte stream.
+
+    The archive is deterministic: members are written in a fixed order with
+    headers built from the scanned size and mtime, fixed ownership and no
+    wall-clock fields, so the same inputs always produce the same bytes. That
+    lets the MD5 be computed in one pass and the upload be streamed in
+    another without ever writing the archive to disk, and lets the server's
+    MD5 dedup reuse shards from earlier runs.
+
+    TarShard quacks like the parts of Path the upload path uses: `name`,
+    `open("rb")` and `stat().st_size`. `path` is the filename it is
+    registered under.
+    """
+
+    def __init__(self, index: int, members: list[FileRecord], root: Path):
+        self.index = index
+        self.members = list(members)
+        self.name = f"shard-{index:05d}.tar"
+        self.path = Path(root) / SHARD_DIRNAME / self.name
+        self._headers = [self._header(record) for record in self.members]
+        self._body_size = sum(len(h) + r.size + _padding(r.size, _BLOCK) for h, r in zip(self._headers, self.members))
+        end = self._body_size + 2 * _BLOCK
+        self.size = end + _padding(end, _RECORD)
+
+    @staticmethod
+    def arcname(record: FileRecord) -> str:
+        return str(record.path).lstrip(os.sep).replace(os.sep, "/")
+
+    def _header(self, record: FileRecord) -> bytes:
+        info = tarfile.TarInfo(self.arcname(record))
+        info.size = record.size
+        info.mtime = record.mtime_ns // 1_000_000_000
+        info.mode = 0o755 if os.access(record.path, os.X_OK) else 0o644
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        return info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+
+    def stat(self):
+        return SimpleNamespace(st_size=self.size)
+
+    def iter_chunks(self, chunk_size: int = SHARD_READ_CHUNK):
+        """Yield the archive bytes; raises ValueError if a member changed size since the scan."""
+        for header, record in zip(self._headers, self.members):
+            yield header
+            remaining = record.size
+            with open(record.path, "rb") as f:
+                while remaining:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+                if remaining or f.read(1):
+                    raise ValueError(f"{record.path} changed size since it was scanned")
+            pad = _padding(record.size, _BLOCK)
+            if pad:
+                yield bytes(pad)
+        # End-of-archive marker, padded to a full record like tarfile does.
+        yield bytes(self.size - self._body_size)
+
+    def open(self, mode: str = "rb"):
+        if mode != "rb":
+            raise ValueError("tar shards are read-only")
+        return ShardReader(self.iter_chunks())
+
+    def md5(self) -> str:
+        h = hashlib.md5()
+        for chunk in self.iter_chunks():
+            h.update(chunk)
+        return h.hexdigest()
+
+    def manifest_entry(self) -> dict:
+        return {
+            "filename": str(self.path),
+            "members": [
+                {"path": str(record.path), "arcname": self.arcname(record), "size": record.size}
+                for record in self.members
+            ],
+        }
+
+
+class ShardReader(io.RawIOBase):
+    """Minimal read-only file object over a chunk iterator."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._buffer + b"".join(self._chunks)
+            self._buffer = b""
+            return data
+        buf = bytearray(self._buffer)
+        while len(buf) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            buf += chunk
+        data, self._buffer = bytes(buf[:size]), bytes(buf[size:])
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def plan_shards(records, max_shard_bytes=None, small_file_bytes=None, root=None):
+    """
+    Split scanned inputs into tar shards of small files and loose large files.
+
+    Files up to `small_file_bytes` (THOA_SHARD_SMALL_FILE_BYTES) are packed in
+    scan order into shards of at most `max_shard_bytes` (THOA_SHARD_MAX_BYTES)
+    of member data; everything larger is uploaded as-is. Shards are named
+    under `root` (default: the current directory). Returns (shards, loose).
+    """
+    max_shard_bytes = max_shard_bytes or settings.THOA_SHARD_MAX_BYTES
+    small_file_bytes = small_file_bytes if small_file_bytes is not None else settings.THOA_SHARD_SMALL_FILE_BYTES
+    root = Path(root or Path.cwd())
+
+    shards, loose, current, current_bytes = [], [], [], 0
+    for record in records:
+        if record.size > small_file_bytes:
+            loose.append(record)
+            continue
+        if current and current_bytes + record.size > max_shard_bytes:
+            shards.append(TarShard(len(shards), current, root))
+            current, current_bytes = [], 0
+        current.append(record)
+        current_bytes += record.size
+    if current:
+        shards.append(TarShard(len(shards), current, root))
+    return shards, loose
+
+
+def hash_shards(shards, workers=4, on_hashed=None):
+    """
+    MD5 every shard in parallel, returning {shard.path: md5}.
+
+    Mirrors hash_all: `on_hashed(shard, md5)` runs as each digest is ready
+    and failures are reported as "ERROR: ..." digests.
+    """
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(shard.md5): shard for shard in shards}
+        try:
+            for fut in as_completed(futures):
+                shard = futures[fut]
+                try:
+                    md5 = fut.result()
+                except Exception as e:
+                    md5 = f"ERROR: {e}"
+                results[shard.path] = md5
+                if on_hashed is not None:
+                    on_hashed(shard, md5)
+        except BaseException:
+            for fut in futures:
+                fut.cancel()
+            raise
+    return {shard.path: results[shard.path] for shard in shards if shard.path in results}
+
+
+def shard_manifest(shards, registrations) -> dict:
+    """Manifest sent with the job so the remote side can unpack shards into the original paths."""
+    return {
+        "version": MANIFEST_VERSION,
+        "shards": [
+            {"file_public_id": registrations[shard.path]["public_id"], **shard.manifest_entry()}
+            for shard in shards
+        ],
+    }
@@ -0,0 +1,209 @@
+"""
+fsspec filesystem for reading dataset files in place: thoa://<dataset_id>/<path>.
+
+Requires the optional fsspec dependency (pip install "thoa[fsspec]"); the
+"thoa" protocol is registered through the fsspec.specs entry point, so
+
+    import pandas as pd
+    pd.read_csv("thoa://<dataset_id>/results/counts.tsv", sep="\\t")
+
+works once the package is installed.
+"""
+import threading
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ClientAuthenticationError, HttpResponseError
+from azure.storage.blob import BlobClient
+from fsspec.spec import AbstractBufferedFile, AbstractFileSystem
+
+from thoa.core.dataset_utils import (
+    _claim_download,
+    _dataset_files,
+    _extract_url,
+    _get_dataset,
+    _get_remote_state,
+    _request_download_link,
+)
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+DEFAULT_MAX_BLOCKS = 32
+DEFAULT_CACHE_TYPE = "background"
+
+
+class ThoaFileSystem(AbstractFileSystem):
+    """
+    Read-only view of THOA datasets.
+
+    Listings come from the dataset's file map; opening a file mints one
+    download link for its file id and reads it with ranged GETs pinned to
+    the blob's etag. The first file opened in a dataset counts one download
+    against its quota, so ls/info/exists are free but reading is not; the
+    map carries no sizes, so a file's size is None until it has been opened.
+    Files default to fsspec's "background" block cache: `block_size` bytes
+    per request, at most `max_blocks` blocks held, and the block after the
+    one being read fetched ahead on a worker thread.
+    """
+
+    protocol = "thoa"
+    root_marker = ""
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE, max_blocks: int = DEFAULT_MAX_BLOCKS, **kwargs):
+        super().__init__(**kwargs)
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self._datasets: dict[str, dict[str, str]] = {}
+        self._blobs: dict[str, tuple] = {}
+        self._claimed: set[str] = set()
+        self._claim_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _strip_protocol(cls, path):
+        return super()._strip_protocol(path).strip("/")
+
+    def _split(self, path) -> tuple[str, str]:
+        dataset_id, _, key = self._strip_protocol(path).partition("/")
+        return dataset_id, key
+
+    def _files(self, dataset_id: str) -> dict[str, str]:
+        with self._lock:
+            files = self._datasets.get(dataset_id)
+        if files is None:
+            raw = _dataset_files(dataset_id)
+            if raw is None:
+                raise FileNotFoundError(f"dataset {dataset_id} not found")
+            files = {path.strip("/"): str(file_id) for path, file_id in raw.items()}
+            with self._lock:
+                self._datasets[dataset_id] = files
+        return files
+
+    def _file_id(self, path) -> str:
+        dataset_id, key = self._split(path)
+        file_id = self._files(dataset_id).get(key)
+        if file_id is None:
+            raise FileNotFoundError(path)
+        return file_id
+
+    def _claim(self, dataset_id: str) -> None:
+        """Count one download of `dataset_id`, once per filesystem instance."""
+        with self._lock:
+            if dataset_id in self._claimed:
+                return
+            claim_lock = self._claim_locks.setdefault(dataset_id, threading.Lock())
+        # The API calls run under a per-dataset lock only, so cache lookups
+        # and readahead on other threads never wait on them.
+        with claim_lock:
+            with self._lock:
+                if dataset_id in self._claimed:
+                    return
+            dataset = _get_dataset(dataset_id)
+            if dataset is None:
+                raise FileNotFoundError(f"dataset {dataset_id} not found")
+            if _claim_download(dataset_id, dataset) is None:
+                raise PermissionError(f"dataset {dataset_id} has no remaining downloads")
+            with self._lock:
+                self._claimed.add(dataset_id)
+
+    def _blob(self, path, refresh: bool = False) -> tuple[BlobClient, int, str | None]:
+        """(blob client, size, etag) for a file, minting a download link on first use."""
+        file_id = self._file_id(path)
+        with self._lock:
+            cached = None if refresh else self._blobs.get(file_id)
+        if cached is not None:
+            return cached
+        self._claim(self._split(path)[0])
+        url = _extract_url(_request_download_link(file_id))
+        if not url:
+            raise PermissionError(f"could not get a download link for {path}")
+        blob = BlobClient.from_blob_url(url)
+        size, _, version = _get_remote_state(blob)
+        if size is None:
+            raise FileNotFoundError(path)
+        entry = (blob, size, version["etag"] if version else None)
+        with self._lock:
+            self._blobs[file_id] = entry
+        return entry
+
+    def _file_entry(self, dataset_id: str, key: str, file_id: str) -> dict:
+        """ls/info entry for a file, from what is already known: no link is minted."""
+        with self._lock:
+            cached = self._blobs.get(file_id)
+        size, etag = (cached[1], cached[2]) if cached else (None, None)
+        return {"name": f"{dataset_id}/{key}", "size": size, "type": "file", "file_id": file_id, "etag": etag}
+
+    def ls(self, path, detail=True, **kwargs):
+        dataset_id, key = self._split(path)
+        files = self._files(dataset_id)
+        if key in files:
+            entries = [self.info(path)]
+        else:
+            prefix = f"{key}/" if key else ""
+            children = {}
+            for file_path in files:
+                if not file_path.startswith(prefix):
+                    continue
+                name, _, rest = file_path[len(prefix):].partition("/")
+                if rest:
+                    children[name] = {"name": f"{dataset_id}/{prefix}{name}", "size": 0, "type": "directory"}
+                else:
+                    children.setdefault(name, self._file_entry(dataset_id, file_path, files[file_path]))
+            if not children:
+                raise FileNotFoundError(path)
+            entries = [children[name] for name in sorted(children)]
+        return entries if detail else [entry["name"] for entry in entries]
+
+    def info(self, path, **kwargs):
+        dataset_id, key = self._split(path)
+        files = self._files(dataset_id)
+        name = f"{dataset_id}/{key}" if key else dataset_id
+        if key in files:
+            return self._file_entry(dataset_id, key, files[key])
+        prefix = f"{key}/" if key else ""
+        if any(file_path.startswith(prefix) for file_path in files):
+            return {"name": name, "size": 0, "type": "directory"}
+        raise FileNotFoundError(path)
+
+    def _open(self, path, mode="rb", block_size=None, autocommit=True, cache_options=None,
+              cache_type=DEFAULT_CACHE_TYPE, **kwargs):
+        if mode != "rb":
+            raise NotImplementedError("thoa:// datasets are read-only")
+        blob, size, etag = self._blob(path)
+        if cache_type in ("background", "blockcache"):
+            cache_options = {"maxblocks": self.max_blocks, **(cache_options or {})}
+        return ThoaFile(
+            self, path, blob, etag,
+            mode=mode,
+            block_size=block_size or self.block_size,
+            cache_type=cache_type,
+            cache_options=cache_options,
+            size=size,
+        )
+
+
+class ThoaFile(AbstractBufferedFile):
+    """A dataset file read through ranged GETs; the blob must not change while open."""
+
+    def __init__(self, fs, path, blob, etag, **kwargs):
+        self.blob = blob
+        self.etag = etag
+        super().__init__(fs, path, **kwargs)
+
+    def _download(self, start, end) -> bytes:
+        conditions = {"etag": self.etag, "match_condition": MatchConditions.IfNotModified} if self.etag else {}
+        return self.blob.download_blob(offset=start, length=end - start, max_concurrency=1, **conditions).readall()
+
+    def _fetch_range(self, start, end):
+        end = min(end, self.size)
+        if start >= end:
+            return b""
+        try:
+            return self._download(start, end)
+        except (ClientAuthenticationError, HttpResponseError) as e:
+            # Download links expire; mint a fresh one once and retry.
+            if getattr(e, "status_code", None) not in (401, 403):
+                raise
+            blob, _, etag = self.fs._blob(self.path, refresh=True)
+            if etag != self.etag:
+                raise OSError(f"{self.path} changed while it was open") from e
+            self.blob = blob
+            return self._download(start, end)
@@ -0,0 +1,321 @@
+import itertools
+import math
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from azure.core import MatchConditions
+from azure.core.exceptions import ServiceResponseError
+
+from thoa.config import settings
+
+BYTES_PER_BLOCK_WORKER = 64 * 1024 * 1024
+
+DOWNLOAD_RANGE_SIZE = 4 * 1024 * 1024
+RANGED_DOWNLOAD_SUPPORTED = hasattr(os, "pwrite")
+
+
+class TransferBudget:
+    """
+    Global caps shared by every transfer in one upload run.
+
+    `connection()` bounds the number of concurrent storage requests and
+    `acquire_bytes()` bounds how many bytes are held in memory waiting to be
+    sent. A single request larger than the whole byte budget is still let
+    through once nothing else is in flight, so it can never deadlock.
+    """
+
+    def __init__(self, max_connections: int, max_inflight_bytes: int):
+        self.max_connections = max(1, max_connections)
+        self.max_inflight_bytes = max(1, max_inflight_bytes)
+        self._connections = threading.BoundedSemaphore(self.max_connections)
+        self._cond = threading.Condition()
+        self._inflight_bytes = 0
+        self.peak_inflight_bytes = 0
+
+    @classmethod
+    def from_settings(cls) -> "TransferBudget":
+        return cls(settings.THOA_UPLOAD_MAX_CONNECTIONS, settings.THOA_UPLOAD_MAX_INFLIGHT_BYTES)
+
+    @contextmanager
+    def connection(self):
+        with self._connections:
+            yield
+
+    def acquire_bytes(self, n: int) -> None:
+        with self._cond:
+            while self._inflight_bytes and self._inflight_bytes + n > self.max_inflight_bytes:
+                self._cond.wait()
+            self._inflight_bytes += n
+            self.peak_inflight_bytes = max(self.peak_inflight_bytes, self._inflight_bytes)
+
+    def release_bytes(self, n: int) -> None:
+        with self._cond:
+            self._inflight_bytes -= n
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, n: int):
+        """Hold `n` bytes of budget and one connection for the duration of a request."""
+        self.acquire_bytes(n)
+        try:
+            with self.connection():
+                yield
+        finally:
+            self.release_bytes(n)
+
+
+def budget_connection(budget: TransferBudget | None):
+    return budget.connection() if budget is not None else nullcontext()
+
+
+def block_concurrency_for(size: int, max_concurrency: int | None = None) -> int:
+    """Parallel block requests for one file: roughly one per 64 MiB, between 2 and the cap."""
+    cap = max_concurrency or settings.THOA_UPLOAD_MAX_BLOCK_CONCURRENCY
+    return max(1, min(cap, max(2, math.ceil(size / BYTES_PER_BLOCK_WORKER))))
+
+
+class TransferScheduler:
+    """
+    Run transfers in two lanes with separate worker threads.
+
+    Files up to `small_threshold` bytes go to a FIFO latency lane so a burst of
+    tiny files is never stuck behind a 200 GB BAM; larger files go to a lane
+    that always picks the largest pending file next, which minimises the
+    makespan. Work can be submitted while earlier work is already running.
+    """
+
+    _STOP = math.inf
+
+    def __init__(self, small_threshold: int, small_workers: int, large_workers: int):
+        self.small_threshold = small_threshold
+        self._seq = itertools.count()
+        self._lanes = {"small": queue.PriorityQueue(), "large": queue.PriorityQueue()}
+        self._threads = []
+        for lane, n in (("small", small_workers), ("large", large_workers)):
+            for _ in range(max(1, n)):
+                t = threading.Thread(target=self._work, args=(self._lanes[lane],), daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, size: int, fn, *args, **kwargs) -> Future:
+        fut = Future()
+        seq = next(self._seq)
+        if size <= self.small_threshold:
+            self._lanes["small"].put((seq, seq, fut, fn, args, kwargs))
+        else:
+            self._lanes["large"].put((-size, seq, fut, fn, args, kwargs))
+        return fut
+
+    def _work(self, lane: queue.PriorityQueue):
+        while True:
+            priority, _, fut, fn, args, kwargs = lane.get()
+            if priority == self._STOP:
+                return
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+
+    def shutdown(self, wait: bool = True):
+        for lane in self._lanes.values():
+            for _ in self._threads:
+                lane.put((self._STOP, next(self._seq), None, None, (), {}))
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(wait=True)
+
+
+def preallocate(fd: int, size: int) -> None:
+    """Reserve `size` bytes for fd up front so parallel writes never extend the file."""
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass  # e.g. filesystems without fallocate support
+    if os.fstat(fd).st_size < size:
+        os.ftruncate(fd, size)
+
+
+class _RangeWriter:
+    """File-like sink that copies whatever the SDK hands it into a fixed memoryview."""
+
+    def __init__(self, buf: memoryview):
+        self.buf = buf
+        self.n = 0
+
+    def write(self, data) -> int:
+        n = len(data)
+        self.buf[self.n:self.n + n] = data
+        self.n += n
+        return n
+
+
+def _pwrite_all(fd: int, view: memoryview, offset: int) -> None:
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def download_ranges(
+    blob_client,
+    fd: int,
+    start: int,
+    end: int,
+    etag: str | None = None,
+    md5=None,
+    workers: int = 8,
+    range_size: int | None = None,
+    on_commit=None,
+) -> int:
+    """
+    Download bytes [start, end) of a blob into `fd` with parallel ranged GETs.
+
+    Each worker takes the next range, copies the chunks the SDK returns into
+    one of `workers + 2` reusable buffers and writes the buffer in place
+    with os.pwrite, so memory is bounded by the buffer pool and the file
+    handle is never shared. The file should already be preallocated (see
+    preallocate).
+
+    Completed ranges are folded strictly in offset order: `md5` (a hashlib
+    object, optional) is updated and `on_commit(offset)` is told how far the
+    file is now contiguous, which makes the prefix safe to resume from. A
+    range that finishes early keeps its buffer until the ranges before it
+    are folded, which bounds memory to the buffer pool.
+
+    With `etag`, every request is conditional on it, so a blob replaced mid
+    download raises ResourceModifiedError instead of mixing contents. The
+    first error stops all workers and is re-raised. Returns the committed
+    offset.
+    """
+    range_size = range_size or DOWNLOAD_RANGE_SIZE
+    n_ranges = math.ceil((end - start) / range_size) if end > start else 0
+    if not n_ranges:
+        return start
+    workers = max(1, min(workers, n_ranges))
+
+    free = queue.Queue()
+    for _ in range(workers + 2):
+        free.put(memoryview(bytearray(range_size)))
+
+    next_index = itertools.count()
+    index_lock = threading.Lock()
+    fold_lock = threading.Lock()
+    completed = {}
+    state = {"next_fold": 0, "committed": start}
+    errors = []
+    stop = threading.Event()
+    conditions = {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+
+    def fold():
+        with fold_lock:
+            advanced = False
+            while state["next_fold"] in completed:
+                buf, n = completed.pop(state["next_fold"])
+                if md5 is not None:
+                    md5.update(buf[:n])
+                free.put(buf)
+                state["next_fold"] += 1
+                state["committed"] += n
+                advanced = True
+            if advanced and on_commit is not None:
+                on_commit(state["committed"])
+
+    def work():
+        while not stop.is_set():
+            buf = free.get()
+            # Taking the index only once a buffer is held guarantees the
+            # lowest unfolded range is always in flight or foldable.
+            with index_lock:
+                i = next(next_index)
+            if stop.is_set() or i >= n_ranges:
+                free.put(buf)
+                return
+            offset = start + i * range_size
+            length = min(range_size, end - offset)
+            try:
+                sink = _RangeWriter(buf)
+                blob_client.download_blob(offset=offset, length=length, max_concurrency=1, **conditions).readinto(sink)
+                if sink.n != length:
+                    raise ServiceResponseError(f"short read at offset {offset}: {sink.n} of {length} bytes")
+                _pwrite_all(fd, buf[:length], offset)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+                free.put(buf)
+                return
+            with fold_lock:
+                completed[i] = (buf, length)
+            fold()
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if errors:
+        raise errors[0]
+    return state["committed"]
+
+
+def iter_ranges(
+    blob_client,
+    start: int,
+    end: int,
+    etag: str | None = None,
+    workers: int = 8,
+    range_size: int | None = None,
+    max_buffered_bytes: int | None = None,
+):
+    """
+    Yield bytes [start, end) of a blob in order, fetched with parallel ranged GETs.
+
+    Up to `max_buffered_bytes` (default two ranges per worker) of ranges are
+    requested ahead of the consumer; a range is only requested once the one
+    `max_buffered_bytes` before it has been yielded, so memory stays capped
+    however slowly the output drains. With `etag` every request is
+    conditional on it, as in download_ranges. Closing the generator cancels
+    the ranges not yet started.
+    """
+    range_size = range_size or DOWNLOAD_RANGE_SIZE
+    if end <= start:
+        return
+    window = max(1, (max_buffered_bytes or 2 * workers * range_size) // range_size)
+    conditions = {"etag": etag, "match_condition": MatchConditions.IfNotModified} if etag else {}
+
+    def fetch(offset):
+        length = min(range_size, end - offset)
+        data = blob_client.download_blob(offset=offset, length=length, max_concurrency=1, **conditions).readall()
+        if len(data) != length:
+            raise ServiceResponseError(f"short read at offset {offset}: {len(data)} of {length} bytes")
+        return data
+
+    offsets = iter(range(start, end, range_size))
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, window))) as pool:
+        try:
+            for offset in itertools.islice(offsets, window):
+                pending.append(pool.submit(fetch, offset))
+            while pending:
+                data = pending.popleft().result()
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(pool.submit(fetch, offset))
+                yield data
+        finally:
+            for fut in pending:
+                fut.cancel()
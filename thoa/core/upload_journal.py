@@ -0,0 +1,98 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from thoa.core.hash_cache import default_cache_dir
+
+JOURNAL_DIRNAME = "upload_journal"
+
+# Azure discards uncommitted blocks after seven days; older journals are useless.
+JOURNAL_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+
+def _blob_identity(sas_url: str) -> str:
+    """Blob URL without the SAS query, which changes on every link."""
+    parts = urlsplit(sas_url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+class UploadJournal:
+    """
+    Append-only record of the blocks staged for one (file md5, blob) upload.
+
+    The first line is a JSON header; every following line is "<block id>
+    <block md5>" for a stage_block call that succeeded. Keeping the block MD5
+    lets a resumed upload skip a block only when the bytes it reads now are
+    the bytes that were staged. Appending keeps each update O(1) even for
+    files with tens of thousands of blocks.
+    """
+
+    def __init__(self, path: Path, md5: str, blob: str, block_size: int):
+        self.path = Path(path)
+        self.md5 = md5
+        self.blob = blob
+        self.block_size = block_size
+        self.staged: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._fh = None
+
+    @classmethod
+    def open(cls, sas_url: str, md5: str, block_size: int, journal_dir: Path | None = None) -> "UploadJournal":
+        blob = _blob_identity(sas_url)
+        key = hashlib.sha1(f"{md5}\n{blob}".encode()).hexdigest()
+        directory = Path(journal_dir or default_cache_dir() / JOURNAL_DIRNAME)
+        journal = cls(directory / f"{key}.journal", md5, blob, block_size)
+        journal._load()
+        return journal
+
+    def _header(self) -> dict:
+        return {"md5": self.md5, "blob": self.blob, "block_size": self.block_size}
+
+    def _load(self):
+        try:
+            if time.time() - self.path.stat().st_mtime > JOURNAL_MAX_AGE_SECONDS:
+                self.discard()
+                return
+            with open(self.path, "r", encoding="utf-8") as fh:
+                header = json.loads(fh.readline())
+                if header != self._header():
+                    return
+                for line in fh:
+                    fields = line.split()
+                    if len(fields) == 2:
+                        self.staged[fields[0]] = fields[1]
+        except (OSError, ValueError):
+            self.staged = {}
+
+    def record(self, block_id: str, block_md5: str) -> None:
+        """Persist that `block_id` with content `block_md5` has been staged on the service."""
+        with self._lock:
+            try:
+                if self._fh is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    fresh = not self.staged
+                    self._fh = open(self.path, "w" if fresh else "a", encoding="utf-8")
+                    if fresh:
+                        self._fh.write(json.dumps(self._header()) + "\n")
+                self._fh.write(f"{block_id} {block_md5}\n")
+                self._fh.flush()
+                self.staged[block_id] = block_md5
+            except OSError:
+                # Losing the journal only costs re-staging on the next attempt.
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def discard(self) -> None:
+        self.close()
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError:
+            pass